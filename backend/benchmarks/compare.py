@@ -0,0 +1,47 @@
+"""Compare two benchmarks.pipeline result files stage by stage.
+
+Run from the backend folder:
+python -m benchmarks.compare before.json after.json --fail-above 20
+"""
+import argparse
+import json
+import sys
+
+
+def load_results(path):
+    with open(path) as file:
+        return json.load(file)['results']
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument('--fail-above', type=float,
+                        help='Exit with an error when a stage got slower by more than '
+                             'this many percent')
+    args = parser.parse_args()
+
+    before, after = load_results(args.before), load_results(args.after)
+    regressions = []
+    print(f'{"stage":<32}{"before ms":>12}{"after ms":>12}{"change":>10}')
+    for stage in list(dict.fromkeys([*before, *after])):
+        if stage not in before or stage not in after:
+            only_in = 'only in ' + ('after' if stage in after else 'before')
+            print(f'{stage:<32}{only_in:>34}')
+            continue
+        old, new = before[stage]['median_ms'], after[stage]['median_ms']
+        change = (new - old) / old * 100 if old else 0
+        print(f'{stage:<32}{old:>12.2f}{new:>12.2f}{change:>+9.1f}%')
+        if args.fail_above is not None and change > args.fail_above:
+            regressions.append(stage)
+
+    if regressions:
+        print(f'Slower by more than {args.fail_above}%: {", ".join(regressions)}',
+              file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
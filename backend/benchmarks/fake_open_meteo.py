@@ -0,0 +1,127 @@
+"""Local stand-in for the Open-Meteo archive and forecast APIs.
+
+Replays the responses in benchmarks/fixtures: hourly values are repeated over
+whatever range and coordinates are requested, so any request the app makes gets a
+realistic answer without the network.
+
+Run from the backend folder: python -m benchmarks.fake_open_meteo --port 8765
+then start the app with OPEN_METEO_ARCHIVE_URL=http://127.0.0.1:8765/v1/era5
+and OPEN_METEO_FORECAST_URL=http://127.0.0.1:8765/v1/forecast
+"""
+import argparse
+import json
+import os
+import threading
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, f'{name}.json')) as file:
+        return json.load(file)
+
+
+def _replay(fixture, lat, lng, start, hours):
+    hourly = fixture['hourly']
+    recorded = len(hourly['time'])
+    times = [start + timedelta(hours=i) for i in range(hours)]
+    replayed = {'time': [time.strftime('%Y-%m-%dT%H:%M') for time in times]}
+    for variable, values in hourly.items():
+        if variable != 'time':
+            replayed[variable] = [values[i % recorded] for i in range(hours)]
+    return {**fixture, 'latitude': float(lat), 'longitude': float(lng),
+            'hourly': replayed}
+
+
+def _coordinates(params):
+    return zip(params['latitude'].split(','), params['longitude'].split(','))
+
+
+def archive_response(fixture, params):
+    start = date.fromisoformat(params['start_date'])
+    hours = ((date.fromisoformat(params['end_date']) - start).days + 1) * 24
+    start = datetime.combine(start, datetime.min.time())
+    return [_replay(fixture, lat, lng, start, hours)
+            for lat, lng in _coordinates(params)]
+
+
+def forecast_response(fixture, params):
+    start = datetime.combine(date.today(), datetime.min.time())
+    hours = len(fixture['hourly']['time'])
+    return [_replay(fixture, lat, lng, start, hours)
+            for lat, lng in _coordinates(params)]
+
+
+class FakeOpenMeteoHandler(BaseHTTPRequestHandler):
+    fixtures = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        if url.path.endswith('/forecast'):
+            payloads = forecast_response(self.fixtures['forecast'], params)
+        else:
+            payloads = archive_response(self.fixtures['archive'], params)
+
+        # Open-Meteo answers with a list only when several coordinates were requested
+        payload = payloads if len(payloads) > 1 else payloads[0]
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeOpenMeteo:
+    def __init__(self, host='127.0.0.1', port=0):
+        fixtures = {name: load_fixture(name) for name in ('archive', 'forecast')}
+        handler = type('Handler', (FakeOpenMeteoHandler,), {'fixtures': fixtures})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def archive_url(self):
+        return f'{self.url}/v1/era5'
+
+    @property
+    def forecast_url(self):
+        return f'{self.url}/v1/forecast'
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    with FakeOpenMeteo(args.host, args.port) as server:
+        print(f'Serving fake Open-Meteo on {server.url}')
+        try:
+            server.thread.join()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Accuracy and fit time of each forecast engine for different training windows and
+resampling.
+
+Run from the backend folder: python -m benchmarks.forecast_training
+"""
+import argparse
+import time
+
+import numpy as np
+
+from weather_api_collector.forecasting import (
+    ENGINES, FORECAST_STEPS, MAX_RESAMPLE_HOURS, fit_forecast,
+)
+
+HOURS_PER_YEAR = 365 * 24
+
+
+def synthetic_temperatures(hours, seed=0):
+    # Annual and daily cycles plus AR(1) weather noise, close enough to ERA5
+    # temperatures to rank the engines
+    rng = np.random.default_rng(seed)
+    t = np.arange(hours)
+    noise = np.zeros(hours)
+    shocks = rng.normal(0, 0.6, hours)
+    for i in range(1, hours):
+        noise[i] = 0.97 * noise[i - 1] + shocks[i]
+    annual = -10 * np.cos(2 * np.pi * t / HOURS_PER_YEAR)
+    daily = 4 * np.sin(2 * np.pi * (t - 9) / 24)
+    return 10 + annual + daily + noise
+
+
+def benchmark(engine, values, train_days, resample, origins):
+    fit_times, errors = [], []
+    for origin in origins:
+        start = 0 if train_days is None else max(origin - train_days * 24, 0)
+        history = values[start:origin]
+        started = time.perf_counter()
+        _, forecast = fit_forecast(engine, history, FORECAST_STEPS, resample=resample)
+        fit_times.append(time.perf_counter() - started)
+        actual = values[origin:origin + FORECAST_STEPS]
+        errors.append(np.abs(np.asarray(forecast) - actual).mean())
+    return np.median(fit_times) * 1000, np.mean(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--engines', default=','.join(ENGINES))
+    parser.add_argument('--train-days', default='7,30,90,365')
+    parser.add_argument('--resample', default='1,3')
+    parser.add_argument('--origins', type=int, default=5,
+                        help='Forecast origins, one per day at the end of the year')
+    args = parser.parse_args()
+    resamples = [int(hours) for hours in args.resample.split(',')]
+    if any(not 1 <= hours <= MAX_RESAMPLE_HOURS or 24 % hours for hours in resamples):
+        parser.error(f'--resample takes hours that divide 24, at most '
+                     f'{MAX_RESAMPLE_HOURS}')
+
+    values = synthetic_temperatures(HOURS_PER_YEAR + args.origins * 24)
+    origins = [HOURS_PER_YEAR + i * 24 - FORECAST_STEPS for i in range(args.origins)]
+
+    print(f'{"engine":<16}{"train_days":>12}{"resample":>10}{"fit ms":>12}{"MAE":>10}')
+    for engine in args.engines.split(','):
+        for train_days in (int(days) for days in args.train_days.split(',')):
+            for resample in resamples:
+                fit_ms, mae = benchmark(engine, values, train_days, resample, origins)
+                print(f'{engine:<16}{train_days:>12}{resample:>10}'
+                      f'{fit_ms:>12.2f}{mae:>10.3f}')
+
+
+if __name__ == '__main__':
+    main()
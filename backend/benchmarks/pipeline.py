@@ -0,0 +1,209 @@
+"""Time every stage of the weather-data pipeline and the city/country endpoints.
+
+Runs against a throwaway test database and the local fake Open-Meteo server, so
+results only depend on the code. Writes JSON that benchmarks.compare can diff between
+two commits.
+
+Run from the backend folder: python -m benchmarks.pipeline --output before.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import django
+
+from benchmarks.fake_open_meteo import FakeOpenMeteo
+
+BENCHMARK_CITY = 'Benchmark'
+BENCHMARK_COUNTRY = 'Benchland'
+
+
+def timed(fn, repeat, setup=None):
+    durations = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        fn()
+        durations.append((time.perf_counter() - started) * 1000)
+    return {
+        'runs': repeat,
+        'min_ms': min(durations),
+        'median_ms': statistics.median(durations),
+        'mean_ms': statistics.mean(durations),
+    }
+
+
+def git_commit():
+    try:
+        result = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True,
+                                text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def benchmark_pipeline(repeat, start_date, end_date):
+    from django.conf import settings
+    from django.db.models import Count
+    from django.test import Client
+
+    from weather_api_collector.forecasting import ENGINES, fit_forecast
+    from weather_api_collector.metrics import forecast_errors
+    from weather_api_collector.models import (
+        ArchiveResponse, City, ForecastModelState, PrecomputedReport,
+    )
+    from weather_api_collector.observations import upsert_observations
+    from weather_api_collector.open_meteo import (
+        HOURLY_VARIABLES, fetch_forecast, iter_archive_chunks,
+    )
+    from weather_api_collector.reports import training_frame
+    from weather_api_collector.statistics import key_indicators
+
+    city = City.objects.create(city=BENCHMARK_CITY, lat=50.45, lng=30.52,
+                               country=BENCHMARK_COUNTRY, iso2='BL', iso3='BLD',
+                               population=10 ** 9)
+    results = {}
+
+    def fetch_archive():
+        chunks = iter_archive_chunks([(city.lat, city.lng)], [(start_date, end_date)])
+        return [weather_data for _, weather_data in chunks]
+
+    def clear_archive():
+        ArchiveResponse.objects.all().delete()
+
+    def parse_observations():
+        for weather_data in payloads:
+            upsert_observations(city, weather_data['hourly'])
+
+    results['fetch_archive'] = timed(fetch_archive, repeat, setup=clear_archive)
+    payloads = fetch_archive()
+    results['parse_observations'] = timed(parse_observations, repeat)
+
+    training_frame(city, start_date, end_date, None)
+    results['dataframe'] = timed(
+        lambda: training_frame(city, start_date, end_date, None), repeat)
+    frame = training_frame(city, start_date, end_date, None)
+    results['describe'] = timed(
+        lambda: frame[list(HOURLY_VARIABLES)].describe(), repeat)
+    results['key_indicators'] = timed(
+        lambda: key_indicators(city, start_date, end_date), repeat)
+
+    train_days = settings.FORECAST_TRAIN_DAYS
+    train_frame = training_frame(city, start_date, end_date, train_days)
+    values = train_frame['temperature_2m'].to_numpy()
+    forecasts = {}
+    for engine in ENGINES:
+        results[f'fit_{engine}'] = timed(lambda: fit_forecast(engine, values), repeat)
+        forecasts[engine] = fit_forecast(engine, values)[1]
+
+    results['fetch_forecast'] = timed(
+        lambda: fetch_forecast(city.lat, city.lng), repeat)
+    forecast = fetch_forecast(city.lat, city.lng)
+    real_temperature = forecast['hourly']['temperature_2m'][-24:]
+    results['metrics'] = timed(
+        lambda: forecast_errors(list(forecasts.values()), real_temperature), repeat)
+
+    client = Client()
+    weather_url = f'/api/weather-data/{BENCHMARK_CITY}/'
+    weather_params = {'start_date': start_date.isoformat(),
+                      'end_date': end_date.isoformat()}
+
+    def clear_forecasts():
+        PrecomputedReport.objects.all().delete()
+        ForecastModelState.objects.all().delete()
+
+    def get(url, params=None):
+        response = client.get(url, params or {})
+        assert response.status_code == 200, f'{url} answered {response.status_code}'
+        return response
+
+    def get_weather():
+        return get(weather_url, weather_params)
+
+    results['endpoint_weather_data_cold'] = timed(get_weather, repeat,
+                                                  setup=clear_forecasts)
+    results['endpoint_weather_data_warm'] = timed(get_weather, repeat)
+
+    countries = City.objects.values('country').annotate(cities=Count('id'))
+    largest_country = countries.order_by('-cities')[0]['country']
+    endpoints = {
+        'endpoint_city_list': ('/api/city/', None),
+        'endpoint_city_search': ('/api/city/', {'search': 'san'}),
+        'endpoint_countries': ('/api/countries/', None),
+        'endpoint_cities_by_country': (f'/api/cities/{largest_country}/', None),
+        'endpoint_country_average': (f'/api/country-average/{largest_country}/', None),
+    }
+    for name, (url, params) in endpoints.items():
+        get(url, params)
+        results[name] = timed(lambda: get(url, params), repeat)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--days', type=int, default=365,
+                        help='Length of the requested history')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='FORECAST_WORKERS for the endpoint stages')
+    parser.add_argument('--output',
+                        help='Write the JSON results here instead of stdout')
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    django.setup()
+    from django.test.utils import (
+        override_settings, setup_databases, setup_test_environment, teardown_databases,
+        teardown_test_environment,
+    )
+
+    # A fixed range far enough back to be outside the ERA5 revision window
+    end_date = date(2023, 12, 31)
+    start_date = end_date - timedelta(days=args.days - 1)
+
+    setup_test_environment()
+    databases = setup_databases(verbosity=0, interactive=False)
+    try:
+        with FakeOpenMeteo() as server, tempfile.TemporaryDirectory() as series_dir:
+            with override_settings(
+                OPEN_METEO_ARCHIVE_URL=server.archive_url,
+                OPEN_METEO_FORECAST_URL=server.forecast_url,
+                WEATHER_SERIES_DIR=series_dir,
+                FORECAST_WORKERS=args.workers,
+                SINGLE_FLIGHT_LOCK_DIR=None,
+            ):
+                results = benchmark_pipeline(args.repeat, start_date, end_date)
+    finally:
+        teardown_databases(databases, verbosity=0)
+        teardown_test_environment()
+
+    report = {
+        'commit': git_commit(),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'days': args.days,
+        'results': results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output + '\n')
+    else:
+        print(output)
+
+    for stage, timing in results.items():
+        print(f'{stage:<32}{timing["median_ms"]:>12.2f} ms', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+"""Measure how long a fresh worker takes to get going and how much memory it holds.
+
+Every sample runs in a new interpreter: `manage.py check`, the first requests to the
+cheap and the forecasting endpoints, and a forecast pool worker's first fit with and
+without FORECAST_PRELOAD. Writes JSON in the benchmarks.pipeline format, so
+benchmarks.compare can diff the timings.
+
+Run from the backend folder: python -m benchmarks.startup --output before.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.pipeline import git_commit
+
+HEAVY_MODULES = ('pandas', 'statsmodels', 'scipy')
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+
+def rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 / 1024 if sys.platform == 'darwin' else rss / 1024
+
+
+def loaded_heavy_modules():
+    return [module for module in HEAVY_MODULES if module in sys.modules]
+
+
+def first_requests():
+    started = time.perf_counter()
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    import django
+    django.setup()
+    timings = {'django_setup': time.perf_counter() - started}
+
+    from unittest import mock
+
+    from django.test import Client
+    from django.test.utils import (
+        override_settings, setup_databases, setup_test_environment,
+    )
+
+    from benchmarks.fake_open_meteo import FakeOpenMeteo
+    from weather_api_collector.models import City
+
+    setup_test_environment()
+    setup_databases(verbosity=0, interactive=False)
+    City.objects.create(city='Benchmark', lat=50.45, lng=30.52, country='Benchland',
+                        population=1)
+
+    client = Client()
+    started = time.perf_counter()
+    assert client.get('/api/city/').status_code == 200
+    assert client.get('/api/countries/').status_code == 200
+    timings['first_city_request'] = time.perf_counter() - started
+    memory = {'after_city_request': rss_mb()}
+    modules = {'after_city_request': loaded_heavy_modules()}
+
+    # The first weather report pays for the forecasting stack, Open-Meteo is replaced by
+    # the fake server
+    with FakeOpenMeteo() as server, override_settings(
+        OPEN_METEO_ARCHIVE_URL=server.archive_url,
+        OPEN_METEO_FORECAST_URL=server.forecast_url,
+        FORECAST_WORKERS=0,
+        SINGLE_FLIGHT_LOCK_DIR=None,
+        WEATHER_SERIES_DIR=os.environ['BENCHMARK_SERIES_DIR'],
+    ):
+        with mock.patch('weather_api_collector.precompute.get_precomputed_report',
+                        return_value=None):
+            started = time.perf_counter()
+            query = {'start_date': '2023-01-01', 'end_date': '2023-01-31'}
+            response = client.get('/api/weather-data/Benchmark/', query)
+            assert response.status_code == 200, response.content
+            timings['first_weather_request'] = time.perf_counter() - started
+    memory['after_weather_request'] = rss_mb()
+    modules['after_weather_request'] = loaded_heavy_modules()
+    return {'timings': timings, 'memory_mb': memory, 'modules': modules}
+
+
+def _worker_ready():
+    return rss_mb()
+
+
+def _worker_fit():
+    import numpy as np
+
+    from weather_api_collector.forecasting import fit_forecast
+
+    values = 10 + 5 * np.sin(2 * np.pi * np.arange(24 * 30) / 24)
+    fit_forecast('holtwinters', values)
+    fit_forecast('arima', values)
+    return rss_mb()
+
+
+def forecast_worker(preload):
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    from weather_api_collector.forecasting import preload as preload_engines
+
+    timings = {}
+    mp_context = multiprocessing.get_context('spawn')
+    initializer = preload_engines if preload else None
+    with ProcessPoolExecutor(max_workers=1, mp_context=mp_context,
+                             initializer=initializer) as pool:
+        started = time.perf_counter()
+        pool.submit(_worker_ready).result()
+        timings['worker_start'] = time.perf_counter() - started
+        started = time.perf_counter()
+        worker_rss = pool.submit(_worker_fit).result()
+        timings['worker_first_fit'] = time.perf_counter() - started
+    return {'timings': timings, 'memory_mb': {'worker': worker_rss}}
+
+
+def run_child(mode, env):
+    command = [sys.executable, '-m', 'benchmarks.startup', '--child', mode]
+    result = subprocess.run(command, env=env, capture_output=True, text=True)
+    if result.returncode:
+        raise RuntimeError(f'{mode} failed:\n{result.stderr}')
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def summarize(durations):
+    durations = [duration * 1000 for duration in durations]
+    return {
+        'runs': len(durations),
+        'min_ms': min(durations),
+        'median_ms': statistics.median(durations),
+        'mean_ms': statistics.mean(durations),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output',
+                        help='Write the JSON results here instead of stdout')
+    parser.add_argument('--child', choices=['requests', 'worker', 'preloaded_worker'],
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+        if args.child == 'requests':
+            print(json.dumps(first_requests()))
+        else:
+            import django
+            django.setup()
+            print(json.dumps(forecast_worker(args.child == 'preloaded_worker')))
+        return
+
+    import tempfile
+    durations, memory, modules = {}, {}, {}
+    with tempfile.TemporaryDirectory() as series_dir:
+        env = {**os.environ, 'BENCHMARK_SERIES_DIR': series_dir}
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            manage_py = os.path.join(BACKEND_DIR, 'manage.py')
+            subprocess.run([sys.executable, manage_py, 'check'], env=env, check=True,
+                           capture_output=True)
+            check_seconds = time.perf_counter() - started
+            durations.setdefault('manage_py_check', []).append(check_seconds)
+
+            for mode, prefix in (('requests', ''), ('worker', ''),
+                                 ('preloaded_worker', 'preloaded_')):
+                sample = run_child(mode, env)
+                for stage, seconds in sample['timings'].items():
+                    durations.setdefault(prefix + stage, []).append(seconds)
+                for stage, megabytes in sample['memory_mb'].items():
+                    memory.setdefault(prefix + stage, []).append(megabytes)
+                modules.update(sample.get('modules', {}))
+
+    report = {
+        'commit': git_commit(),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': {stage: summarize(samples) for stage, samples in durations.items()},
+        'memory_mb': {stage: statistics.median(samples)
+                      for stage, samples in memory.items()},
+        'heavy_modules_loaded': modules,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output + '\n')
+    else:
+        print(output)
+
+    for stage, timing in report['results'].items():
+        print(f'{stage:<32}{timing["median_ms"]:>12.2f} ms', file=sys.stderr)
+    for stage, megabytes in report['memory_mb'].items():
+        print(f'{stage:<32}{megabytes:>12.1f} MB', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -49,6 +49,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'weather_api_collector.middleware.InstrumentationMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -139,3 +140,127 @@ REST_FRAMEWORK = {
 }
 
 CORS_ALLOW_ALL_ORIGINS = True
+
+# Open-Meteo
+OPEN_METEO_ARCHIVE_URL = os.getenv(
+    'OPEN_METEO_ARCHIVE_URL', 'https://archive-api.open-meteo.com/v1/era5'
+)
+OPEN_METEO_FORECAST_URL = os.getenv(
+    'OPEN_METEO_FORECAST_URL', 'https://api.open-meteo.com/v1/forecast'
+)
+
+# ERA5 keeps revising the most recent days, anything older is final and cached for good
+ARCHIVE_REVISION_DAYS = 7
+# Days younger than this are not published in full yet, the observation store skips them
+ARCHIVE_DELAY_DAYS = 5
+ARCHIVE_CACHE_TTL = 60 * 60
+ARCHIVE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Long archive ranges are downloaded in ARCHIVE_CHUNK_MONTHS
+# chunks, ARCHIVE_FETCH_CONCURRENCY at a time
+ARCHIVE_CHUNK_MONTHS = 1
+ARCHIVE_FETCH_CONCURRENCY = int(os.getenv('ARCHIVE_FETCH_CONCURRENCY', 4))
+
+# Engines used when a request has no ?models=. The NumPy baselines (seasonal_naive,
+# damped_trend, harmonic) fit in well under a millisecond in the request thread,
+# holtwinters and arima need statsmodels, the forecast pool and the model cache and
+# are only fitted when asked for
+FORECAST_DEFAULT_ENGINES = os.getenv('FORECAST_DEFAULT_ENGINES',
+                                     'seasonal_naive,damped_trend').split(',')
+
+# Forecasts train on the last FORECAST_TRAIN_DAYS of the requested range (None for
+# all of it), optionally averaged into FORECAST_RESAMPLE_HOURS blocks first
+FORECAST_TRAIN_DAYS = None
+FORECAST_MAX_TRAIN_DAYS = 366 * 10
+FORECAST_RESAMPLE_HOURS = 1
+
+# The backtest_forecasts command scores every engine on rolling origins
+# over the last BACKTEST_DAYS of stored history, reports use those scores
+# instead of a live comparison while they are younger than the max age
+BACKTEST_DAYS = 30
+BACKTEST_STEP_HOURS = 24
+BACKTEST_TOP_CITIES = 100
+BACKTEST_WORKERS = int(os.getenv('BACKTEST_WORKERS', os.cpu_count() or 1))
+ACCURACY_SUMMARY_MAX_AGE_DAYS = 7
+
+# Fitted forecast models are re-filtered with their stored parameters while the training
+# window has moved less than this since they were last estimated
+FORECAST_REFILTER_MAX_HOURS = 24
+FORECAST_MODEL_CACHE_SIZE = 10
+
+# Forecast models are fitted on a process pool, 0 fits them inline in the request thread
+FORECAST_WORKERS = int(os.getenv('FORECAST_WORKERS', os.cpu_count() or 1))
+FORECAST_MAX_PENDING = int(os.getenv('FORECAST_MAX_PENDING', FORECAST_WORKERS * 4))
+FORECAST_TIMEOUT = float(os.getenv('FORECAST_TIMEOUT', 30))
+FORECAST_MP_CONTEXT = 'spawn'
+# statsmodels and pandas are imported on first use, so the city and country
+# endpoints never load them. Forecast worker processes (and the warm_forecasts
+# worker) import them when they start instead of on their first fit.
+FORECAST_PRELOAD = bool(int(os.getenv('FORECAST_PRELOAD', 1)))
+
+OPEN_METEO_CONNECT_TIMEOUT = float(os.getenv('OPEN_METEO_CONNECT_TIMEOUT', 5))
+OPEN_METEO_READ_TIMEOUT = float(os.getenv('OPEN_METEO_READ_TIMEOUT', 30))
+OPEN_METEO_RETRIES = int(os.getenv('OPEN_METEO_RETRIES', 3))
+OPEN_METEO_BACKOFF = 0.5
+OPEN_METEO_MAX_CONNECTIONS = 100
+# Locations sent in one multi-location archive or forecast request
+OPEN_METEO_BATCH_SIZE = 50
+
+# Concurrent requests for the same city and date range share one computation per worker,
+# set a directory to also coalesce them across workers with file locks
+SINGLE_FLIGHT_LOCK_DIR = os.getenv('SINGLE_FLIGHT_LOCK_DIR')
+WEATHER_BATCH_MAX_CITIES = 50
+
+# City autocomplete is served from an in-memory index, rebuilt at most every
+# CITY_SEARCH_INDEX_TTL seconds
+CITY_SEARCH_LIMIT = 10
+CITY_SEARCH_MAX_LIMIT = 100
+CITY_SEARCH_INDEX_TTL = 60 * 60
+
+# Archive requests are snapped to the ERA5 grid so nearby cities share cached responses,
+# None disables it
+WEATHER_GRID_RESOLUTION = 0.25
+
+# /api/city/nearest/ returns ?k= nearest cities or up to ?limit= cities within
+# ?radius_km=, never more than NEAREST_CITY_MAX_K
+NEAREST_CITY_MAX_K = 100
+NEAREST_CITY_RADIUS_LIMIT = REST_FRAMEWORK['PAGE_SIZE']
+
+COUNTRY_SUMMARY_CACHE_TTL = 5 * 60
+# City lists are paged by cursor, PAGE_SIZE cities at a time unless ?page_size=
+# asks for up to this many
+CITY_PAGE_MAX_SIZE = 500
+
+# Clients may reuse a weather report this long and revalidate it with its ETag
+# afterwards, ?compact=1 rounds its floats to WEATHER_COMPACT_DECIMALS. Clients may
+# ask for MessagePack with Accept: application/msgpack.
+WEATHER_REPORT_CACHE_TTL = 5 * 60
+WEATHER_COMPACT_DECIMALS = 2
+
+# The warm_forecasts worker recomputes reports for the most populous and
+# recently requested cities WARM_FORECASTS_DELAY seconds after every
+# hour, the views serve them for PRECOMPUTED_REPORT_TTL seconds. Besides
+# the default range it warms the WARM_FORECASTS_TOP_RANGES ranges
+# requested for the most cities, each for up to WARM_FORECASTS_TOP_CITIES
+# of them. Only reports with the default options are precomputed.
+PRECOMPUTED_REPORT_TTL = 60 * 60
+WARM_FORECASTS_TOP_CITIES = 100
+WARM_FORECASTS_TOP_RANGES = 5
+WARM_FORECASTS_RECENT_HOURS = 24
+WARM_FORECASTS_DELAY = 5 * 60
+
+# Share of requests whose stages, queries, upstream calls and cache
+# lookups are recorded for /api/metrics/, 0 turns the instrumentation off.
+# Server-Timing headers expose the per-request breakdown to the client.
+INSTRUMENTATION_SAMPLE_RATE = float(os.getenv('INSTRUMENTATION_SAMPLE_RATE', 1))
+INSTRUMENTATION_SERVER_TIMING = bool(int(os.getenv('INSTRUMENTATION_SERVER_TIMING', 0)))
+# /api/metrics/ answers only these addresses (comma separated), with none set it is
+# not served at all
+METRICS_ALLOWED_IPS = [ip for ip in os.getenv('METRICS_ALLOWED_IPS', '').split(',')
+                       if ip]
+
+# Hourly history is mirrored per city into memory-mapped float32
+# .npy files. Each process rechecks the stored version at most
+# every WEATHER_SERIES_STAMP_TTL seconds, sooner after an upsert
+WEATHER_SERIES_DIR = os.getenv('WEATHER_SERIES_DIR', str(BASE_DIR / 'series'))
+WEATHER_SERIES_STAMP_TTL = 60
@@ -1,6 +1,39 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
 
 
 class WeatherApiCollectorConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "weather_api_collector"
+
+    def ready(self):
+        from .instrumentation import install_query_counter
+        from .models import City
+        from .search import invalidate_city_index
+        from .spatial import invalidate_spatial_index
+
+        post_save.connect(
+            invalidate_city_index,
+            sender=City,
+            dispatch_uid='invalidate_city_index_on_save',
+        )
+        post_delete.connect(
+            invalidate_city_index,
+            sender=City,
+            dispatch_uid='invalidate_city_index_on_delete',
+        )
+        post_save.connect(
+            invalidate_spatial_index,
+            sender=City,
+            dispatch_uid='invalidate_spatial_index_on_save',
+        )
+        post_delete.connect(
+            invalidate_spatial_index,
+            sender=City,
+            dispatch_uid='invalidate_spatial_index_on_delete',
+        )
+        connection_created.connect(
+            install_query_counter,
+            dispatch_uid='install_query_counter',
+        )
@@ -0,0 +1,185 @@
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from .forecasting import FORECAST_STEPS, SEASONAL_PERIODS, backtest, preload
+from .metrics import METRICS, forecast_errors
+from .models import AccuracySummary
+from .series_store import SECONDS_PER_HOUR, open_series
+
+logger = logging.getLogger(__name__)
+
+
+class BacktestJob:
+    def __init__(self, city, times, values, windows):
+        self.city = city
+        self.times = times
+        self.values = values
+        # (start, origin) positions: origin is the first
+        # forecast hour, start the first training hour
+        self.windows = windows
+
+    @property
+    def origins(self):
+        return [origin for _, origin in self.windows]
+
+    def refits(self, refilter_max_hours):
+        # The model cache re-estimates once the window has moved more than
+        # refilter_max_hours since the parameters were estimated, so does the backtest
+        refits, estimated_at = [], None
+        for origin in self.origins:
+            hour = int(self.times[origin])
+            refit = estimated_at is None or hour - estimated_at > refilter_max_hours
+            estimated_at = hour if refit else estimated_at
+            refits.append(refit)
+        return refits
+
+    def targets(self, steps=FORECAST_STEPS):
+        return np.stack([self.values[origin:origin + steps] for origin in self.origins])
+
+    def evaluated_range(self, steps=FORECAST_STEPS):
+        first, last = self.origins[0], self.origins[-1] + steps - 1
+        return tuple(
+            datetime.fromtimestamp(int(hour) * SECONDS_PER_HOUR, tz=dt_timezone.utc)
+            for hour in (self.times[first], self.times[last])
+        )
+
+
+def rolling_origins(times, days, step_hours, min_train_hours, steps=FORECAST_STEPS):
+    # One origin hour every step_hours over the last `days` days, returned as positions
+    # in times. Gaps in the history do not shift them, an origin is skipped unless its
+    # whole horizon is stored and at least min_train_hours of history lie before it.
+    times = np.asarray(times, dtype=np.int64)
+    if not len(times):
+        return []
+    last = int(times[-1]) + 1 - steps
+    candidates = np.arange(last, last - days * 24 - 1, -step_hours)[::-1]
+    positions = np.searchsorted(times, candidates)
+    complete = np.searchsorted(times, candidates + steps) - positions == steps
+    trained = candidates - times[0] >= min_train_hours
+    return positions[complete & trained].tolist()
+
+
+def prepare_backtest(city, days, step_hours, train_days):
+    series = open_series(city)
+    times = np.asarray(series[0], dtype=np.int64)
+    train_hours = train_days * 24 if train_days else None
+    min_train_hours = train_hours or 2 * SEASONAL_PERIODS
+    origins = rolling_origins(times, days, step_hours, min_train_hours)
+    if not origins:
+        return None
+
+    # Training windows span train_hours of time as well, however many hours are missing
+    starts = np.zeros(len(origins), dtype=np.int64)
+    if train_hours:
+        starts = np.searchsorted(times, times[origins] - train_hours)
+
+    # Only the hours the earliest window trains on are sent to the workers
+    offset = int(starts[0])
+    values = series[1, offset:].astype(np.float64).round(4)
+    windows = [(int(start) - offset, origin - offset)
+               for start, origin in zip(starts, origins)]
+    return BacktestJob(city, times[offset:], values, windows)
+
+
+def _run_backtests(tasks, workers, resample):
+    # Yields (key, predictions, error), exactly one of predictions and error is None
+    max_hours = settings.FORECAST_REFILTER_MAX_HOURS
+    if not workers:
+        for key, job in tasks:
+            try:
+                predictions = backtest(key[1], job.values, job.windows,
+                                       job.refits(max_hours), FORECAST_STEPS, resample)
+                yield key, predictions, None
+            except Exception as e:
+                yield key, None, e
+        return
+
+    mp_context = multiprocessing.get_context(settings.FORECAST_MP_CONTEXT)
+    initializer = preload if settings.FORECAST_PRELOAD else None
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context,
+                             initializer=initializer) as pool:
+        futures = {}
+        for key, job in tasks:
+            args = (key[1], job.values, job.windows, job.refits(max_hours),
+                    FORECAST_STEPS, resample)
+            futures[pool.submit(backtest, *args)] = key
+        for future in as_completed(futures):
+            error = future.exception()
+            yield futures[future], None if error else future.result(), error
+
+
+def store_accuracy(job, predictions, train_days, resample):
+    engines = list(predictions)
+    stacked = np.stack([predictions[engine].reshape(-1) for engine in engines])
+    errors = forecast_errors(stacked, job.targets().reshape(-1))
+    evaluated_from, evaluated_to = job.evaluated_range()
+    for i, engine in enumerate(engines):
+        scores = {metric: errors[metric][i] for metric in METRICS}
+        AccuracySummary.objects.update_or_create(
+            city=job.city, engine=engine, train_days=train_days or 0, resample=resample,
+            defaults={
+                'origins': len(job.origins),
+                'horizon': FORECAST_STEPS,
+                'evaluated_from': evaluated_from,
+                'evaluated_to': evaluated_to,
+                **{metric: None if np.isnan(score) else float(score)
+                   for metric, score in scores.items()},
+            },
+        )
+
+
+def run_backtests(cities, engines, days=None, step_hours=None, train_days=None,
+                  resample=None, workers=None):
+    # Returns how many cities were backtested and
+    # how many (city, engine) backtests failed
+    days = days or settings.BACKTEST_DAYS
+    step_hours = step_hours or settings.BACKTEST_STEP_HOURS
+    train_days = settings.FORECAST_TRAIN_DAYS if train_days is None else train_days
+    resample = resample or settings.FORECAST_RESAMPLE_HOURS
+    workers = settings.BACKTEST_WORKERS if workers is None else workers
+
+    jobs = {}
+    for city in cities:
+        job = prepare_backtest(city, days, step_hours, train_days)
+        if job is not None:
+            jobs[city] = job
+
+    predictions, failed = {}, 0
+    tasks = [((city, engine), job) for city, job in jobs.items() for engine in engines]
+    for (city, engine), result, error in _run_backtests(tasks, workers, resample):
+        if error is not None:
+            failed += 1
+            logger.error('Backtesting %s for %s failed', engine, city.city,
+                         exc_info=error)
+            continue
+        predictions.setdefault(city, {})[engine] = result
+
+    for city, city_predictions in predictions.items():
+        store_accuracy(jobs[city], city_predictions, train_days, resample)
+    return len(predictions), failed
+
+
+def accuracy_by_model(city, options):
+    # Only summaries backtested with the request's
+    # training options describe its forecasts
+    max_age = timedelta(days=settings.ACCURACY_SUMMARY_MAX_AGE_DAYS)
+    summaries = {
+        summary.engine: summary
+        for summary in AccuracySummary.objects.filter(
+            city=city, engine__in=options.engines, train_days=options.train_days or 0,
+            resample=options.resample, computed_at__gte=timezone.now() - max_age,
+        )
+    }
+    if any(engine not in summaries for engine in options.engines):
+        return None
+    return {
+        metric: {engine: getattr(summaries[engine], metric)
+                 for engine in options.engines}
+        for metric in METRICS
+    }
@@ -0,0 +1,81 @@
+import hashlib
+import json
+import zlib
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db.models import Sum
+from django.utils import timezone
+
+from .instrumentation import cache_lookup
+from .models import ArchiveResponse
+
+
+def make_archive_key(lat, lng, start_date, end_date, variables):
+    variables = ','.join(sorted(variables))
+    raw = f'{float(lat):.4f}|{float(lng):.4f}|{start_date}|{end_date}|{variables}'
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def archive_expires_at(end_date):
+    # ERA5 only revises the trailing days, ranges that end before them never change
+    cutoff = timezone.now().date() - timedelta(days=settings.ARCHIVE_REVISION_DAYS)
+    if date.fromisoformat(str(end_date)) < cutoff:
+        return None
+    return timezone.now() + timedelta(seconds=settings.ARCHIVE_CACHE_TTL)
+
+
+def get_archive(key):
+    now = timezone.now()
+    entry = (
+        ArchiveResponse.objects.filter(key=key).only('payload', 'expires_at').first()
+    )
+    if entry is None:
+        cache_lookup('archive', False)
+        return None
+    if entry.expires_at is not None and entry.expires_at <= now:
+        entry.delete()
+        cache_lookup('archive', False)
+        return None
+    cache_lookup('archive', True)
+    ArchiveResponse.objects.filter(pk=entry.pk).update(accessed_at=now)
+    return json.loads(zlib.decompress(entry.payload))
+
+
+def set_archive(key, lat, lng, start_date, end_date, variables, data):
+    payload = zlib.compress(json.dumps(data, separators=(',', ':')).encode('utf-8'))
+    ArchiveResponse.objects.update_or_create(
+        key=key,
+        defaults={
+            'lat': lat,
+            'lng': lng,
+            'start_date': start_date,
+            'end_date': end_date,
+            'variables': ','.join(variables),
+            'payload': payload,
+            'size': len(payload),
+            'accessed_at': timezone.now(),
+            'expires_at': archive_expires_at(end_date),
+        }
+    )
+    evict_archives()
+
+
+def evict_archives():
+    ArchiveResponse.objects.filter(expires_at__lte=timezone.now()).delete()
+
+    total = ArchiveResponse.objects.aggregate(total=Sum('size'))['total'] or 0
+    if total <= settings.ARCHIVE_CACHE_MAX_BYTES:
+        return
+
+    stale_ids = []
+    for pk, size in (
+        ArchiveResponse.objects.order_by('accessed_at')
+        .values_list('pk', 'size')
+        .iterator()
+    ):
+        if total <= settings.ARCHIVE_CACHE_MAX_BYTES:
+            break
+        stale_ids.append(pk)
+        total -= size
+    ArchiveResponse.objects.filter(pk__in=stale_ids).delete()
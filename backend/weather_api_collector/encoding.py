@@ -0,0 +1,92 @@
+import hashlib
+import json
+from datetime import datetime
+
+import numpy as np
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer
+from rest_framework.settings import api_settings
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MSGPACK_MEDIA_TYPE = 'application/msgpack'
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = MSGPACK_MEDIA_TYPE
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return encode_msgpack(data)
+
+
+def weather_renderer_classes():
+    # msgpack is pinned in requirements.txt, an install without it serves JSON only
+    renderers = list(api_settings.DEFAULT_RENDERER_CLASSES)
+    if msgpack is not None:
+        renderers.append(MessagePackRenderer)
+    return renderers
+
+
+def accepts_msgpack(accept_header):
+    return msgpack is not None and MSGPACK_MEDIA_TYPE in accept_header
+
+
+def encode_msgpack(data):
+    return msgpack.packb(data, use_bin_type=True)
+
+
+def _round(value, decimals):
+    if isinstance(value, float):
+        return float(round(value, decimals))
+    if isinstance(value, dict):
+        return {key: _round(item, decimals) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_round(item, decimals) for item in value]
+    return value
+
+
+def compact_report(report, decimals=None):
+    # Every engine forecasts the same hourly steps, so the timestamp lists become a
+    # start and a step
+    decimals = settings.WEATHER_COMPACT_DECIMALS if decimals is None else decimals
+    if 'forecast_data' not in report:
+        return _round(report, decimals)
+
+    forecast_data = report['forecast_data']
+    times = next(iter(forecast_data['time'].values()), [])
+    start = datetime.fromisoformat(times[0]) if times else None
+    if len(times) > 1:
+        step = (datetime.fromisoformat(times[1]) - start).total_seconds()
+    else:
+        step = None
+    summary = {key: value for key, value in report.items() if key != 'forecast_data'}
+    compact = _round(summary, decimals)
+    forecasts = forecast_data['temperature_2m']
+    compact['forecast_data'] = {
+        'start': start.isoformat() if start else None,
+        'step_seconds': int(step) if step else None,
+        'temperature_2m': {
+            engine: np.round(np.asarray(values, dtype=np.float64), decimals).tolist()
+            for engine, values in forecasts.items()
+        },
+    }
+    return compact
+
+
+def report_etag(report, variant):
+    # Strong validator: the report is fully determined by the stored observations
+    # and the fitted models, each representation (full, compact, MessagePack) gets
+    # its own tag
+    canonical = json.dumps(report, sort_keys=True, separators=(',', ':'),
+                           cls=DjangoJSONEncoder)
+    digest = hashlib.sha256(f'{variant}:{canonical}'.encode('utf-8')).hexdigest()
+    return '"%s"' % digest[:32]
@@ -0,0 +1,131 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+
+from django.conf import settings
+
+from .forecasting import ENGINES, fit_forecast, preload
+from .instrumentation import current_timings, record_stage, span
+
+
+class ForecastQueueFull(Exception):
+    pass
+
+
+class ForecastTimeout(Exception):
+    pass
+
+
+_executor = None
+_slots = None
+_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.FORECAST_WORKERS,
+                mp_context=multiprocessing.get_context(settings.FORECAST_MP_CONTEXT),
+                initializer=preload if settings.FORECAST_PRELOAD else None,
+            )
+            _slots = threading.BoundedSemaphore(settings.FORECAST_MAX_PENDING)
+        return _executor
+
+
+def shutdown_executor():
+    global _executor, _slots
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+        _slots = None
+
+
+def _run_inline(engine, *args):
+    future = Future()
+    try:
+        with span(f'fit_{engine}'):
+            future.set_result(fit_forecast(engine, *args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def _time_fit(future, engine):
+    # Pool fits finish on the executor's thread, so the request's timings
+    # are captured up front. The time includes waiting for a free worker.
+    timings = current_timings()
+    if timings is not None:
+        started = time.perf_counter()
+        future.add_done_callback(lambda f: record_stage(timings, f'fit_{engine}',
+                                                        time.perf_counter() - started))
+
+
+def submit_fit(engine, values, steps, params=None, resample=1):
+    if not settings.FORECAST_WORKERS or ENGINES[engine].fast:
+        return _run_inline(engine, values, steps, params, resample)
+
+    executor = get_executor()
+    slots = _slots
+    if not slots.acquire(blocking=False):
+        raise ForecastQueueFull('Too many forecasts are already being fitted')
+    try:
+        future = executor.submit(fit_forecast, engine, values, steps, params, resample)
+    except Exception:
+        slots.release()
+        raise
+    future.add_done_callback(lambda f: slots.release())
+    _time_fit(future, engine)
+    return future
+
+
+def submit_fits(jobs):
+    futures = {}
+    try:
+        for name, args in jobs.items():
+            futures[name] = submit_fit(*args)
+    except ForecastQueueFull:
+        for future in futures.values():
+            future.cancel()
+        raise
+    return futures
+
+
+def collect_fits(futures, timeout=None):
+    timeout = settings.FORECAST_TIMEOUT if timeout is None else timeout
+    _, not_done = wait(futures.values(), timeout=timeout)
+    if not_done:
+        # Queued fits are dropped, fits that already started keep their slot until
+        # they finish
+        for future in not_done:
+            future.cancel()
+        raise ForecastTimeout(f'Forecast fitting took longer than {timeout} seconds')
+
+    return {name: future.result() for name, future in futures.items()}
+
+
+def run_fits(jobs, timeout=None):
+    return collect_fits(submit_fits(jobs), timeout)
+
+
+async def arun_fits(jobs, timeout=None):
+    timeout = settings.FORECAST_TIMEOUT if timeout is None else timeout
+    futures = submit_fits(jobs)
+
+    try:
+        results = await asyncio.wait_for(
+            asyncio.gather(
+                *[asyncio.wrap_future(future) for future in futures.values()]
+            ),
+            timeout,
+        )
+    except asyncio.TimeoutError:
+        for future in futures.values():
+            future.cancel()
+        raise ForecastTimeout(f'Forecast fitting took longer than {timeout} seconds')
+
+    return dict(zip(futures, results))
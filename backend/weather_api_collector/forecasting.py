@@ -0,0 +1,204 @@
+import importlib
+
+import numpy as np
+
+FORECAST_STEPS = 24
+SEASONAL_PERIODS = 24
+# Resampled fits need two whole seasons of blocks, less would leave the engines
+# nothing to fit
+MIN_RESAMPLED_HOURS = 2 * SEASONAL_PERIODS
+# Seasonal engines need at least two blocks per season
+MAX_RESAMPLE_HOURS = SEASONAL_PERIODS // 2
+ARIMA_ORDER = (1, 1, 1)
+
+ENGINES = {}
+
+
+class ForecastEngine:
+    name = None
+    # Fast engines fit in microseconds, they run in the calling thread and are not
+    # stored in the model cache
+    fast = False
+    # Heavy modules the engine imports on its first
+    # fit, preload() imports them ahead of time
+    requires = ()
+
+    def fit(self, values, steps, params, seasonal_periods):
+        raise NotImplementedError
+
+
+def register_engine(cls):
+    ENGINES[cls.name] = cls()
+    return cls
+
+
+def preload(engines=None):
+    for engine in engines or ENGINES:
+        for module in ENGINES[engine].requires:
+            importlib.import_module(module)
+
+
+@register_engine
+class HoltWintersEngine(ForecastEngine):
+    name = 'holtwinters'
+    requires = ('statsmodels.tsa.holtwinters',)
+
+    def fit(self, values, steps, params, seasonal_periods):
+        from statsmodels.tsa.holtwinters import ExponentialSmoothing
+
+        if params is None:
+            model = ExponentialSmoothing(values, seasonal='add',
+                                         seasonal_periods=seasonal_periods)
+            fit_model = model.fit()
+        else:
+            # Re-filter the new window with the stored smoothing weights instead of
+            # optimising them again
+            model = ExponentialSmoothing(values, seasonal='add',
+                                         seasonal_periods=seasonal_periods,
+                                         initialization_method='heuristic')
+            fit_model = model.fit(smoothing_level=params['smoothing_level'],
+                                  smoothing_seasonal=params['smoothing_seasonal'],
+                                  optimized=False)
+
+        fitted_params = {
+            'smoothing_level': float(fit_model.params['smoothing_level']),
+            'smoothing_seasonal': float(fit_model.params['smoothing_seasonal']),
+        }
+        return fitted_params, fit_model.forecast(steps)
+
+
+@register_engine
+class ArimaEngine(ForecastEngine):
+    name = 'arima'
+    requires = ('statsmodels.tsa.arima.model',)
+
+    def fit(self, values, steps, params, seasonal_periods):
+        from statsmodels.tsa.arima.model import ARIMA
+
+        model = ARIMA(values, order=ARIMA_ORDER)
+        if params is None:
+            fit_model = model.fit()
+        else:
+            fit_model = model.filter(np.asarray(params))
+
+        forecast = fit_model.get_forecast(steps=steps).predicted_mean
+        return [float(p) for p in fit_model.params], forecast
+
+
+def _seasonal_profile(values, days, seasonal_periods):
+    # Mean of each step of the day over the last `days` days, aligned so index 0 is the
+    # step after the last value
+    length = min(len(values) // seasonal_periods, days) * seasonal_periods
+    if not length:
+        return np.full(seasonal_periods, values.mean())
+    return values[-length:].reshape(-1, seasonal_periods).mean(axis=0)
+
+
+def _repeat_profile(profile, steps):
+    return np.resize(profile, steps)
+
+
+@register_engine
+class SeasonalNaiveEngine(ForecastEngine):
+    name = 'seasonal_naive'
+    fast = True
+
+    def fit(self, values, steps, params, seasonal_periods):
+        profile = _seasonal_profile(values, 1, seasonal_periods)
+        return None, _repeat_profile(profile, steps)
+
+
+@register_engine
+class DampedTrendEngine(ForecastEngine):
+    name = 'damped_trend'
+    fast = True
+    alpha = 0.3
+    beta = 0.1
+    phi = 0.9
+    profile_days = 7
+
+    def fit(self, values, steps, params, seasonal_periods):
+        profile = _seasonal_profile(values, self.profile_days, seasonal_periods)
+        aligned = np.roll(profile, len(values) % seasonal_periods)
+        deseasonalized = values - np.resize(aligned, len(values))
+
+        # Damped Holt recursion with fixed weights over the last profile_days of the
+        # deseasonalized values
+        window = deseasonalized[-seasonal_periods * self.profile_days:].tolist()
+        level, trend = window[0], window[1] - window[0] if len(window) > 1 else 0.0
+        for value in window[1:]:
+            previous_level = level
+            level = self.alpha * value + (1 - self.alpha) * (level + self.phi * trend)
+            trend = (self.beta * (level - previous_level)
+                     + (1 - self.beta) * self.phi * trend)
+
+        damping = np.cumsum(self.phi ** np.arange(1, steps + 1))
+        forecast = level + damping * trend + _repeat_profile(profile, steps)
+        return {'alpha': self.alpha, 'beta': self.beta, 'phi': self.phi}, forecast
+
+
+@register_engine
+class HarmonicRegressionEngine(ForecastEngine):
+    name = 'harmonic'
+    fast = True
+    harmonics = 3
+    window_days = 14
+
+    def _design(self, t, seasonal_periods):
+        harmonics = min(self.harmonics, seasonal_periods // 2)
+        angles = 2 * np.pi * np.outer(t, np.arange(1, harmonics + 1)) / seasonal_periods
+        return np.column_stack([np.ones(len(t)), t, np.sin(angles), np.cos(angles)])
+
+    def fit(self, values, steps, params, seasonal_periods):
+        window = values[-seasonal_periods * self.window_days:]
+        t = np.arange(len(window), dtype=float)
+        design = self._design(t, seasonal_periods)
+        coefficients, *_ = np.linalg.lstsq(design, window, rcond=None)
+        future = np.arange(len(window), len(window) + steps, dtype=float)
+        forecast = self._design(future, seasonal_periods) @ coefficients
+        return [float(c) for c in coefficients], forecast
+
+
+def downsample(values, hours):
+    # Averages blocks of `hours` values, the last block ends on the last value
+    values = values[len(values) % hours:]
+    return values.reshape(-1, hours).mean(axis=1)
+
+
+def upsample(block_forecast, hours, steps):
+    # Block averages are placed at the middle of their block and linearly interpolated
+    # back to hourly steps
+    block_centers = np.arange(len(block_forecast)) * hours + (hours - 1) / 2
+    return np.interp(np.arange(steps), block_centers, block_forecast)
+
+
+def fit_forecast(engine, values, steps=FORECAST_STEPS, params=None, resample=1):
+    values = np.asarray(values, dtype=float)
+    if resample == 1:
+        fitted_params, forecast = ENGINES[engine].fit(values, steps, params,
+                                                      SEASONAL_PERIODS)
+    else:
+        if resample > MAX_RESAMPLE_HOURS or SEASONAL_PERIODS % resample:
+            raise ValueError(f'Resampling needs a number of hours that divides '
+                             f'{SEASONAL_PERIODS}, at most {MAX_RESAMPLE_HOURS}')
+        if len(values) < MIN_RESAMPLED_HOURS:
+            raise ValueError(f'Resampling needs at least {MIN_RESAMPLED_HOURS} hours '
+                             'of training data')
+        blocks, block_steps = downsample(values, resample), -(-steps // resample)
+        fitted_params, block_forecast = ENGINES[engine].fit(
+            blocks, block_steps, params, SEASONAL_PERIODS // resample)
+        forecast = upsample(np.asarray(block_forecast), resample, steps)
+    return fitted_params, [float(value) for value in forecast]
+
+
+def backtest(engine, values, windows, refits, steps=FORECAST_STEPS, resample=1):
+    # windows are (start, origin) positions in values. Parameters are estimated afresh
+    # on the windows flagged in refits and re-used to filter the ones in between
+    values = np.asarray(values, dtype=float)
+    predictions = np.empty((len(windows), steps))
+    params = None
+    for i, ((start, origin), refit) in enumerate(zip(windows, refits)):
+        params = None if refit else params
+        history = values[start:origin]
+        params, predictions[i] = fit_forecast(engine, history, steps, params, resample)
+    return predictions
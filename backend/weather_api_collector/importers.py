@@ -0,0 +1,90 @@
+import csv
+from itertools import islice
+
+from django.db import transaction
+
+CITIES_CSV_PATH = 'data/worldcities.csv'
+CITY_FIELDS = [
+    'city', 'city_ascii', 'lat', 'lng', 'country', 'iso2', 'iso3', 'admin_name',
+    'capital', 'population',
+]
+
+
+def _city_values(row):
+    return {
+        'city': row['city'],
+        'city_ascii': row['city_ascii'],
+        'lat': float(row['lat']),
+        'lng': float(row['lng']),
+        'country': row['country'],
+        'iso2': row['iso2'],
+        'iso3': row['iso3'],
+        'admin_name': row['admin_name'],
+        'capital': row['capital'],
+        'population': float(row['population']) if row['population'] else 0,
+        'source_id': int(row['id']) if row.get('id') else None,
+    }
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def import_cities(model, file_path=CITIES_CSV_PATH, chunk_size=5000, upsert=True):
+    # Migrations pass their historical model, which may not have every field yet
+    field_names = {field.name for field in model._meta.concrete_fields}
+    update_fields = [name for name in CITY_FIELDS if name in field_names]
+    if upsert and 'source_id' not in field_names:
+        raise ValueError('Upserting cities needs the source_id field')
+    if not upsert and model.objects.exists():
+        raise ValueError('Cities are already imported, upsert them to avoid duplicates')
+
+    imported = skipped = 0
+    with open(file_path, 'r', encoding='utf-8') as file, transaction.atomic():
+        for rows in _chunks(csv.DictReader(file), chunk_size):
+            cities = []
+            for row in rows:
+                values = {
+                    name: value
+                    for name, value in _city_values(row).items()
+                    if name in field_names
+                }
+                if upsert and values['source_id'] is None:
+                    skipped += 1
+                    continue
+                cities.append(model(**values))
+
+            if upsert:
+                model.objects.bulk_create(
+                    cities,
+                    update_conflicts=True,
+                    unique_fields=['source_id'],
+                    update_fields=update_fields,
+                )
+            else:
+                model.objects.bulk_create(cities)
+            imported += len(cities)
+    return imported, skipped
+
+
+def backfill_source_ids(model, file_path=CITIES_CSV_PATH, chunk_size=5000):
+    source_ids = {}
+    with open(file_path, 'r', encoding='utf-8') as file:
+        for row in csv.DictReader(file):
+            if row.get('id'):
+                lat, lng = float(row['lat']), float(row['lng'])
+                source_ids[(row['city'], row['country'], lat, lng)] = int(row['id'])
+
+    with transaction.atomic():
+        rows = model.objects.filter(source_id__isnull=True).values_list(
+            'pk', 'city', 'country', 'lat', 'lng'
+        )
+        for chunk in _chunks(rows.iterator(), chunk_size):
+            cities = [
+                model(pk=pk, source_id=source_ids[(city, country, lat, lng)])
+                for pk, city, country, lat, lng in chunk
+                if (city, country, lat, lng) in source_ids
+            ]
+            model.objects.bulk_update(cities, ['source_id'])
@@ -0,0 +1,227 @@
+import functools
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+from django.conf import settings
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+STAGE_DURATION = 'weather_api_stage_duration_seconds'
+UPSTREAM_DURATION = 'weather_api_upstream_duration_seconds'
+UPSTREAM_ERRORS = 'weather_api_upstream_errors_total'
+CACHE_REQUESTS = 'weather_api_cache_requests_total'
+REQUEST_DURATION = 'weather_api_request_duration_seconds'
+REQUEST_QUERIES = 'weather_api_request_db_queries'
+REQUESTS = 'weather_api_requests_total'
+
+HELP = {
+    STAGE_DURATION: 'Time spent in each stage of the weather-data pipeline',
+    UPSTREAM_DURATION: 'Latency of Open-Meteo requests',
+    UPSTREAM_ERRORS: 'Open-Meteo requests that failed',
+    CACHE_REQUESTS: 'Cache lookups by cache and result, '
+                    'hit ratio is hit / (hit + miss)',
+    REQUEST_DURATION: 'Time until the view returned a response',
+    REQUEST_QUERIES: 'Database queries per request',
+    REQUESTS: 'Sampled requests by view and status',
+}
+
+_current = ContextVar('request_timings', default=None)
+_null_span = nullcontext()
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def inc(self, name, labels, amount=1):
+        key = (name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value, buckets=DURATION_BUCKETS):
+        key = (name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def clear(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def render(self):
+        # Prometheus text exposition format 0.0.4
+        with self._lock:
+            counters = dict(self.counters)
+            histograms = {key: (h.buckets, list(h.counts), h.sum, h.count)
+                          for key, h in self.histograms.items()}
+
+        lines = []
+        for name in sorted({name for name, _ in counters}):
+            lines += [f'# HELP {name} {HELP.get(name, name)}', f'# TYPE {name} counter']
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f'{name}{_labels(labels)} {value}')
+
+        for name in sorted({name for name, _ in histograms}):
+            lines += [f'# HELP {name} {HELP.get(name, name)}',
+                      f'# TYPE {name} histogram']
+            for (metric, labels), histogram in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                buckets, counts, total, count = histogram
+                cumulative = 0
+                for bound, bucket_count in zip((*buckets, '+Inf'), counts):
+                    cumulative += bucket_count
+                    bucket_labels = _labels((*labels, ('le', str(bound))))
+                    lines.append(f'{name}_bucket{bucket_labels} {cumulative}')
+                lines.append(f'{name}_sum{_labels(labels)} {total}')
+                lines.append(f'{name}_count{_labels(labels)} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+               for _, value in labels)
+    pairs = (f'{key}="{value}"' for (key, _), value in zip(labels, escaped))
+    return '{' + ','.join(pairs) + '}'
+
+
+registry = Registry()
+
+
+class RequestTimings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.stages = {}
+
+    def record(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0) + seconds
+
+    def server_timing(self):
+        # Stages that ran concurrently (e.g. archive chunks)
+        # are summed, so they can add up to more than the total
+        entries = [f'{name};dur={seconds * 1000:.1f}'
+                   for name, seconds in self.stages.items()]
+        entries.append(f'db;desc="{self.queries} queries"')
+        entries.append(f'total;dur={(time.perf_counter() - self.started) * 1000:.1f}')
+        return ', '.join(entries)
+
+
+def sampled():
+    rate = settings.INSTRUMENTATION_SAMPLE_RATE
+    return rate >= 1 or (rate > 0 and random.random() < rate)
+
+
+def current_timings():
+    return _current.get()
+
+
+@contextmanager
+def _timed_span(timings, name, metric, labels):
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        if metric == UPSTREAM_DURATION:
+            registry.inc(UPSTREAM_ERRORS, labels)
+        raise
+    finally:
+        record_stage(timings, name, time.perf_counter() - started, metric, labels)
+
+
+def record_stage(timings, name, seconds, metric=STAGE_DURATION, labels=None):
+    timings.record(name, seconds)
+    registry.observe(metric, labels or (('stage', name),), seconds)
+
+
+def span(name):
+    # Outside a sampled request this is one ContextVar lookup
+    timings = _current.get()
+    if timings is None:
+        return _null_span
+    return _timed_span(timings, name, STAGE_DURATION, (('stage', name),))
+
+
+def upstream_span(endpoint):
+    timings = _current.get()
+    if timings is None:
+        return _null_span
+    return _timed_span(timings, f'open_meteo_{endpoint}', UPSTREAM_DURATION,
+                       (('endpoint', endpoint),))
+
+
+def timed(name):
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def cache_lookup(cache, hit):
+    if _current.get() is not None:
+        result = 'hit' if hit else 'miss'
+        registry.inc(CACHE_REQUESTS, (('cache', cache), ('result', result)))
+
+
+def count_query(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is not None:
+        timings.queries += 1
+    return execute(sql, params, many, context)
+
+
+def install_query_counter(sender, connection, **kwargs):
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_query)
+
+
+def begin_request():
+    if not sampled():
+        return None, None
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def finish_request(request, response, timings):
+    match = getattr(request, 'resolver_match', None)
+    view = match.url_name if match is not None and match.url_name else 'unmatched'
+    registry.inc(REQUESTS, (('view', view), ('status', str(response.status_code))))
+    duration = time.perf_counter() - timings.started
+    registry.observe(REQUEST_DURATION, (('view', view),), duration)
+    registry.observe(REQUEST_QUERIES, (('view', view),), timings.queries, QUERY_BUCKETS)
+    if settings.INSTRUMENTATION_SERVER_TIMING:
+        response['Server-Timing'] = timings.server_timing()
+    return response
@@ -0,0 +1,71 @@
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from weather_api_collector.backtesting import run_backtests
+from weather_api_collector.forecasting import ENGINES
+from weather_api_collector.models import City
+from weather_api_collector.observations import sync_observations_many
+
+
+class Command(BaseCommand):
+    help = ('Score every forecast engine on rolling origins over stored history and '
+            'store per-city accuracy')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=settings.BACKTEST_TOP_CITIES,
+                            help='Number of cities to backtest, ordered by population')
+        parser.add_argument(
+            '--cities',
+            help='Comma separated city names to backtest instead of the top cities')
+        parser.add_argument('--engines', default=','.join(ENGINES))
+        parser.add_argument('--days', type=int, default=settings.BACKTEST_DAYS,
+                            help='Days of history the forecast origins are spread over')
+        parser.add_argument(
+            '--train-days', type=int, default=settings.FORECAST_TRAIN_DAYS,
+            help='Days of history each forecast is trained on')
+        parser.add_argument(
+            '--resample', type=int, default=settings.FORECAST_RESAMPLE_HOURS,
+            help='Average the history into blocks of this many hours before fitting')
+        parser.add_argument(
+            '--step-hours', type=int, default=settings.BACKTEST_STEP_HOURS,
+            help='Hours between two forecast origins')
+        parser.add_argument(
+            '--workers', type=int, default=settings.BACKTEST_WORKERS,
+            help='Worker processes, 0 runs the backtests in this process')
+        parser.add_argument(
+            '--no-sync', action='store_true',
+            help='Only use stored observations instead of fetching the missing days '
+                 'first')
+
+    def handle(self, *args, **options):
+        engines = [engine.strip() for engine in options['engines'].split(',')
+                   if engine.strip()]
+        unknown = [engine for engine in engines if engine not in ENGINES]
+        if unknown:
+            raise CommandError(f'Unknown engines: {", ".join(unknown)}')
+
+        if options['cities']:
+            names = options['cities'].split(',')
+            cities = list(City.objects.filter(city__in=names).order_by('-population'))
+        else:
+            cities = list(City.objects.order_by('-population')[:options['top']])
+
+        if not options['no_sync']:
+            history_days = options['days'] + (options['train_days'] or 365) + 1
+            start_date = date.today() - timedelta(days=history_days)
+            for i in range(0, len(cities), settings.WEATHER_BATCH_MAX_CITIES):
+                sync_observations_many(cities[i:i + settings.WEATHER_BATCH_MAX_CITIES],
+                                       start_date, date.today())
+
+        backtested, failed = run_backtests(
+            cities, engines, days=options['days'], step_hours=options['step_hours'],
+            train_days=options['train_days'], resample=options['resample'],
+            workers=options['workers'],
+        )
+        summary = f'Backtested {backtested} of {len(cities)} cities'
+        self.stdout.write(self.style.SUCCESS(summary))
+        if failed:
+            warning = f'{failed} backtests failed, see the log for the errors'
+            self.stdout.write(self.style.WARNING(warning))
@@ -0,0 +1,48 @@
+import argparse
+
+from django.core.management.base import BaseCommand, CommandError
+
+from weather_api_collector.importers import CITIES_CSV_PATH, import_cities
+from weather_api_collector.models import City
+from weather_api_collector.search import invalidate_city_index
+from weather_api_collector.spatial import invalidate_spatial_index
+from weather_api_collector.summaries import rebuild_country_summaries
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk import cities from the worldcities CSV, updating the ones already stored'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('file_path', nargs='?', default=CITIES_CSV_PATH)
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument(
+            '--upsert',
+            action=argparse.BooleanOptionalAction,
+            default=True,
+            help=(
+                'Update cities that already exist, matched by the CSV id (default). '
+                'With --no-upsert the table must be empty'
+            ),
+        )
+
+    def handle(self, *args, **options):
+        try:
+            imported, skipped = import_cities(
+                City,
+                options['file_path'],
+                chunk_size=options['chunk_size'],
+                upsert=options['upsert'],
+            )
+        except ValueError as e:
+            raise CommandError(e)
+        rebuild_country_summaries()
+        invalidate_city_index()
+        invalidate_spatial_index()
+
+        self.stdout.write(self.style.SUCCESS(f'Imported {imported} cities'))
+        if skipped:
+            self.stdout.write(
+                self.style.WARNING(f'Skipped {skipped} rows without an id')
+            )
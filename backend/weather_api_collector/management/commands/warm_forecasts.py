@@ -0,0 +1,57 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from weather_api_collector.forecasting import preload
+from weather_api_collector.precompute import warm_reports, warm_targets
+
+
+def seconds_until_next_run(now=None):
+    # Open-Meteo publishes new data every hour, refresh a little after it lands
+    now = now or timezone.now()
+    top_of_hour = now.replace(minute=0, second=0, microsecond=0)
+    next_run = top_of_hour + timedelta(seconds=settings.WARM_FORECASTS_DELAY)
+    if next_run <= now:
+        next_run += timedelta(hours=1)
+    return (next_run - now).total_seconds()
+
+
+class Command(BaseCommand):
+    help = ('Precompute weather reports for the most populous and recently requested '
+            'cities after every hourly update')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top', type=int, default=settings.WARM_FORECASTS_TOP_CITIES,
+            help='Number of cities to warm, ordered by population')
+        parser.add_argument(
+            '--recent-hours', type=int, default=settings.WARM_FORECASTS_RECENT_HOURS,
+            help='Also warm the cities and date ranges requested within this many '
+                 'hours')
+        parser.add_argument(
+            '--top-ranges', type=int, default=settings.WARM_FORECASTS_TOP_RANGES,
+            help='Number of recently requested date ranges to warm besides the '
+                 'default one')
+        parser.add_argument('--once', action='store_true',
+                            help='Run a single pass instead of looping')
+
+    def handle(self, *args, **options):
+        if settings.FORECAST_PRELOAD:
+            preload()
+        while True:
+            close_old_connections()
+            targets = warm_targets(options['top'], options['recent_hours'],
+                                   options['top_ranges'])
+            warmed, failed = warm_reports(targets)
+            self.stdout.write(self.style.SUCCESS(f'Warmed {warmed} reports'))
+            if failed:
+                warning = f'Failed to warm {failed} reports'
+                self.stdout.write(self.style.WARNING(warning))
+
+            if options['once']:
+                break
+            time.sleep(seconds_until_next_run())
@@ -0,0 +1,41 @@
+import numpy as np
+
+METRICS = ('rmse', 'mae', 'mre')
+
+
+def _masked_mean(values, mask):
+    counts = mask.sum(axis=-1)
+    totals = np.where(mask, values, 0).sum(axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, totals / counts, np.nan)
+
+
+def forecast_errors(predictions, targets):
+    # predictions is (..., models, horizon) and targets (..., horizon), so one call
+    # scores every model of every city. Missing values are skipped and MRE ignores zero
+    # targets instead of returning inf.
+    predictions = np.asarray(predictions, dtype=np.float64)
+    targets = np.expand_dims(np.asarray(targets, dtype=np.float64), axis=-2)
+
+    errors = predictions - targets
+    valid = ~np.isnan(errors)
+    relative_valid = valid & (targets != 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        relative = np.abs(errors) / np.abs(targets)
+
+    return {
+        'rmse': np.sqrt(_masked_mean(errors ** 2, valid)),
+        'mae': _masked_mean(np.abs(errors), valid),
+        'mre': _masked_mean(relative, relative_valid),
+    }
+
+
+def errors_by_model(engines, predictions, targets):
+    # A metric without a single valid point is None, null in the report: every value
+    # missing, or for MRE every actual temperature exactly zero
+    errors = forecast_errors(predictions, targets)
+    return {
+        metric: {engine: (None if np.isnan(value) else float(value))
+                 for engine, value in zip(engines, values)}
+        for metric, values in errors.items()
+    }
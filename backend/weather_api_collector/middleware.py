@@ -0,0 +1,53 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from .instrumentation import (
+    begin_request, current_timings, end_request, finish_request, record_stage,
+)
+
+
+class InstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        timings, token = begin_request()
+        if timings is None:
+            return self.get_response(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            end_request(token)
+        return finish_request(request, response, timings)
+
+    async def __acall__(self, request):
+        timings, token = begin_request()
+        if timings is None:
+            return await self.get_response(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            end_request(token)
+        return finish_request(request, response, timings)
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this
+        # hook, which is where serialization happens
+        timings = current_timings()
+        if timings is not None:
+            started = time.perf_counter()
+            response.add_post_render_callback(
+                lambda rendered: record_stage(timings, 'serialize',
+                                              time.perf_counter() - started)
+            )
+        return response
@@ -1,29 +1,12 @@
 # Generated by Django 5.0.1 on 2024-01-30 18:41
 
 from django.db import migrations, models
-from weather_api_collector.models import City
-import csv
+
+from weather_api_collector.importers import import_cities
 
 
 def load_cities(apps, schema_editor):
-    file_path = 'data/worldcities.csv'
-
-    with open(file_path, 'r', encoding='utf-8') as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            population = float(row['population']) if row['population'] else 0
-            City.objects.create(
-                city=row['city'],
-                city_ascii=row['city_ascii'],
-                lat=float(row['lat']),
-                lng=float(row['lng']),
-                country=row['country'],
-                iso2=row['iso2'],
-                iso3=row['iso3'],
-                admin_name=row['admin_name'],
-                capital=row['capital'],
-                population=population
-            )
+    import_cities(apps.get_model('weather_api_collector', 'City'), upsert=False)
 
 
 class Migration(migrations.Migration):
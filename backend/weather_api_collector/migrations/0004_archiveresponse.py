@@ -0,0 +1,38 @@
+# Generated by Django 5.0.1 on 2026-10-18 10:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("weather_api_collector", "0003_city"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchiveResponse",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.CharField(max_length=64, unique=True)),
+                ("lat", models.FloatField()),
+                ("lng", models.FloatField()),
+                ("start_date", models.DateField()),
+                ("end_date", models.DateField()),
+                ("variables", models.CharField(max_length=255)),
+                ("payload", models.BinaryField()),
+                ("size", models.PositiveIntegerField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("accessed_at", models.DateTimeField(db_index=True)),
+                ("expires_at", models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
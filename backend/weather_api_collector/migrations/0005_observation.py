@@ -0,0 +1,50 @@
+# Generated by Django 5.0.1 on 2026-10-18 10:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("weather_api_collector", "0004_archiveresponse"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Observation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("time", models.DateTimeField()),
+                ("temperature_2m", models.FloatField()),
+                ("relative_humidity_2m", models.FloatField()),
+                ("wind_speed_10m", models.FloatField()),
+                ("fetched_at", models.DateTimeField()),
+                (
+                    "city",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="observations",
+                        to="weather_api_collector.city",
+                    ),
+                ),
+            ],
+        ),
+        migrations.DeleteModel(
+            name="WeatherData",
+        ),
+        migrations.AddConstraint(
+            model_name="observation",
+            constraint=models.UniqueConstraint(
+                fields=("city", "time"), name="unique_city_observation_time"
+            ),
+        ),
+    ]
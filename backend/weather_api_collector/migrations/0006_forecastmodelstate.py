@@ -0,0 +1,51 @@
+# Generated by Django 5.0.1 on 2026-10-18 10:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("weather_api_collector", "0005_observation"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ForecastModelState",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("engine", models.CharField(max_length=32)),
+                ("window_start", models.DateTimeField()),
+                ("window_end", models.DateTimeField()),
+                ("data_hash", models.CharField(max_length=64)),
+                ("params", models.JSONField()),
+                ("estimated_until", models.DateTimeField()),
+                ("forecast", models.JSONField()),
+                ("fitted_at", models.DateTimeField(auto_now=True)),
+                (
+                    "city",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="forecast_models",
+                        to="weather_api_collector.city",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="forecastmodelstate",
+            constraint=models.UniqueConstraint(
+                fields=("city", "engine", "window_start", "window_end"),
+                name="unique_forecast_model_window",
+            ),
+        ),
+    ]
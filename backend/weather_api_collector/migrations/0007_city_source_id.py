@@ -0,0 +1,25 @@
+# Generated by Django 5.0.1 on 2026-10-18 10:34
+
+from django.db import migrations, models
+
+from weather_api_collector.importers import backfill_source_ids
+
+
+def backfill_city_source_ids(apps, schema_editor):
+    backfill_source_ids(apps.get_model('weather_api_collector', 'City'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("weather_api_collector", "0006_forecastmodelstate"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="city",
+            name="source_id",
+            field=models.BigIntegerField(blank=True, null=True, unique=True),
+        ),
+        migrations.RunPython(backfill_city_source_ids, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.0.1 on 2026-10-18 10:36
+
+from django.db import migrations, models
+
+from weather_api_collector.summaries import rebuild_country_summaries
+
+
+def build_country_summaries(apps, schema_editor):
+    rebuild_country_summaries(
+        apps.get_model('weather_api_collector', 'City'),
+        apps.get_model('weather_api_collector', 'CountrySummary'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("weather_api_collector", "0007_city_source_id"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CountrySummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("country", models.CharField(max_length=255, unique=True)),
+                ("iso2", models.CharField(max_length=2)),
+                ("iso3", models.CharField(max_length=3)),
+                ("city_count", models.PositiveIntegerField()),
+                ("population_total", models.FloatField()),
+                ("centroid_lat", models.FloatField()),
+                ("centroid_lng", models.FloatField()),
+                ("min_lat", models.FloatField()),
+                ("max_lat", models.FloatField()),
+                ("min_lng", models.FloatField()),
+                ("max_lng", models.FloatField()),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(build_country_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.1 on 2026-10-18 10:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("weather_api_collector", "0008_countrysummary"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="city",
+            index=models.Index(
+                fields=["country", "city"], name="city_country_city_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="city",
+            index=models.Index(
+                fields=["city", "-population"], name="city_name_population_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="forecastmodelstate",
+            index=models.Index(
+                fields=["city", "engine", "-fitted_at"],
+                name="forecast_model_latest_idx",
+            ),
+        ),
+    ]
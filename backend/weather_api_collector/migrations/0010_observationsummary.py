@@ -0,0 +1,66 @@
+# Generated by Django 5.0.1 on 2026-10-18 10:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+
+from weather_api_collector.statistics import refresh_summaries
+
+
+def build_observation_summaries(apps, schema_editor):
+    observation_model = apps.get_model('weather_api_collector', 'Observation')
+    summary_model = apps.get_model('weather_api_collector', 'ObservationSummary')
+    days_by_city = {}
+    for city_id, day in observation_model.objects.values_list('city_id', TruncDate('time')).distinct():
+        days_by_city.setdefault(city_id, []).append(day)
+    for city_id, days in days_by_city.items():
+        refresh_summaries(city_id, days, observation_model, summary_model)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("weather_api_collector", "0009_lookup_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ObservationSummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "period",
+                    models.CharField(
+                        choices=[("day", "Day"), ("month", "Month")], max_length=5
+                    ),
+                ),
+                ("start", models.DateField()),
+                ("stats", models.JSONField()),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "city",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="observation_summaries",
+                        to="weather_api_collector.city",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="observationsummary",
+            constraint=models.UniqueConstraint(
+                fields=("city", "period", "start"),
+                name="unique_observation_summary_period",
+            ),
+        ),
+        migrations.RunPython(build_observation_summaries, migrations.RunPython.noop),
+    ]
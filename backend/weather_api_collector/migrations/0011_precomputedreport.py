@@ -0,0 +1,51 @@
+# Generated by Django 5.0.1 on 2026-10-18 10:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("weather_api_collector", "0010_observationsummary"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PrecomputedReport",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("start_date", models.DateField()),
+                ("end_date", models.DateField()),
+                ("report", models.JSONField()),
+                ("computed_at", models.DateTimeField()),
+                (
+                    "requested_at",
+                    models.DateTimeField(blank=True, db_index=True, null=True),
+                ),
+                (
+                    "city",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="precomputed_reports",
+                        to="weather_api_collector.city",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="precomputedreport",
+            constraint=models.UniqueConstraint(
+                fields=("city", "start_date", "end_date"),
+                name="unique_precomputed_report",
+            ),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.0.1 on 2026-10-18 10:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("weather_api_collector", "0011_precomputedreport"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AccuracySummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("engine", models.CharField(max_length=32)),
+                ("origins", models.PositiveIntegerField()),
+                ("horizon", models.PositiveIntegerField()),
+                ("evaluated_from", models.DateTimeField()),
+                ("evaluated_to", models.DateTimeField()),
+                ("rmse", models.FloatField(null=True)),
+                ("mae", models.FloatField(null=True)),
+                ("mre", models.FloatField(null=True)),
+                ("computed_at", models.DateTimeField(auto_now=True)),
+                (
+                    "city",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="accuracy_summaries",
+                        to="weather_api_collector.city",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="accuracysummary",
+            constraint=models.UniqueConstraint(
+                fields=("city", "engine"), name="unique_accuracy_summary"
+            ),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.1 on 2026-10-18 11:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("weather_api_collector", "0012_accuracysummary"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="city",
+            name="city_country_city_idx",
+        ),
+        migrations.AddIndex(
+            model_name="city",
+            index=models.Index(
+                fields=["country", "city", "id"], name="city_country_city_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="city",
+            index=models.Index(fields=["city", "id"], name="city_name_id_idx"),
+        ),
+    ]
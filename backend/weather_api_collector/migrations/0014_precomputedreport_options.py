@@ -0,0 +1,29 @@
+# Generated by Django 5.0.1 on 2026-10-18 11:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("weather_api_collector", "0013_city_cursor_indexes"),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name="precomputedreport",
+            name="unique_precomputed_report",
+        ),
+        migrations.AddField(
+            model_name="precomputedreport",
+            name="options",
+            field=models.CharField(default="", max_length=255),
+        ),
+        migrations.AddConstraint(
+            model_name="precomputedreport",
+            constraint=models.UniqueConstraint(
+                fields=("city", "start_date", "end_date", "options"),
+                name="unique_precomputed_report_options",
+            ),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.0.1 on 2026-10-18 11:28
+
+from django.db import migrations, models
+
+
+def delete_unlabelled_summaries(apps, schema_editor):
+    # Older summaries never recorded the training options they were computed with
+    apps.get_model("weather_api_collector", "AccuracySummary").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("weather_api_collector", "0014_precomputedreport_options"),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_unlabelled_summaries, migrations.RunPython.noop),
+        migrations.RemoveConstraint(
+            model_name="accuracysummary",
+            name="unique_accuracy_summary",
+        ),
+        migrations.AddField(
+            model_name="accuracysummary",
+            name="resample",
+            field=models.PositiveSmallIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name="accuracysummary",
+            name="train_days",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddConstraint(
+            model_name="accuracysummary",
+            constraint=models.UniqueConstraint(
+                fields=("city", "engine", "train_days", "resample"),
+                name="unique_accuracy_summary_options",
+            ),
+        ),
+    ]
@@ -0,0 +1,166 @@
+import hashlib
+from datetime import timedelta
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import F
+
+from .executor import arun_fits, collect_fits, submit_fits
+from .forecasting import ENGINES, FORECAST_STEPS, fit_forecast
+from .instrumentation import cache_lookup
+from .models import ForecastModelState
+
+
+def series_hash(values):
+    return hashlib.sha256(
+        np.ascontiguousarray(values, dtype=np.float64).tobytes()
+    ).hexdigest()
+
+
+def _prune_states(city, engine):
+    states = ForecastModelState.objects.filter(city=city, engine=engine)
+    size = settings.FORECAST_MODEL_CACHE_SIZE
+    keep = list(states.order_by('-fitted_at').values_list('pk', flat=True)[:size])
+    states.exclude(pk__in=keep).delete()
+
+
+def _plan_fit(city, engine, window_start, window_end):
+    # Only a window of the same length moved by a few hours can reuse the parameters
+    latest = (
+        ForecastModelState.objects
+        .annotate(window_length=F('window_end') - F('window_start'))
+        .filter(city=city, engine=engine, window_length=window_end - window_start)
+        .order_by('-fitted_at')
+        .first()
+    )
+    if latest is not None and abs(window_end - latest.estimated_until) <= timedelta(
+            hours=settings.FORECAST_REFILTER_MAX_HOURS):
+        return latest.params, latest.estimated_until
+    return None, window_end
+
+
+def _state_engine(engine, resample):
+    # Parameters fitted on resampled series only fit series resampled the same way
+    return engine if resample == 1 else f'{engine}/{resample}h'
+
+
+def _fast_forecasts(engines, values, steps, resample):
+    return {engine: fit_forecast(engine, values, steps, resample=resample)[1]
+            for engine in engines if ENGINES[engine].fast}
+
+
+def _lookup(city, engines, window_start, window_end, data_hash, steps, resample):
+    forecasts = {}
+    engines = [engine for engine in engines if not ENGINES[engine].fast]
+    state_engines = [_state_engine(engine, resample) for engine in engines]
+    states = {
+        state.engine: state
+        for state in ForecastModelState.objects.filter(
+            city=city, engine__in=state_engines,
+            window_start=window_start, window_end=window_end
+        )
+    }
+    for engine in engines:
+        state = states.get(_state_engine(engine, resample))
+        if (
+            state is not None
+            and state.data_hash == data_hash
+            and len(state.forecast) == steps
+        ):
+            forecasts[engine] = state.forecast
+        cache_lookup('forecast_model', engine in forecasts)
+
+    plans = {engine: _plan_fit(city, _state_engine(engine, resample), window_start,
+                               window_end)
+             for engine in engines if engine not in forecasts}
+    return forecasts, plans
+
+
+def _store(city, window_start, window_end, data_hash, plans, fitted, resample):
+    forecasts = {}
+    for engine, (params, forecast) in fitted.items():
+        ForecastModelState.objects.update_or_create(
+            city=city,
+            engine=_state_engine(engine, resample),
+            window_start=window_start,
+            window_end=window_end,
+            defaults={
+                'data_hash': data_hash,
+                'params': params,
+                'estimated_until': plans[engine][1],
+                'forecast': forecast,
+            }
+        )
+        _prune_states(city, _state_engine(engine, resample))
+        forecasts[engine] = forecast
+    return forecasts
+
+
+def _fit_jobs(plans, values, steps, resample):
+    return {engine: (engine, values, steps, params, resample)
+            for engine, (params, _) in plans.items()}
+
+
+class PendingForecasts:
+    def __init__(self, city, engines, window_start, window_end, data_hash, forecasts,
+                 plans, futures, resample):
+        self.city = city
+        self.engines = engines
+        self.resample = resample
+        self.window_start = window_start
+        self.window_end = window_end
+        self.data_hash = data_hash
+        self.forecasts = forecasts
+        self.plans = plans
+        self.futures = futures
+
+    def done(self):
+        return all(future.done() for future in self.futures.values())
+
+    def cancel(self):
+        for future in self.futures.values():
+            future.cancel()
+
+    def result(self, timeout=None):
+        if self.futures:
+            fitted = collect_fits(self.futures, timeout)
+            self.forecasts.update(
+                _store(self.city, self.window_start, self.window_end, self.data_hash,
+                       self.plans, fitted, self.resample)
+            )
+            self.futures = {}
+        return {engine: self.forecasts[engine] for engine in self.engines}
+
+
+def submit_forecasts(city, engines, times, values, steps=FORECAST_STEPS, resample=1):
+    window_start, window_end = times[0], times[-1]
+    data_hash = series_hash(values)
+
+    forecasts, plans = _lookup(city, engines, window_start, window_end, data_hash,
+                               steps, resample)
+    forecasts.update(_fast_forecasts(engines, values, steps, resample))
+    futures = submit_fits(_fit_jobs(plans, values, steps, resample)) if plans else {}
+    return PendingForecasts(city, engines, window_start, window_end, data_hash,
+                            forecasts, plans, futures, resample)
+
+
+def cached_forecasts(city, engines, times, values, steps=FORECAST_STEPS, resample=1):
+    return submit_forecasts(city, engines, times, values, steps, resample).result()
+
+
+async def acached_forecasts(city, engines, times, values, steps=FORECAST_STEPS,
+                            resample=1):
+    window_start, window_end = times[0], times[-1]
+    data_hash = series_hash(values)
+
+    forecasts, plans = await sync_to_async(_lookup)(city, engines, window_start,
+                                                    window_end, data_hash, steps,
+                                                    resample)
+    forecasts.update(_fast_forecasts(engines, values, steps, resample))
+    if plans:
+        fitted = await arun_fits(_fit_jobs(plans, values, steps, resample))
+        stored = await sync_to_async(_store)(city, window_start, window_end, data_hash,
+                                             plans, fitted, resample)
+        forecasts.update(stored)
+    return {engine: forecasts[engine] for engine in engines}
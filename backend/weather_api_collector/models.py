@@ -12,3 +12,154 @@ class City(models.Model):
     admin_name = models.CharField(max_length=255)
     capital = models.CharField(max_length=255)
     population = models.FloatField()
+    source_id = models.BigIntegerField(unique=True, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['country', 'city', 'id'], name='city_country_city_id_idx'
+            ),
+            models.Index(
+                fields=['city', '-population'], name='city_name_population_idx'
+            ),
+            models.Index(fields=['city', 'id'], name='city_name_id_idx'),
+        ]
+
+
+class ArchiveResponse(models.Model):
+    key = models.CharField(max_length=64, unique=True)
+    lat = models.FloatField()
+    lng = models.FloatField()
+    start_date = models.DateField()
+    end_date = models.DateField()
+    variables = models.CharField(max_length=255)
+    payload = models.BinaryField()
+    size = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    accessed_at = models.DateTimeField(db_index=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+
+
+class Observation(models.Model):
+    city = models.ForeignKey(
+        City, on_delete=models.CASCADE, related_name='observations'
+    )
+    time = models.DateTimeField()
+    temperature_2m = models.FloatField()
+    relative_humidity_2m = models.FloatField()
+    wind_speed_10m = models.FloatField()
+    fetched_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['city', 'time'], name='unique_city_observation_time'
+            ),
+        ]
+
+
+class ObservationSummary(models.Model):
+    PERIODS = [('day', 'Day'), ('month', 'Month')]
+
+    city = models.ForeignKey(
+        City, on_delete=models.CASCADE, related_name='observation_summaries'
+    )
+    period = models.CharField(max_length=5, choices=PERIODS)
+    start = models.DateField()
+    stats = models.JSONField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['city', 'period', 'start'],
+                name='unique_observation_summary_period',
+            ),
+        ]
+
+
+class ForecastModelState(models.Model):
+    city = models.ForeignKey(
+        City, on_delete=models.CASCADE, related_name='forecast_models'
+    )
+    engine = models.CharField(max_length=32)
+    window_start = models.DateTimeField()
+    window_end = models.DateTimeField()
+    data_hash = models.CharField(max_length=64)
+    params = models.JSONField()
+    estimated_until = models.DateTimeField()
+    forecast = models.JSONField()
+    fitted_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['city', 'engine', '-fitted_at'],
+                name='forecast_model_latest_idx',
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['city', 'engine', 'window_start', 'window_end'],
+                name='unique_forecast_model_window',
+            ),
+        ]
+
+
+class CountrySummary(models.Model):
+    country = models.CharField(max_length=255, unique=True)
+    iso2 = models.CharField(max_length=2)
+    iso3 = models.CharField(max_length=3)
+    city_count = models.PositiveIntegerField()
+    population_total = models.FloatField()
+    centroid_lat = models.FloatField()
+    centroid_lng = models.FloatField()
+    min_lat = models.FloatField()
+    max_lat = models.FloatField()
+    min_lng = models.FloatField()
+    max_lng = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class PrecomputedReport(models.Model):
+    city = models.ForeignKey(City, on_delete=models.CASCADE,
+                             related_name='precomputed_reports')
+    start_date = models.DateField()
+    end_date = models.DateField()
+    # ForecastOptions.key() the report was built with, reports from older defaults
+    # are never served
+    options = models.CharField(max_length=255, default='')
+    report = models.JSONField()
+    computed_at = models.DateTimeField()
+    requested_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['city', 'start_date', 'end_date', 'options'],
+                name='unique_precomputed_report_options'),
+        ]
+
+
+class AccuracySummary(models.Model):
+    city = models.ForeignKey(City, on_delete=models.CASCADE,
+                             related_name='accuracy_summaries')
+    engine = models.CharField(max_length=32)
+    # The training options the backtest ran with, 0 train_days trains on all the
+    # history before each origin
+    train_days = models.PositiveIntegerField(default=0)
+    resample = models.PositiveSmallIntegerField(default=1)
+    origins = models.PositiveIntegerField()
+    horizon = models.PositiveIntegerField()
+    evaluated_from = models.DateTimeField()
+    evaluated_to = models.DateTimeField()
+    rmse = models.FloatField(null=True)
+    mae = models.FloatField(null=True)
+    mre = models.FloatField(null=True)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['city', 'engine', 'train_days', 'resample'],
+                                    name='unique_accuracy_summary_options'),
+        ]
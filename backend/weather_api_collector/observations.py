@@ -0,0 +1,131 @@
+import asyncio
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Count, Min
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .instrumentation import cache_lookup, timed
+from .models import Observation
+from .open_meteo import (
+    HOURLY_VARIABLES, afetch_archive, iter_archive_chunks, split_date_range,
+)
+from .series_store import invalidate_series
+from .statistics import refresh_summaries
+
+
+def _date_range(start_date, end_date):
+    day = start_date
+    while day <= end_date:
+        yield day
+        day += timedelta(days=1)
+
+
+def _group_consecutive(days):
+    ranges = []
+    for day in days:
+        if ranges and ranges[-1][1] + timedelta(days=1) == day:
+            ranges[-1][1] = day
+        else:
+            ranges.append([day, day])
+    return [tuple(r) for r in ranges]
+
+
+def missing_date_ranges(city, start_date, end_date):
+    start_date = date.fromisoformat(str(start_date))
+    now = timezone.now()
+    # Days the archive cannot return in full yet would be refetched on every sync
+    latest_day = now.date() - timedelta(days=settings.ARCHIVE_DELAY_DAYS)
+    end_date = min(date.fromisoformat(str(end_date)), latest_day)
+    revision_start = now.date() - timedelta(days=settings.ARCHIVE_REVISION_DAYS)
+    fresh_after = now - timedelta(seconds=settings.ARCHIVE_CACHE_TTL)
+
+    stored_days = {
+        row['day']: row
+        for row in Observation.objects.filter(
+            city=city, time__date__range=(start_date, end_date)
+        )
+        .values(day=TruncDate('time'))
+        .annotate(hours=Count('id'), fetched_at=Min('fetched_at'))
+    }
+
+    missing = []
+    for day in _date_range(start_date, end_date):
+        stored = stored_days.get(day)
+        if stored is None or stored['hours'] < 24:
+            missing.append(day)
+        elif day >= revision_start and stored['fetched_at'] < fresh_after:
+            missing.append(day)
+    cache_lookup('observations', not missing)
+    return _group_consecutive(missing)
+
+
+@timed('upsert_observations')
+def upsert_observations(city, hourly):
+    fetched_at = timezone.now()
+    rows = []
+    for i, time in enumerate(hourly['time']):
+        values = {variable: hourly[variable][i] for variable in HOURLY_VARIABLES}
+        if any(value is None for value in values.values()):
+            continue
+        rows.append(Observation(
+            city=city,
+            time=datetime.fromisoformat(time).replace(tzinfo=dt_timezone.utc),
+            fetched_at=fetched_at,
+            **values
+        ))
+
+    Observation.objects.bulk_create(
+        rows,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['city', 'time'],
+        update_fields=[*HOURLY_VARIABLES, 'fetched_at'],
+    )
+    refresh_summaries(city.pk, {row.time.date() for row in rows})
+    invalidate_series(city)
+    return len(rows)
+
+
+def sync_observations(city, start_date, end_date):
+    return sync_observations_many([city], start_date, end_date)
+
+
+def sync_observations_many(cities, start_date, end_date):
+    cities_by_range = {}
+    for city in cities:
+        for date_range in missing_date_ranges(city, start_date, end_date):
+            cities_by_range.setdefault(date_range, []).append(city)
+
+    fetched = 0
+    for date_range, range_cities in cities_by_range.items():
+        # Each chunk is stored as soon as it arrives,
+        # the raw payloads are never held together
+        locations = [(city.lat, city.lng) for city in range_cities]
+        for i, weather_data in iter_archive_chunks(locations, [date_range]):
+            fetched += upsert_observations(range_cities[i], weather_data['hourly'])
+    return fetched
+
+
+async def async_sync_observations(city, start_date, end_date):
+    ranges = await sync_to_async(missing_date_ranges)(city, start_date, end_date)
+    semaphore = asyncio.Semaphore(settings.ARCHIVE_FETCH_CONCURRENCY)
+
+    async def fetch(chunk_start, chunk_end):
+        async with semaphore:
+            return await afetch_archive(city.lat, city.lng, chunk_start, chunk_end)
+
+    chunks = [
+        chunk
+        for range_start, range_end in ranges
+        for chunk in split_date_range(range_start, range_end)
+    ]
+    fetched = 0
+    for next_chunk in asyncio.as_completed([fetch(*chunk) for chunk in chunks]):
+        weather_data = await next_chunk
+        fetched += await sync_to_async(upsert_observations)(
+            city, weather_data['hourly']
+        )
+    return fetched
@@ -0,0 +1,273 @@
+import asyncio
+import contextvars
+import threading
+import weakref
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import date, timedelta
+from itertools import islice
+
+import httpx
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .cache import get_archive, make_archive_key, set_archive
+from .instrumentation import upstream_span
+
+HOURLY_VARIABLES = ('temperature_2m', 'relative_humidity_2m', 'wind_speed_10m')
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_local = threading.local()
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def snap_coordinates(lat, lng):
+    resolution = settings.WEATHER_GRID_RESOLUTION
+    if not resolution:
+        return lat, lng
+    lat = round(round(lat / resolution) * resolution, 4)
+    lng = round(round(lng / resolution) * resolution, 4)
+    return lat, lng
+
+
+def _timeout():
+    return settings.OPEN_METEO_CONNECT_TIMEOUT, settings.OPEN_METEO_READ_TIMEOUT
+
+
+def get_session():
+    session = getattr(_local, 'session', None)
+    if session is None:
+        retry = Retry(
+            total=settings.OPEN_METEO_RETRIES,
+            backoff_factor=settings.OPEN_METEO_BACKOFF,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=['GET'],
+        )
+        session = requests.Session()
+        session.mount('https://', HTTPAdapter(max_retries=retry))
+        session.mount('http://', HTTPAdapter(max_retries=retry))
+        _local.session = session
+    return session
+
+
+async def _close_on_shutdown(client):
+    try:
+        yield
+    finally:
+        await client.aclose()
+
+
+async def get_async_client():
+    loop = asyncio.get_running_loop()
+    if loop not in _async_clients:
+        connect_timeout, read_timeout = _timeout()
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=settings.OPEN_METEO_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.OPEN_METEO_MAX_CONNECTIONS,
+            ),
+        )
+        # asyncio.run() closes pending async generators before it closes its loop,
+        # so the client goes with the loop. Under WSGI every async view request runs
+        # on a loop of its own.
+        closer = _close_on_shutdown(client)
+        await closer.asend(None)
+        _async_clients[loop] = client, closer
+    return _async_clients[loop][0]
+
+
+def _endpoint(url):
+    return 'archive' if url == settings.OPEN_METEO_ARCHIVE_URL else 'forecast'
+
+
+def _get_json(url, params):
+    with upstream_span(_endpoint(url)):
+        response = get_session().get(url, params=params, timeout=_timeout())
+        response.raise_for_status()
+        return response.json()
+
+
+async def _aget_json(url, params):
+    with upstream_span(_endpoint(url)):
+        return await _aget_json_with_retries(url, params)
+
+
+async def _aget_json_with_retries(url, params):
+    client = await get_async_client()
+    for attempt in range(settings.OPEN_METEO_RETRIES + 1):
+        retries_left = attempt < settings.OPEN_METEO_RETRIES
+        try:
+            response = await client.get(url, params=params)
+        except httpx.TransportError:
+            if not retries_left:
+                raise
+        else:
+            if response.status_code not in RETRY_STATUSES or not retries_left:
+                response.raise_for_status()
+                return response.json()
+        await asyncio.sleep(settings.OPEN_METEO_BACKOFF * 2 ** attempt)
+
+
+def _archive_params(lat, lng, start_date, end_date, variables):
+    return {
+        'latitude': lat,
+        'longitude': lng,
+        'start_date': start_date,
+        'end_date': end_date,
+        'hourly': ','.join(variables),
+    }
+
+
+def _forecast_params(lat, lng):
+    return {
+        'latitude': lat,
+        'longitude': lng,
+        'current': 'temperature_2m,wind_speed_10m',
+        'hourly': ','.join(HOURLY_VARIABLES),
+    }
+
+
+def fetch_archive(lat, lng, start_date, end_date, variables=HOURLY_VARIABLES):
+    lat, lng = snap_coordinates(lat, lng)
+    key = make_archive_key(lat, lng, start_date, end_date, variables)
+    weather_data = get_archive(key)
+    if weather_data is not None:
+        return weather_data
+
+    weather_data = _get_json(settings.OPEN_METEO_ARCHIVE_URL,
+                             _archive_params(lat, lng, start_date, end_date, variables))
+
+    set_archive(key, lat, lng, start_date, end_date, variables, weather_data)
+    return weather_data
+
+
+async def afetch_archive(lat, lng, start_date, end_date, variables=HOURLY_VARIABLES):
+    lat, lng = snap_coordinates(lat, lng)
+    key = make_archive_key(lat, lng, start_date, end_date, variables)
+    weather_data = await sync_to_async(get_archive)(key)
+    if weather_data is not None:
+        return weather_data
+
+    weather_data = await _aget_json(
+        settings.OPEN_METEO_ARCHIVE_URL,
+        _archive_params(lat, lng, start_date, end_date, variables),
+    )
+
+    await sync_to_async(set_archive)(
+        key, lat, lng, start_date, end_date, variables, weather_data
+    )
+    return weather_data
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _get_json_many(url, params_for, locations):
+    # Open-Meteo takes comma separated coordinate lists and answers with one object
+    # per location
+    lats = ','.join(str(lat) for lat, _ in locations)
+    lngs = ','.join(str(lng) for _, lng in locations)
+    weather_data = _get_json(url, params_for(lats, lngs))
+    return weather_data if isinstance(weather_data, list) else [weather_data]
+
+
+def split_date_range(start_date, end_date, months=None):
+    # Chunks follow calendar months so overlapping requests reuse the same cached chunks
+    months = months or settings.ARCHIVE_CHUNK_MONTHS
+    start_date = date.fromisoformat(str(start_date))
+    end_date = date.fromisoformat(str(end_date))
+    chunks = []
+    while start_date <= end_date:
+        month = start_date.month - 1 + months
+        next_start = date(start_date.year + month // 12, month % 12 + 1, 1)
+        chunk_end = min(next_start - timedelta(days=1), end_date)
+        chunks.append((start_date.isoformat(), chunk_end.isoformat()))
+        start_date = next_start
+    return chunks
+
+
+def _bounded_map(fn, items, concurrency):
+    # Keeps at most `concurrency` downloads in flight and hands
+    # results back as they complete, so unconsumed payloads never pile
+    # up in memory. Each download runs in a copy of the caller's
+    # context so it is timed as part of the request that asked for it.
+    items = iter(items)
+
+    def submit(pool, item):
+        return pool.submit(contextvars.copy_context().run, fn, *item)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        pending = {submit(pool, item): item for item in islice(items, concurrency)}
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    item = pending.pop(future)
+                    yield item, future.result()
+                    for next_item in islice(items, 1):
+                        pending[submit(pool, next_item)] = next_item
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def iter_archive_chunks(locations, date_ranges, variables=HOURLY_VARIABLES):
+    locations = [snap_coordinates(lat, lng) for lat, lng in locations]
+
+    def download(start_date, end_date, indexes):
+        return _get_json_many(
+            settings.OPEN_METEO_ARCHIVE_URL,
+            lambda lat, lng: _archive_params(lat, lng, start_date, end_date, variables),
+            [locations[i] for i in indexes],
+        )
+
+    requests_to_send = []
+    for range_start, range_end in date_ranges:
+        for start_date, end_date in split_date_range(range_start, range_end):
+            missing = []
+            for i, (lat, lng) in enumerate(locations):
+                weather_data = get_archive(
+                    make_archive_key(lat, lng, start_date, end_date, variables)
+                )
+                if weather_data is None:
+                    missing.append(i)
+                else:
+                    yield i, weather_data
+            for indexes in _chunks(missing, settings.OPEN_METEO_BATCH_SIZE):
+                requests_to_send.append((start_date, end_date, indexes))
+
+    # Database access stays on the calling thread,
+    # worker threads only talk to Open-Meteo
+    downloads = _bounded_map(
+        download, requests_to_send, settings.ARCHIVE_FETCH_CONCURRENCY
+    )
+    for (start_date, end_date, indexes), payloads in downloads:
+        for i, weather_data in zip(indexes, payloads):
+            lat, lng = locations[i]
+            set_archive(make_archive_key(lat, lng, start_date, end_date, variables),
+                        lat, lng, start_date, end_date, variables, weather_data)
+            yield i, weather_data
+
+
+def fetch_forecast(lat, lng):
+    return _get_json(settings.OPEN_METEO_FORECAST_URL, _forecast_params(lat, lng))
+
+
+def fetch_forecast_many(locations):
+    results = []
+    for chunk in _chunks(list(locations), settings.OPEN_METEO_BATCH_SIZE):
+        results.extend(
+            _get_json_many(settings.OPEN_METEO_FORECAST_URL, _forecast_params, chunk)
+        )
+    return results
+
+
+async def afetch_forecast(lat, lng):
+    return await _aget_json(
+        settings.OPEN_METEO_FORECAST_URL, _forecast_params(lat, lng)
+    )
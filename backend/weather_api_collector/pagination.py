@@ -0,0 +1,111 @@
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class CityCursorPagination(BasePagination):
+    # Keyset pagination on (city, id): every page is an index range scan, however
+    # deep it is, and there is no COUNT(*). Views can offer an approximate count
+    # with get_approximate_count(), clients opt in with ?count=1.
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param,
+                                                     api_settings.PAGE_SIZE))
+        except ValueError:
+            page_size = api_settings.PAGE_SIZE
+        return min(max(page_size, 1), settings.CITY_PAGE_MAX_SIZE)
+
+    def encode_cursor(self, reverse, city):
+        position = json.dumps([int(reverse), city.city, city.pk], separators=(',', ':'))
+        cursor = base64.urlsafe_b64encode(position.encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position = base64.urlsafe_b64decode(encoded.encode('ascii'))
+            reverse, name, pk = json.loads(position)
+            return bool(reverse), str(name), int(pk)
+        except (TypeError, ValueError, UnicodeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.count = None
+        count_param = request.query_params.get(self.count_query_param, '')
+        count_requested = count_param.lower() in ('1', 'true')
+
+        if isinstance(queryset, list):
+            # Search results are ranked and limited already, they come back as one page
+            self.count = len(queryset) if count_requested else None
+            self.next = self.previous = None
+            return queryset
+
+        get_count = getattr(view, 'get_approximate_count', None)
+        self.count = get_count() if count_requested and get_count is not None else None
+
+        cursor = self.decode_cursor(request)
+        if cursor is None:
+            reverse, rows = False, queryset.order_by('city', 'id')
+        else:
+            # The leading city bound lets the database seek into the index instead of
+            # filtering from the start
+            reverse, name, pk = cursor
+            if reverse:
+                rows = queryset.filter(Q(city__lte=name),
+                                       Q(city__lt=name) | Q(id__lt=pk))
+                rows = rows.order_by('-city', '-id')
+            else:
+                rows = queryset.filter(Q(city__gte=name),
+                                       Q(city__gt=name) | Q(id__gt=pk))
+                rows = rows.order_by('city', 'id')
+
+        rows = list(rows[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        has_next = has_more if not reverse else True
+        has_previous = cursor is not None if not reverse else has_more
+        self.next = self.encode_cursor(False, rows[-1]) if rows and has_next else None
+        self.previous = (self.encode_cursor(True, rows[0])
+                         if rows and has_previous else None)
+        return rows
+
+    def get_paginated_response(self, data):
+        response = {}
+        if self.count is not None:
+            response['count'] = self.count
+        response['next'] = self.next
+        response['previous'] = self.previous
+        response['results'] = data
+        return Response(response)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer', 'example': 123},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,117 @@
+from datetime import timedelta
+
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Count
+from django.utils import timezone
+
+from .instrumentation import cache_lookup
+from .models import City, PrecomputedReport
+from .reports import (
+    ForecastOptions, aweather_report, default_date_range, stream_weather_reports,
+    weather_report,
+)
+
+
+def get_precomputed_report(city, start_date, end_date, options):
+    precomputed = PrecomputedReport.objects.filter(
+        city=city, start_date=start_date, end_date=end_date, options=options.key()
+    ).first()
+    if precomputed is None:
+        cache_lookup('precomputed_report', False)
+        return None
+
+    now = timezone.now()
+    # Requests are only recorded once a minute per report, the worker just needs to
+    # know it is still wanted
+    requested_at = precomputed.requested_at
+    if requested_at is None or requested_at < now - timedelta(minutes=1):
+        PrecomputedReport.objects.filter(pk=precomputed.pk).update(requested_at=now)
+    ttl = timedelta(seconds=settings.PRECOMPUTED_REPORT_TTL)
+    fresh = precomputed.computed_at >= now - ttl
+    cache_lookup('precomputed_report', fresh)
+    return precomputed.report if fresh else None
+
+
+def store_report(city, start_date, end_date, options, report, requested=False):
+    defaults = {'report': report, 'computed_at': timezone.now()}
+    if requested:
+        defaults['requested_at'] = defaults['computed_at']
+    PrecomputedReport.objects.update_or_create(city=city, start_date=start_date,
+                                               end_date=end_date, options=options.key(),
+                                               defaults=defaults)
+
+
+def precomputed_weather_report(city, start_date, end_date, options=None):
+    # Only reports with the default forecast options are precomputed
+    options = options or ForecastOptions()
+    if not options.is_default():
+        return weather_report(city, start_date, end_date, options)
+
+    report = get_precomputed_report(city, start_date, end_date, options)
+    if report is None:
+        report = weather_report(city, start_date, end_date, options)
+        store_report(city, start_date, end_date, options, report, requested=True)
+    return report
+
+
+async def aprecomputed_weather_report(city, start_date, end_date, options=None):
+    options = options or ForecastOptions()
+    if not options.is_default():
+        return await aweather_report(city, start_date, end_date, options)
+
+    report = await sync_to_async(get_precomputed_report)(city, start_date, end_date,
+                                                         options)
+    if report is None:
+        report = await aweather_report(city, start_date, end_date, options)
+        await sync_to_async(store_report)(city, start_date, end_date, options, report,
+                                          requested=True)
+    return report
+
+
+def warm_targets(top_cities, recent_hours, top_ranges):
+    # Any client can request a new date range, so only the default range and the
+    # top_ranges ranges requested for the most cities are warmed, each for at most
+    # top_cities recently requesting cities
+    populous = City.objects.order_by('-population')[:top_cities]
+    targets = {default_date_range(): list(populous)}
+
+    since = timezone.now() - timedelta(hours=recent_hours)
+    recent = PrecomputedReport.objects.filter(options=ForecastOptions().key(),
+                                              requested_at__gte=since)
+    ranges = (
+        recent.values_list('start_date', 'end_date')
+        .annotate(cities=Count('id'))
+        .order_by('-cities', '-end_date', '-start_date')
+    )
+    for start_date, end_date, _ in ranges[:top_ranges]:
+        cities = targets.setdefault((start_date.isoformat(), end_date.isoformat()), [])
+        requested = recent.filter(start_date=start_date, end_date=end_date)
+        requested = requested.select_related('city')
+        for precomputed in requested.order_by('-requested_at')[:top_cities]:
+            if precomputed.city not in cities:
+                cities.append(precomputed.city)
+    return targets
+
+
+def warm_reports(targets):
+    options = ForecastOptions()
+    warmed, failed = 0, 0
+    for (start_date, end_date), cities in targets.items():
+        for i in range(0, len(cities), settings.WEATHER_BATCH_MAX_CITIES):
+            batch = cities[i:i + settings.WEATHER_BATCH_MAX_CITIES]
+            try:
+                reports = list(stream_weather_reports(batch, start_date, end_date,
+                                                      options))
+            except requests.exceptions.RequestException:
+                failed += len(batch)
+                continue
+
+            for city, report in reports:
+                if 'error' in report:
+                    failed += 1
+                    continue
+                store_report(city, start_date, end_date, options, report)
+                warmed += 1
+    return warmed, failed
@@ -0,0 +1,253 @@
+import asyncio
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+from datetime import datetime, timedelta
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from dateutil.relativedelta import relativedelta
+
+from .backtesting import accuracy_by_model
+from .executor import ForecastQueueFull
+from .forecasting import MIN_RESAMPLED_HOURS
+from .instrumentation import span
+from .metrics import errors_by_model
+from .model_cache import acached_forecasts, cached_forecasts, submit_forecasts
+from .observations import (
+    async_sync_observations, sync_observations, sync_observations_many,
+)
+from .open_meteo import (
+    HOURLY_VARIABLES, afetch_forecast, fetch_forecast, fetch_forecast_many,
+)
+from .series_store import SECONDS_PER_HOUR, load_series
+from .statistics import key_indicators
+from .utils import generate_sentence
+
+
+class NoObservationsError(Exception):
+    pass
+
+
+class TrainingWindowTooShort(Exception):
+    pass
+
+
+def default_engines():
+    return list(settings.FORECAST_DEFAULT_ENGINES)
+
+
+class ForecastOptions:
+    def __init__(self, engines=None, train_days=None, resample=None):
+        self.engines = engines or default_engines()
+        # The training window is independent of the analysis range, a falsy value trains
+        # on the whole range
+        if train_days is None:
+            train_days = settings.FORECAST_TRAIN_DAYS
+        self.train_days = train_days
+        self.resample = resample or settings.FORECAST_RESAMPLE_HOURS
+
+    def key(self):
+        return f'{",".join(self.engines)}:{self.train_days}:{self.resample}'
+
+    def is_default(self):
+        return self.key() == ForecastOptions().key()
+
+
+def default_date_range():
+    now = datetime.now()
+    start = now - relativedelta(years=1)
+    return start.strftime('%Y-%m-%d'), now.strftime('%Y-%m-%d')
+
+
+def observations_frame(series):
+    # pandas is only needed once a report is built,
+    # the city and country endpoints never load it
+    import pandas as pd
+
+    # Values are stored as float32, rounding
+    # brings back the decimals Open-Meteo reported
+    return pd.DataFrame(
+        {
+            'ds': pd.to_datetime(
+                series[0].astype(np.int64) * SECONDS_PER_HOUR, unit='s', utc=True
+            ),
+            **{
+                variable: series[i].astype(np.float64).round(4)
+                for i, variable in enumerate(HOURLY_VARIABLES, start=1)
+            },
+        }
+    )
+
+
+def training_frame(city, start_date, end_date, train_days):
+    series = load_series(city, start_date, end_date)
+    if train_days and series.shape[1]:
+        series = series[:, series[0] > series[0, -1] - train_days * 24]
+    return observations_frame(series)
+
+
+def check_training_window(df, options):
+    if df.empty:
+        raise NoObservationsError('No observations available for the requested period')
+    if options.resample > 1 and len(df) < MIN_RESAMPLED_HOURS:
+        raise TrainingWindowTooShort(f'resample={options.resample} needs at least '
+                                     f'{MIN_RESAMPLED_HOURS} hours of observations in '
+                                     f'the training window, there are {len(df)}')
+
+
+def live_accuracy(forecasts, real_weather_data):
+    # Compares against the last day of Open-Meteo's own forecast, only used until the
+    # city has been backtested
+    real_temperature = real_weather_data['hourly']['temperature_2m'][-24:]
+    return errors_by_model(list(forecasts), list(forecasts.values()), real_temperature)
+
+
+def build_weather_report(forecasts, indicators, accuracy, accuracy_source):
+    tomorrow = datetime.combine((datetime.now() + relativedelta(days=1)).date(),
+                                datetime.min.time())
+    forecast_times = [(tomorrow + timedelta(hours=i)).strftime('%Y-%m-%d %H:%M:%S')
+                      for i in range(24)]
+
+    response_data = {
+        'forecast_data': {
+            'time': {engine: forecast_times for engine in forecasts},
+            'temperature_2m': {engine: list(forecast)
+                               for engine, forecast in forecasts.items()},
+        }
+    }
+
+    response_data['key_indicators'] = indicators
+
+    sentence = generate_sentence(response_data['key_indicators'])
+    response_data['sentence'] = sentence
+
+    response_data.update(accuracy)
+    response_data['accuracy_source'] = accuracy_source
+
+    return response_data
+
+
+def weather_report(city, start_date, end_date, options=None):
+    options = options or ForecastOptions()
+    with span('sync_observations'):
+        sync_observations(city, start_date, end_date)
+    with span('training_frame'):
+        df = training_frame(city, start_date, end_date, options.train_days)
+    check_training_window(df, options)
+
+    with span('forecasts'):
+        forecasts = cached_forecasts(city, options.engines, df['ds'].tolist(),
+                                     df['temperature_2m'].to_numpy(),
+                                     resample=options.resample)
+    indicators = key_indicators(city, start_date, end_date)
+
+    accuracy = accuracy_by_model(city, options)
+    if accuracy is not None:
+        return build_weather_report(forecasts, indicators, accuracy, 'backtest')
+    accuracy = live_accuracy(forecasts, fetch_forecast(city.lat, city.lng))
+    return build_weather_report(forecasts, indicators, accuracy, 'live')
+
+
+async def aweather_report(city, start_date, end_date, options=None):
+    options = options or ForecastOptions()
+    accuracy = await sync_to_async(accuracy_by_model)(city, options)
+    with span('sync_observations'):
+        if accuracy is None:
+            _, real_weather_data = await asyncio.gather(
+                async_sync_observations(city, start_date, end_date),
+                afetch_forecast(city.lat, city.lng),
+            )
+        else:
+            await async_sync_observations(city, start_date, end_date)
+
+    with span('training_frame'):
+        df = await sync_to_async(training_frame)(city, start_date, end_date,
+                                                 options.train_days)
+    check_training_window(df, options)
+
+    with span('forecasts'):
+        forecasts = await acached_forecasts(city, options.engines, df['ds'].tolist(),
+                                            df['temperature_2m'].to_numpy(),
+                                            resample=options.resample)
+    indicators = await sync_to_async(key_indicators)(city, start_date, end_date)
+
+    if accuracy is not None:
+        return build_weather_report(forecasts, indicators, accuracy, 'backtest')
+    live = live_accuracy(forecasts, real_weather_data)
+    return build_weather_report(forecasts, indicators, live, 'live')
+
+
+def stream_weather_reports(cities, start_date, end_date, options=None):
+    options = options or ForecastOptions()
+    sync_observations_many(cities, start_date, end_date)
+    accuracy = {city: accuracy_by_model(city, options) for city in cities}
+    live_cities = [city for city in cities if accuracy[city] is None]
+    real_weather_data = []
+    if live_cities:
+        coordinates = [(city.lat, city.lng) for city in live_cities]
+        real_weather_data = fetch_forecast_many(coordinates)
+    return _iter_weather_reports(cities, start_date, end_date, options, accuracy,
+                                 dict(zip(live_cities, real_weather_data)))
+
+
+def _iter_weather_reports(cities, start_date, end_date, options, accuracy,
+                          real_weather_data):
+    queue = deque(cities)
+    pending = {}
+    while queue or pending:
+        # Keep as many cities fitting as the forecast queue accepts, then report them as
+        # they finish
+        while queue:
+            city = queue[0]
+            df = training_frame(city, start_date, end_date, options.train_days)
+            try:
+                check_training_window(df, options)
+            except (NoObservationsError, TrainingWindowTooShort) as e:
+                queue.popleft()
+                yield city, {'error': str(e)}
+                continue
+            times, values = df['ds'].tolist(), df['temperature_2m'].to_numpy()
+            try:
+                pending[city] = submit_forecasts(city, options.engines, times, values,
+                                                 resample=options.resample)
+            except ForecastQueueFull as e:
+                if pending:
+                    break
+                queue.popleft()
+                yield city, {'error': str(e)}
+                continue
+            queue.popleft()
+
+        futures = [
+            future
+            for forecasts in pending.values()
+            for future in forecasts.futures.values()
+        ]
+        timeout = settings.FORECAST_TIMEOUT
+        done, _ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+        if futures and not done:
+            error = f'Forecast fitting took longer than {timeout} seconds'
+            for city, forecasts in pending.items():
+                forecasts.cancel()
+                yield city, {'error': error}
+            pending.clear()
+            continue
+
+        for city, forecasts in list(pending.items()):
+            if not forecasts.done():
+                continue
+            del pending[city]
+            try:
+                city_forecasts = forecasts.result()
+                indicators = key_indicators(city, start_date, end_date)
+                if accuracy[city] is not None:
+                    city_accuracy, source = accuracy[city], 'backtest'
+                else:
+                    city_accuracy = live_accuracy(city_forecasts,
+                                                  real_weather_data[city])
+                    source = 'live'
+                yield city, build_weather_report(city_forecasts, indicators,
+                                                 city_accuracy, source)
+            except Exception as e:
+                yield city, {'error': str(e)}
@@ -0,0 +1,87 @@
+import heapq
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from functools import lru_cache
+
+from django.conf import settings
+
+from .models import City
+
+
+def normalize(text):
+    decomposed = unicodedata.normalize('NFKD', text)
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(stripped.casefold().split())
+
+
+def _search_keys(*names):
+    keys = set()
+    for name in names:
+        words = normalize(name).split(' ')
+        for i in range(len(words)):
+            keys.add(' '.join(words[i:]))
+    keys.discard('')
+    return keys
+
+
+class CitySearchIndex:
+    def __init__(self, cities):
+        # cities are (city, city_ascii, lat, lng, population) tuples
+        self.cities = [
+            {'city': city, 'lat': lat, 'lng': lng} for city, _, lat, lng, _ in cities
+        ]
+        entries = sorted(
+            (key, -(population or 0), position)
+            for position, (city, city_ascii, _, _, population) in enumerate(cities)
+            for key in _search_keys(city, city_ascii)
+        )
+        self.keys = [key for key, _, _ in entries]
+        self.ranked = [(rank, position) for _, rank, position in entries]
+        self.search = lru_cache(maxsize=4096)(self._search)
+
+    def _search(self, query, limit):
+        query = normalize(query)
+        if not query:
+            return []
+
+        start = bisect_left(self.keys, query)
+        end = bisect_left(self.keys, query + '\U0010ffff', lo=start)
+        # A city can match through several of its words, so take a few extra candidates
+        # before deduplicating
+        candidates = heapq.nsmallest(limit * 2, self.ranked[start:end])
+        if (
+            len(candidates) < end - start
+            and len({position for _, position in candidates}) < limit
+        ):
+            candidates = sorted(self.ranked[start:end])
+
+        positions = list(dict.fromkeys(position for _, position in candidates))[:limit]
+        return [self.cities[position] for position in positions]
+
+
+_index = None
+_built_at = 0
+_lock = threading.Lock()
+
+
+def get_city_index():
+    global _index, _built_at
+    if _index is None or time.monotonic() - _built_at > settings.CITY_SEARCH_INDEX_TTL:
+        with _lock:
+            if (
+                _index is None
+                or time.monotonic() - _built_at > settings.CITY_SEARCH_INDEX_TTL
+            ):
+                cities = City.objects.values_list(
+                    'city', 'city_ascii', 'lat', 'lng', 'population'
+                )
+                _index = CitySearchIndex(list(cities))
+                _built_at = time.monotonic()
+    return _index
+
+
+def invalidate_city_index(**kwargs):
+    global _index
+    _index = None
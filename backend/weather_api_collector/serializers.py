@@ -18,3 +18,11 @@ class CountrySerializer(serializers.ModelSerializer):
     class Meta:
         model = City
         fields = ['country']
+
+
+class NearbyCitySerializer(serializers.Serializer):
+    city = serializers.CharField()
+    country = serializers.CharField()
+    lat = serializers.FloatField()
+    lng = serializers.FloatField()
+    distance_km = serializers.FloatField()
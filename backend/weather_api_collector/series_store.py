@@ -0,0 +1,130 @@
+import glob
+import os
+import tempfile
+import threading
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from time import monotonic
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max
+
+from .models import Observation
+from .open_meteo import HOURLY_VARIABLES
+
+SECONDS_PER_HOUR = 3600
+
+_stamps = {}
+_stamps_lock = threading.Lock()
+
+
+def _hours_since_epoch(day):
+    midnight = datetime.combine(day, time.min, tzinfo=dt_timezone.utc)
+    return int(midnight.timestamp()) // SECONDS_PER_HOUR
+
+
+def _stamp(city):
+    # Any upsert bumps the row count or the latest fetched_at,
+    # so the stamp names one exact version of the history
+    stats = Observation.objects.filter(city=city).aggregate(
+        count=Count('id'), fetched_at=Max('fetched_at')
+    )
+    if not stats['count']:
+        return None
+    return f"{stats['count']}-{int(stats['fetched_at'].timestamp() * 1_000_000)}"
+
+
+def _series_path(city, stamp):
+    return os.path.join(settings.WEATHER_SERIES_DIR, f'{city.pk}.{stamp}.npy')
+
+
+def _current_stamp(city):
+    # The stamp costs an aggregate query, so it is reused until
+    # it expires, upsert_observations invalidates it or its file
+    # disappears because another process stored a newer version
+    with _stamps_lock:
+        cached = _stamps.get(city.pk)
+    if cached is not None:
+        stamp, checked_at = cached
+        fresh = monotonic() - checked_at <= settings.WEATHER_SERIES_STAMP_TTL
+        if fresh and os.path.exists(_series_path(city, stamp)):
+            return stamp
+
+    stamp = _stamp(city)
+    if stamp is not None:
+        with _stamps_lock:
+            _stamps[city.pk] = (stamp, monotonic())
+    return stamp
+
+
+def _series_files(city_pk):
+    return glob.glob(os.path.join(settings.WEATHER_SERIES_DIR, f'{city_pk}.*.npy'))
+
+
+def _remove_series(city_pk):
+    for path in _series_files(city_pk):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def invalidate_series(city):
+    # Removing the files tells the other processes
+    # as well, they rebuild on their next load
+    city_pk = city.pk
+    with _stamps_lock:
+        _stamps.pop(city_pk, None)
+    transaction.on_commit(lambda: _remove_series(city_pk))
+
+
+def write_series(city, stamp):
+    rows = list(
+        Observation.objects.filter(city=city)
+        .order_by('time')
+        .values_list('time', *HOURLY_VARIABLES)
+    )
+
+    # One float32 row per column: hours since the epoch, then every hourly variable
+    series = np.empty((len(HOURLY_VARIABLES) + 1, len(rows)), dtype=np.float32)
+    columns = list(zip(*rows))
+    series[0] = [int(moment.timestamp()) // SECONDS_PER_HOUR for moment in columns[0]]
+    for i, values in enumerate(columns[1:], start=1):
+        series[i] = values
+
+    path = _series_path(city, stamp)
+    os.makedirs(settings.WEATHER_SERIES_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=settings.WEATHER_SERIES_DIR, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as file:
+        np.save(file, series)
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, path)
+
+    # Readers that already mapped an older version keep it until they are done with it
+    for old_path in _series_files(city.pk):
+        if old_path != path:
+            try:
+                os.remove(old_path)
+            except FileNotFoundError:
+                pass
+    return path
+
+
+def open_series(city):
+    stamp = _current_stamp(city)
+    if stamp is None:
+        return np.empty((len(HOURLY_VARIABLES) + 1, 0), dtype=np.float32)
+
+    path = _series_path(city, stamp)
+    if not os.path.exists(path):
+        write_series(city, stamp)
+    return np.load(path, mmap_mode='r')
+
+
+def load_series(city, start_date, end_date):
+    series = open_series(city)
+    start = _hours_since_epoch(date.fromisoformat(str(start_date)))
+    end = _hours_since_epoch(date.fromisoformat(str(end_date)) + timedelta(days=1))
+    first, last = np.searchsorted(series[0], [start, end])
+    return series[:, first:last]
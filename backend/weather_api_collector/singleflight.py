@@ -0,0 +1,119 @@
+import asyncio
+import fcntl
+import hashlib
+import os
+import threading
+import weakref
+from contextlib import contextmanager
+
+from django.conf import settings
+
+
+class FileLock:
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _path(self, key):
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest + '.lock')
+
+    def acquire(self, key):
+        os.makedirs(self.directory, exist_ok=True)
+        fd = os.open(self._path(key), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        except BaseException:
+            os.close(fd)
+            raise
+        return fd
+
+    def release(self, fd):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+def get_lock_backend():
+    if settings.SINGLE_FLIGHT_LOCK_DIR:
+        return FileLock(settings.SINGLE_FLIGHT_LOCK_DIR)
+    return None
+
+
+@contextmanager
+def _shared_lock(key):
+    backend = get_lock_backend()
+    if backend is None:
+        yield
+        return
+    handle = backend.acquire(key)
+    try:
+        yield
+    finally:
+        backend.release(handle)
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._async_calls = weakref.WeakKeyDictionary()
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            # Other workers wait here and then find the leader's results in the
+            # observation and model caches
+            with _shared_lock(key):
+                call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
+
+    async def ado(self, key, fn, *args, **kwargs):
+        calls = self._async_calls.setdefault(asyncio.get_running_loop(), {})
+        task = calls.get(key)
+        if task is None:
+            task = calls[key] = asyncio.ensure_future(
+                self._alead(key, fn, *args, **kwargs)
+            )
+            task.add_done_callback(lambda t: calls.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _alead(self, key, fn, *args, **kwargs):
+        backend = get_lock_backend()
+        if backend is None:
+            return await fn(*args, **kwargs)
+        handle = await asyncio.to_thread(backend.acquire, key)
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            backend.release(handle)
+
+
+weather_reports = SingleFlight()
+
+
+def weather_report_key(city, start_date, end_date, options):
+    return f'weather-data:{city.pk}:{start_date}:{end_date}:{options.key()}'
@@ -0,0 +1,95 @@
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+
+from .models import City
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def _unit_vectors(lat, lng):
+    lat = np.radians(np.asarray(lat, dtype=float))
+    lng = np.radians(np.asarray(lng, dtype=float))
+    return np.column_stack(
+        [np.cos(lat) * np.cos(lng), np.cos(lat) * np.sin(lng), np.sin(lat)]
+    )
+
+
+def _chord_to_km(chord):
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2, 0, 1))
+
+
+def _km_to_chord(km):
+    return 2 * np.sin(min(km / EARTH_RADIUS_KM, np.pi) / 2)
+
+
+class CitySpatialIndex:
+    def __init__(self, cities):
+        # cities are (city, country, lat, lng) tuples, distances are measured on a
+        # sphere through 3-D chord lengths
+        from scipy.spatial import cKDTree
+
+        self.cities = [
+            {'city': city, 'country': country, 'lat': lat, 'lng': lng}
+            for city, country, lat, lng in cities
+        ]
+        points = _unit_vectors(
+            [c['lat'] for c in self.cities], [c['lng'] for c in self.cities]
+        )
+        self.tree = cKDTree(points if len(points) else np.empty((0, 3)))
+
+    def _results(self, chords, positions):
+        return [
+            {
+                **self.cities[position],
+                'distance_km': round(float(_chord_to_km(chord)), 3),
+            }
+            for chord, position in zip(chords, positions)
+        ]
+
+    def nearest(self, lat, lng, k):
+        k = min(k, len(self.cities))
+        if k == 0:
+            return []
+        chords, positions = self.tree.query(_unit_vectors([lat], [lng])[0], k=k)
+        return self._results(np.atleast_1d(chords), np.atleast_1d(positions))
+
+    def within_radius(self, lat, lng, radius_km, limit):
+        # A bounded k query, a wide radius never collects every city in it
+        limit = min(limit, len(self.cities))
+        if limit == 0:
+            return []
+        point = _unit_vectors([lat], [lng])[0]
+        chords, positions = self.tree.query(
+            point, k=limit, distance_upper_bound=_km_to_chord(radius_km)
+        )
+        chords, positions = np.atleast_1d(chords), np.atleast_1d(positions)
+        found = np.isfinite(chords)
+        return self._results(chords[found], positions[found])
+
+
+_index = None
+_built_at = 0
+_lock = threading.Lock()
+
+
+def get_spatial_index():
+    global _index, _built_at
+    if _index is None or time.monotonic() - _built_at > settings.CITY_SEARCH_INDEX_TTL:
+        with _lock:
+            if (
+                _index is None
+                or time.monotonic() - _built_at > settings.CITY_SEARCH_INDEX_TTL
+            ):
+                _index = CitySpatialIndex(
+                    list(City.objects.values_list('city', 'country', 'lat', 'lng'))
+                )
+                _built_at = time.monotonic()
+    return _index
+
+
+def invalidate_spatial_index(**kwargs):
+    global _index
+    _index = None
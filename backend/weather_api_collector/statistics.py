@@ -0,0 +1,205 @@
+import math
+from datetime import date, timedelta
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Q
+
+from .instrumentation import timed
+from .models import Observation, ObservationSummary
+from .open_meteo import HOURLY_VARIABLES
+
+SKETCH_COMPRESSION = 200
+QUANTILES = (('25%', 0.25), ('50%', 0.5), ('75%', 0.75))
+DAY = 'day'
+MONTH = 'month'
+
+
+def _compress(means, weights, compression=SKETCH_COMPRESSION):
+    order = np.argsort(means, kind='stable')
+    means, weights = means[order], weights[order]
+    q = (np.cumsum(weights) - weights / 2) / weights.sum()
+    # Arcsine scale like t-digest's k1 function: centroids stay small in the tails and
+    # grow towards the median
+    buckets = np.floor(compression / (2 * np.pi) * np.arcsin(2 * q - 1))
+    _, groups = np.unique(buckets, return_inverse=True)
+    merged_weights = np.bincount(groups, weights)
+    return np.bincount(groups, weights * means) / merged_weights, merged_weights
+
+
+class RunningStats:
+    # Count, mean and variance are combined with the parallel form of Welford's
+    # algorithm and percentiles come from a merging centroid sketch, so stats of any
+    # two periods can be merged
+    def __init__(self, count=0, mean=0.0, m2=0.0, min=math.inf, max=-math.inf,
+                 means=(), weights=()):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+        self.min = min
+        self.max = max
+        self.means = np.asarray(means, dtype=np.float64)
+        self.weights = np.asarray(weights, dtype=np.float64)
+
+    @classmethod
+    def from_values(cls, values):
+        stats = cls()
+        stats.update(values)
+        return stats
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'm2': self.m2,
+            'min': self.min,
+            'max': self.max,
+            'means': self.means.tolist(),
+            'weights': self.weights.tolist(),
+        }
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if not values.size:
+            return
+        mean = values.mean()
+        m2 = ((values - mean) ** 2).sum()
+        self._combine(values.size, float(mean), float(m2), float(values.min()),
+                      float(values.max()), values, np.ones(values.size))
+
+    def merge(self, other):
+        if other.count:
+            self._combine(other.count, other.mean, other.m2, other.min, other.max,
+                          other.means, other.weights)
+
+    def _combine(self, count, mean, m2, minimum, maximum, means, weights):
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta ** 2 * self.count * count / total
+        self.count = total
+        self.min = min(self.min, minimum)
+        self.max = max(self.max, maximum)
+        self.means, self.weights = _compress(np.concatenate([self.means, means]),
+                                             np.concatenate([self.weights, weights]))
+
+    def quantile(self, q):
+        if not self.count:
+            return math.nan
+        # Same linear interpolation between order statistics as pandas, exact while
+        # centroids hold single values
+        positions = np.cumsum(self.weights) - self.weights / 2
+        return float(np.interp(q * (self.count - 1) + 0.5,
+                               np.concatenate([[0], positions, [self.count]]),
+                               np.concatenate([[self.min], self.means, [self.max]])))
+
+    def describe(self):
+        if not self.count:
+            return {key: (0.0 if key == 'count' else math.nan)
+                    for key in ('count', 'mean', 'std', 'min', *dict(QUANTILES), 'max')}
+        std = math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else math.nan
+        return {
+            'count': float(self.count),
+            'mean': self.mean,
+            'std': std,
+            'min': self.min,
+            **{key: self.quantile(q) for key, q in QUANTILES},
+            'max': self.max,
+        }
+
+
+def _month_start(day):
+    return day.replace(day=1)
+
+
+def _month_end(day):
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+
+
+def refresh_summaries(city_id, days, observation_model=Observation,
+                      summary_model=ObservationSummary):
+    days = sorted(set(days))
+    if not days:
+        return
+
+    rows = list(observation_model.objects.filter(
+        city_id=city_id, time__date__range=(days[0], days[-1])
+    ).values_list('time', *HOURLY_VARIABLES))
+    if not rows:
+        return
+    times, *values = zip(*rows)
+    row_days = np.array([time.date() for time in times], dtype='datetime64[D]')
+    values = np.array(values, dtype=np.float64)
+
+    summaries = []
+    for day in days:
+        in_day = row_days == np.datetime64(day)
+        if not in_day.any():
+            continue
+        stats = {variable: RunningStats.from_values(values[i, in_day]).to_dict()
+                 for i, variable in enumerate(HOURLY_VARIABLES)}
+        summaries.append(
+            summary_model(city_id=city_id, period=DAY, start=day, stats=stats)
+        )
+
+    upsert = {
+        'update_conflicts': True,
+        'unique_fields': ['city', 'period', 'start'],
+        'update_fields': ['stats'],
+    }
+
+    with transaction.atomic():
+        summary_model.objects.bulk_create(summaries, **upsert)
+
+        # Month rows are rebuilt from their day rows so whole months can be read back as
+        # a single row
+        month_starts = sorted({_month_start(day) for day in days})
+        day_rows = summary_model.objects.filter(
+            city_id=city_id, period=DAY,
+            start__range=(month_starts[0], _month_end(month_starts[-1])),
+        ).values_list('start', 'stats')
+        months = {}
+        for day, stats in day_rows:
+            if _month_start(day) in month_starts:
+                merged = months.setdefault(
+                    _month_start(day),
+                    {variable: RunningStats() for variable in HOURLY_VARIABLES},
+                )
+                for variable in HOURLY_VARIABLES:
+                    merged[variable].merge(RunningStats.from_dict(stats[variable]))
+        summary_model.objects.bulk_create([
+            summary_model(city_id=city_id, period=MONTH, start=month, stats={
+                variable: stats.to_dict() for variable, stats in merged.items()
+            })
+            for month, merged in months.items()
+        ], **upsert)
+
+
+@timed('key_indicators')
+def key_indicators(city, start_date, end_date):
+    start_date = date.fromisoformat(str(start_date))
+    end_date = date.fromisoformat(str(end_date))
+
+    # Whole months inside the range come from month rows, the ragged edges from day rows
+    one_day = timedelta(days=1)
+    first_month = (start_date if start_date.day == 1
+                   else _month_end(start_date) + one_day)
+    last_month_end = (end_date if end_date == _month_end(end_date)
+                      else _month_start(end_date) - one_day)
+    if first_month <= last_month_end:
+        periods = (Q(period=MONTH, start__range=(first_month, last_month_end))
+                   | Q(period=DAY, start__range=(start_date, first_month - one_day))
+                   | Q(period=DAY, start__range=(last_month_end + one_day, end_date)))
+    else:
+        periods = Q(period=DAY, start__range=(start_date, end_date))
+
+    merged = {variable: RunningStats() for variable in HOURLY_VARIABLES}
+    summaries = ObservationSummary.objects.filter(periods, city=city)
+    for stats in summaries.values_list('stats', flat=True):
+        for variable in HOURLY_VARIABLES:
+            merged[variable].merge(RunningStats.from_dict(stats[variable]))
+    return {variable: stats.describe() for variable, stats in merged.items()}
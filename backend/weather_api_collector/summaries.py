@@ -0,0 +1,85 @@
+import hashlib
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count, Max, Min, Sum
+
+from .models import City, CountrySummary
+
+
+def rebuild_country_summaries(city_model=City, summary_model=CountrySummary):
+    rows = city_model.objects.values('country').annotate(
+        iso2=Max('iso2'),
+        iso3=Max('iso3'),
+        city_count=Count('id'),
+        population_total=Sum('population'),
+        centroid_lat=Avg('lat'),
+        centroid_lng=Avg('lng'),
+        min_lat=Min('lat'),
+        max_lat=Max('lat'),
+        min_lng=Min('lng'),
+        max_lng=Max('lng'),
+    ).order_by()
+
+    with transaction.atomic():
+        summary_model.objects.all().delete()
+        summary_model.objects.bulk_create([summary_model(**row) for row in rows])
+    invalidate_country_summaries()
+
+
+def _etag(data):
+    canonical = json.dumps(data, sort_keys=True)
+    return '"%s"' % hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:32]
+
+
+class CountrySummaryCache:
+    def __init__(self, summaries):
+        self.countries = [{'country': summary.country} for summary in summaries]
+        self.countries_etag = _etag(self.countries)
+        self.averages = {}
+        # Approximate city counts for the paginated city lists, refreshed with the
+        # summaries
+        self.city_counts = {summary.country: summary.city_count
+                            for summary in summaries}
+        self.total_cities = sum(self.city_counts.values())
+        for summary in summaries:
+            average = {
+                'average_lat': summary.centroid_lat,
+                'average_lng': summary.centroid_lng,
+            }
+            self.averages[summary.country] = average, _etag(average)
+
+    def average(self, country):
+        empty = {'average_lat': None, 'average_lng': None}
+        return self.averages.get(country, (empty, _etag(empty)))
+
+
+_cache = None
+_built_at = 0
+_lock = threading.Lock()
+
+
+def get_country_summaries():
+    global _cache, _built_at
+    if (
+        _cache is None
+        or time.monotonic() - _built_at > settings.COUNTRY_SUMMARY_CACHE_TTL
+    ):
+        with _lock:
+            if (
+                _cache is None
+                or time.monotonic() - _built_at > settings.COUNTRY_SUMMARY_CACHE_TTL
+            ):
+                _cache = CountrySummaryCache(
+                    list(CountrySummary.objects.order_by('country'))
+                )
+                _built_at = time.monotonic()
+    return _cache
+
+
+def invalidate_country_summaries():
+    global _cache
+    _cache = None
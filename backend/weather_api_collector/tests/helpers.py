@@ -0,0 +1,58 @@
+import math
+import tempfile
+from datetime import date, datetime, timedelta
+from unittest import mock
+
+from django.test import override_settings
+
+
+def make_archive_payload(start_date, end_date, lat=50.45, lng=30.52):
+    start = datetime.combine(date.fromisoformat(str(start_date)), datetime.min.time())
+    hours = ((date.fromisoformat(str(end_date)) - start.date()).days + 1) * 24
+    times = [start + timedelta(hours=i) for i in range(hours)]
+    return {
+        'latitude': lat,
+        'longitude': lng,
+        'hourly': {
+            'time': [t.strftime('%Y-%m-%dT%H:%M') for t in times],
+            'temperature_2m': [
+                round(10 + 5 * math.sin(2 * math.pi * t.hour / 24), 1) for t in times
+            ],
+            'relative_humidity_2m': [60 + (t.hour % 12) for t in times],
+            'wind_speed_10m': [round(4 + (t.hour % 5) * 0.5, 1) for t in times],
+        },
+    }
+
+
+def fake_get(url, params=None, **kwargs):
+    # Stands in for the Open-Meteo session, batched coordinates get one payload each
+    if 'start_date' in params:
+        start_date, end_date = params['start_date'], params['end_date']
+    else:
+        start_date, end_date = date.today(), date.today() + timedelta(days=6)
+    payloads = [make_archive_payload(start_date, end_date, lat=float(lat))
+                for lat in str(params['latitude']).split(',')]
+
+    response = mock.Mock()
+    response.json.return_value = payloads if len(payloads) > 1 else payloads[0]
+    return response
+
+
+async def fake_afetch_archive(lat, lng, start_date, end_date, *args, **kwargs):
+    return make_archive_payload(start_date, end_date)
+
+
+async def fake_afetch_forecast(lat, lng):
+    return make_archive_payload(date.today(), date.today() + timedelta(days=6))
+
+
+class TemporarySeriesDirMixin:
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.series_dir = directory.name
+
+        series_settings = override_settings(WEATHER_SERIES_DIR=directory.name)
+        series_settings.enable()
+        self.addCleanup(series_settings.disable)
@@ -0,0 +1,117 @@
+from datetime import datetime, timezone as dt_timezone
+from io import StringIO
+from unittest import mock
+
+import numpy as np
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from weather_api_collector.backtesting import (
+    accuracy_by_model, prepare_backtest, rolling_origins, run_backtests,
+)
+from weather_api_collector.forecasting import ENGINES, backtest
+from weather_api_collector.models import AccuracySummary, City
+from weather_api_collector.observations import upsert_observations
+from weather_api_collector.reports import ForecastOptions, weather_report
+from weather_api_collector.tests.helpers import (
+    TemporarySeriesDirMixin, make_archive_payload,
+)
+
+
+@override_settings(FORECAST_WORKERS=0)
+class BacktestTest(TemporarySeriesDirMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.city = City.objects.create(
+            city="Testville",
+            lat=52,
+            lng=31,
+            country="Testland",
+            population=100000
+        )
+        payload = make_archive_payload('2023-01-01', '2023-01-20')
+        upsert_observations(self.city, payload['hourly'])
+
+    def test_rolling_origins_leave_room_for_training_and_horizon(self):
+        times = 1000 + np.arange(24 * 20)
+        self.assertEqual(rolling_origins(times, 3, 24, 24 * 7),
+                         [24 * 16, 24 * 17, 24 * 18, 24 * 19])
+        self.assertEqual(rolling_origins(times[:24 * 5], 3, 24, 24 * 7), [])
+
+    def test_rolling_origins_follow_timestamps_across_gaps(self):
+        # Day 18 is missing: its origin has no full
+        # horizon left, the others keep their hours
+        times = np.delete(1000 + np.arange(24 * 20), np.s_[24 * 17:24 * 18])
+        origins = rolling_origins(times, 3, 24, 24 * 7)
+
+        self.assertEqual([times[origin] - 1000 for origin in origins],
+                         [24 * 16, 24 * 18, 24 * 19])
+
+    @mock.patch('weather_api_collector.forecasting.fit_forecast',
+                return_value=({'a': 1}, [0.0] * 24))
+    def test_parameters_are_re_estimated_like_the_model_cache(self, mock_fit):
+        job = prepare_backtest(self.city, days=2, step_hours=12, train_days=7)
+        refits = job.refits(24)
+        self.assertEqual(refits, [True, False, False, True, False])
+
+        backtest('arima', job.values, job.windows, refits)
+        params = [call.args[3] for call in mock_fit.call_args_list]
+        self.assertEqual(params, [None, {'a': 1}, {'a': 1}, None, {'a': 1}])
+
+    def test_summaries_are_stored_per_engine(self):
+        backtested, failed = run_backtests([self.city], ['seasonal_naive', 'harmonic'],
+                                           days=5, step_hours=24, train_days=7,
+                                           workers=0)
+
+        self.assertEqual((backtested, failed), (1, 0))
+        summary = AccuracySummary.objects.get(city=self.city, engine='seasonal_naive')
+        self.assertEqual(summary.origins, 6)
+        self.assertAlmostEqual(summary.mae, 0, places=4)
+        self.assertEqual(summary.evaluated_to,
+                         datetime(2023, 1, 20, 23, tzinfo=dt_timezone.utc))
+        harmonic = AccuracySummary.objects.filter(city=self.city, engine='harmonic')
+        self.assertTrue(harmonic.exists())
+        self.assertEqual((summary.train_days, summary.resample), (7, 1))
+
+    def test_failed_backtests_are_logged_and_counted(self):
+        out = StringIO()
+        broken = {**ENGINES, 'harmonic': None}
+        with mock.patch('weather_api_collector.forecasting.ENGINES', broken), \
+                self.assertLogs('weather_api_collector.backtesting', 'ERROR') as logs:
+            call_command('backtest_forecasts', '--no-sync', '--cities', 'Testville',
+                         '--engines', 'seasonal_naive,harmonic', '--days', '5',
+                         '--train-days', '7', '--workers', '0', stdout=out)
+
+        self.assertIn('Backtested 1 of 1 cities', out.getvalue())
+        self.assertIn('1 backtests failed', out.getvalue())
+        self.assertIn('Backtesting harmonic for Testville failed', logs.output[0])
+        engines = AccuracySummary.objects.values_list('engine', flat=True)
+        self.assertEqual(list(engines), ['seasonal_naive'])
+
+    def test_backtests_run_on_worker_processes(self):
+        run_backtests([self.city], ['seasonal_naive', 'damped_trend'], days=2,
+                      train_days=7, workers=2)
+        self.assertEqual(AccuracySummary.objects.filter(city=self.city).count(), 2)
+
+    @mock.patch('weather_api_collector.reports.fetch_forecast')
+    def test_reports_use_backtested_accuracy(self, mock_fetch_forecast):
+        out = StringIO()
+        call_command('backtest_forecasts', '--no-sync', '--cities', 'Testville',
+                     '--engines', 'seasonal_naive', '--days', '5', '--train-days', '7',
+                     '--workers', '0', stdout=out)
+        self.assertIn('Backtested 1 of 1 cities', out.getvalue())
+
+        options = ForecastOptions(['seasonal_naive'], train_days=7)
+        report = weather_report(self.city, '2023-01-01', '2023-01-20', options)
+
+        mock_fetch_forecast.assert_not_called()
+        self.assertEqual(report['accuracy_source'], 'backtest')
+        self.assertAlmostEqual(report['mae']['seasonal_naive'], 0, places=4)
+
+    def test_other_training_options_are_not_served_backtested_accuracy(self):
+        run_backtests([self.city], ['seasonal_naive'], days=5, train_days=7, workers=0)
+
+        engines = ['seasonal_naive']
+        self.assertIsNone(accuracy_by_model(self.city, ForecastOptions(engines, 14)))
+        self.assertIsNone(accuracy_by_model(self.city, ForecastOptions(engines, 7, 3)))
+        self.assertIsNotNone(accuracy_by_model(self.city, ForecastOptions(engines, 7)))
@@ -0,0 +1,81 @@
+import json
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from weather_api_collector.models import City, ForecastModelState
+from weather_api_collector.tests.helpers import TemporarySeriesDirMixin, fake_get
+
+
+@override_settings(FORECAST_WORKERS=0)
+class WeatherDataBatchViewTest(TemporarySeriesDirMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        for name, lat in (('Kyiv', 50.45), ('Lviv', 49.84), ('Odesa', 46.48)):
+            City.objects.create(
+                city=name, lat=lat, lng=30, country="Testland", population=lat * 1000
+            )
+
+    def fetch(self, **params):
+        params.update(start_date='2023-01-01', end_date='2023-01-14')
+        with mock.patch('weather_api_collector.open_meteo.get_session') as mock_session:
+            mock_session.return_value.get.side_effect = fake_get
+            response = self.client.get(reverse('weather_historical_data_batch'), params)
+            lines = [
+                json.loads(line)
+                for line in b''.join(response.streaming_content).splitlines()
+            ]
+        return response, lines, mock_session.return_value.get
+
+    def test_batch_by_cities_uses_one_upstream_call_per_api(self):
+        response, lines, mock_get = self.fetch(cities='Kyiv,Lviv,Unknown')
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(sorted(line['city'] for line in lines), ['Kyiv', 'Lviv'])
+        for line in lines:
+            forecasts = line['forecast_data']['temperature_2m']
+            self.assertEqual(len(forecasts['damped_trend']), 24)
+        self.assertEqual(mock_get.call_count, 2)
+
+    def test_batch_by_country(self):
+        _, lines, _ = self.fetch(country="testland")
+        self.assertEqual(len(lines), 3)
+
+    def test_models_can_be_chosen_per_request(self):
+        _, lines, _ = self.fetch(cities='Kyiv', models='seasonal_naive,harmonic')
+        forecasts = lines[0]['forecast_data']['temperature_2m']
+        self.assertEqual(list(forecasts), ['seasonal_naive', 'harmonic'])
+        self.assertEqual(list(lines[0]['rmse']), ['seasonal_naive', 'harmonic'])
+
+    def test_training_window_is_independent_of_the_range(self):
+        _, lines, _ = self.fetch(cities='Kyiv', models='arima', train_days=2,
+                                 resample=3)
+
+        self.assertEqual(lines[0]['key_indicators']['temperature_2m']['count'], 14 * 24)
+        self.assertEqual(len(lines[0]['forecast_data']['temperature_2m']['arima']), 24)
+        state = ForecastModelState.objects.get()
+        self.assertEqual(state.engine, 'arima/3h')
+        self.assertEqual(state.window_end - state.window_start, timedelta(hours=47))
+
+    def test_invalid_training_options_are_rejected(self):
+        invalid = ({'train_days': 'month'}, {'train_days': 0}, {'resample': 5},
+                   {'resample': 24},
+                   {'train_days': 1, 'resample': 3},
+                   {'start_date': '2023-01-01', 'end_date': '2023-01-01',
+                    'resample': 2})
+        for params in invalid:
+            response = self.client.get(reverse('weather_historical_data_batch'),
+                                       {'cities': 'Kyiv', **params})
+            self.assertEqual(response.status_code, 400)
+
+    def test_unknown_models_are_rejected(self):
+        response = self.client.get(reverse('weather_historical_data_batch'),
+                                   {'cities': 'Kyiv', 'models': 'magic'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('magic', response.json()['error'])
+
+    def test_requires_cities(self):
+        response = self.client.get(reverse('weather_historical_data_batch'))
+        self.assertEqual(response.status_code, 400)
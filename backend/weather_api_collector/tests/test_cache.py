@@ -0,0 +1,66 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from weather_api_collector.cache import get_archive, make_archive_key, set_archive
+from weather_api_collector.models import ArchiveResponse
+from weather_api_collector.open_meteo import HOURLY_VARIABLES, fetch_archive
+from weather_api_collector.tests.helpers import make_archive_payload
+
+
+class ArchiveCacheTest(TestCase):
+    def store(self, start_date, end_date, lat=50.45):
+        key = make_archive_key(lat, 30.52, start_date, end_date, HOURLY_VARIABLES)
+        set_archive(key, lat, 30.52, start_date, end_date, HOURLY_VARIABLES,
+                    make_archive_payload(start_date, end_date))
+        return key
+
+    def test_key_ignores_variable_order(self):
+        self.assertEqual(
+            make_archive_key(1, 2, '2023-01-01', '2023-01-02', ['a', 'b']),
+            make_archive_key(1.0, 2.0, '2023-01-01', '2023-01-02', ['b', 'a']),
+        )
+
+    def test_past_ranges_never_expire(self):
+        key = self.store('2023-01-01', '2023-01-31')
+        self.assertIsNone(ArchiveResponse.objects.get(key=key).expires_at)
+        self.assertEqual(get_archive(key)['hourly']['time'][0], '2023-01-01T00:00')
+
+    def test_recent_ranges_expire(self):
+        today = timezone.now().date()
+        key = self.store(today - timedelta(days=2), today)
+        self.assertIsNotNone(ArchiveResponse.objects.get(key=key).expires_at)
+
+        ArchiveResponse.objects.filter(key=key).update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertIsNone(get_archive(key))
+        self.assertFalse(ArchiveResponse.objects.filter(key=key).exists())
+
+    def test_evicts_least_recently_accessed(self):
+        first = self.store('2023-01-01', '2023-01-31', lat=1)
+        size = ArchiveResponse.objects.get(key=first).size
+        with override_settings(ARCHIVE_CACHE_MAX_BYTES=size * 2):
+            second = self.store('2023-01-01', '2023-01-31', lat=2)
+            get_archive(first)
+            third = self.store('2023-01-01', '2023-01-31', lat=3)
+
+        self.assertEqual(
+            set(ArchiveResponse.objects.values_list('key', flat=True)), {first, third}
+        )
+        self.assertNotEqual(second, third)
+
+    @mock.patch('weather_api_collector.open_meteo.get_session')
+    def test_fetch_archive_skips_network_on_hit(self, mock_session):
+        mock_get = mock_session.return_value.get
+        mock_get.return_value.json.return_value = make_archive_payload(
+            '2023-01-01', '2023-01-02'
+        )
+
+        fetch_archive(50.45, 30.52, '2023-01-01', '2023-01-02')
+        data = fetch_archive(50.45, 30.52, '2023-01-01', '2023-01-02')
+
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(len(data['hourly']['time']), 48)
@@ -0,0 +1,116 @@
+import json
+from unittest import mock, skipUnless
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from weather_api_collector.encoding import compact_report, msgpack, report_etag
+from weather_api_collector.models import City
+from weather_api_collector.tests.helpers import (
+    TemporarySeriesDirMixin, fake_afetch_archive, fake_afetch_forecast, fake_get,
+)
+
+TIMES = ['2024-01-02 00:00:00', '2024-01-02 01:00:00', '2024-01-02 02:00:00']
+REPORT = {
+    'forecast_data': {
+        'time': {'holtwinters': TIMES, 'arima': TIMES},
+        'temperature_2m': {
+            'holtwinters': [1.23456, 2.5, 3.0],
+            'arima': [1.0, 2.0, 3.98765],
+        },
+    },
+    'key_indicators': {'temperature_2m': {'count': 72.0, 'mean': 10.123456}},
+    'sentence': 'Mild.',
+    'rmse': {'holtwinters': 0.123456, 'arima': None},
+}
+
+
+class CompactReportTest(SimpleTestCase):
+    def test_replaces_timestamps_with_start_and_step(self):
+        forecast_data = compact_report(REPORT, decimals=2)['forecast_data']
+
+        self.assertEqual(forecast_data['start'], '2024-01-02T00:00:00')
+        self.assertEqual(forecast_data['step_seconds'], 3600)
+        self.assertNotIn('time', forecast_data)
+        self.assertEqual(forecast_data['temperature_2m'],
+                         {'holtwinters': [1.23, 2.5, 3.0], 'arima': [1.0, 2.0, 3.99]})
+
+    def test_rounds_every_float(self):
+        report = compact_report(REPORT, decimals=2)
+
+        self.assertEqual(report['key_indicators']['temperature_2m']['mean'], 10.12)
+        self.assertEqual(report['rmse'], {'holtwinters': 0.12, 'arima': None})
+        self.assertEqual(report['sentence'], 'Mild.')
+
+    def test_etag_depends_on_the_representation(self):
+        etag = report_etag(REPORT, 'json')
+        self.assertEqual(etag, report_etag(json.loads(json.dumps(REPORT)), 'json'))
+        self.assertNotEqual(etag, report_etag(REPORT, 'msgpack'))
+        self.assertNotEqual(etag, report_etag(compact_report(REPORT), 'json'))
+
+
+@override_settings(FORECAST_WORKERS=0)
+class WeatherReportEncodingTest(TemporarySeriesDirMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        City.objects.create(city="Testville", lat=50.45, lng=30.52, country="Testland",
+                            population=1000)
+        self.url = reverse('weather_historical_data', args=['Testville'])
+        self.params = {'start_date': '2023-01-01', 'end_date': '2023-01-14'}
+
+    def get(self, params=None, **headers):
+        with mock.patch('weather_api_collector.open_meteo.get_session') as mock_session:
+            mock_session.return_value.get.side_effect = fake_get
+            params = {**self.params, **(params or {})}
+            return self.client.get(self.url, params, **headers)
+
+    def test_unchanged_report_is_not_modified(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['ETag'].startswith('"'))
+        self.assertIn('max-age=', response['Cache-Control'])
+
+        not_modified = self.get(HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b'')
+        self.assertEqual(not_modified['ETag'], response['ETag'])
+
+        weak = self.get(HTTP_IF_NONE_MATCH=f'W/{response["ETag"]}')
+        self.assertEqual(weak.status_code, 304)
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH='"stale"').status_code, 200)
+
+    def test_compact_mode_is_smaller(self):
+        full = self.get()
+        compact = self.get({'compact': '1'})
+
+        self.assertLess(len(compact.content), len(full.content) / 2)
+        self.assertNotEqual(compact['ETag'], full['ETag'])
+        data = compact.json()
+        self.assertEqual(data['forecast_data']['step_seconds'], 3600)
+        forecasts = data['forecast_data']['temperature_2m']
+        self.assertEqual(len(forecasts['damped_trend']), 24)
+
+    @skipUnless(msgpack, 'msgpack is not installed')
+    def test_msgpack_is_negotiated_with_accept(self):
+        response = self.get({'compact': '1'}, HTTP_ACCEPT='application/msgpack')
+
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        data = msgpack.unpackb(response.content)
+        self.assertEqual(data['forecast_data']['step_seconds'], 3600)
+        self.assertNotEqual(response['ETag'], self.get({'compact': '1'})['ETag'])
+
+    @mock.patch('weather_api_collector.reports.afetch_forecast',
+                side_effect=fake_afetch_forecast)
+    @mock.patch('weather_api_collector.observations.afetch_archive',
+                side_effect=fake_afetch_archive)
+    async def test_async_view_honors_conditional_requests(self, mock_archive,
+                                                          mock_forecast):
+        url = reverse('weather_historical_data_async', args=['Testville'])
+        params = {**self.params, 'compact': '1'}
+        response = await self.async_client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('start', response.json()['forecast_data'])
+
+        not_modified = await self.async_client.get(
+            url, params, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(not_modified.status_code, 304)
@@ -0,0 +1,46 @@
+import threading
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase, override_settings
+
+from weather_api_collector import executor
+from weather_api_collector.executor import ForecastQueueFull, ForecastTimeout, run_fits
+
+
+@override_settings(FORECAST_WORKERS=2, FORECAST_MAX_PENDING=2, FORECAST_TIMEOUT=60)
+class RunFitsTest(SimpleTestCase):
+    def setUp(self):
+        self.values = 10 + 5 * np.sin(2 * np.pi * np.arange(24 * 14) / 24)
+
+    def tearDown(self):
+        executor.shutdown_executor()
+
+    def test_fits_models_in_parallel_processes(self):
+        results = run_fits({
+            'holtwinters': ('holtwinters', self.values, 24, None),
+            'arima': ('arima', self.values, 24, None),
+        })
+
+        self.assertEqual(set(results), {'holtwinters', 'arima'})
+        self.assertEqual(len(results['arima'][1]), 24)
+
+    def test_rejects_when_queue_is_full(self):
+        executor.get_executor()
+        blocker = threading.BoundedSemaphore(2)
+        blocker.acquire()
+        blocker.acquire()
+        with mock.patch.object(executor, '_slots', blocker):
+            with self.assertRaises(ForecastQueueFull):
+                run_fits({'arima': ('arima', self.values, 24, None)})
+
+    def test_times_out(self):
+        with self.assertRaises(ForecastTimeout):
+            run_fits(
+                {'arima': ('arima', np.tile(self.values, 30), 24, None)}, timeout=0.001
+            )
+
+    @override_settings(FORECAST_WORKERS=0)
+    def test_inline_mode_surfaces_errors(self):
+        with self.assertRaises(KeyError):
+            run_fits({'unknown': ('unknown', self.values, 24, None)})
@@ -0,0 +1,86 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from weather_api_collector.importers import backfill_source_ids, import_cities
+from weather_api_collector.models import City
+
+
+def csv_row(*values):
+    return ','.join(f'"{value}"' for value in values) + '\n'
+
+
+def city_row(city, lat, lng, admin_name, capital, population, source_id):
+    return csv_row(city, city, lat, lng, 'Ukraine', 'UA', 'UKR', admin_name, capital,
+                   population, source_id)
+
+
+HEADER = csv_row('city', 'city_ascii', 'lat', 'lng', 'country', 'iso2', 'iso3',
+                 'admin_name', 'capital', 'population', 'id')
+KYIV = city_row('Kyiv', '50.45', '30.52', 'Kyiv', 'primary', '2952301', '1')
+
+
+class ImportCitiesTest(TestCase):
+    def setUp(self):
+        City.objects.all().delete()
+
+    def write_csv(self, *rows):
+        file = tempfile.NamedTemporaryFile(
+            'w', suffix='.csv', delete=False, encoding='utf-8'
+        )
+        file.write(HEADER + ''.join(rows))
+        file.close()
+        self.addCleanup(os.remove, file.name)
+        return file.name
+
+    def test_bulk_import_in_chunks(self):
+        path = self.write_csv(
+            KYIV,
+            city_row('Lviv', '49.84', '24.03', 'Lviv', 'admin', '', '2'),
+            city_row('Odesa', '46.48', '30.73', 'Odesa', 'admin', '1010537', '3'),
+        )
+        with self.assertNumQueries(4):
+            self.assertEqual(import_cities(City, path, chunk_size=2), (3, 0))
+
+        self.assertEqual(City.objects.get(city='Lviv').population, 0)
+
+    def test_upsert_updates_existing_cities(self):
+        import_cities(City, self.write_csv(KYIV))
+        imported, skipped = import_cities(City, self.write_csv(
+            city_row('Kyiv', '50.45', '30.52', 'Kyiv', 'primary', '3000000', '1'),
+            city_row('Lviv', '49.84', '24.03', 'Lviv', 'admin', '717273', '2'),
+            city_row('Nowhere', '0', '0', '', '', '', ''),
+        ))
+
+        self.assertEqual((imported, skipped), (2, 1))
+        self.assertEqual(City.objects.count(), 2)
+        self.assertEqual(City.objects.get(city='Kyiv').population, 3000000)
+
+    def test_backfill_source_ids(self):
+        City.objects.create(
+            city="Kyiv", lat=50.45, lng=30.52, country="Ukraine", population=1
+        )
+        backfill_source_ids(City, self.write_csv(
+            city_row('Kyiv', '50.45', '30.52', 'Kyiv', 'primary', '2952301',
+                     '1804382913'),
+        ))
+        self.assertEqual(City.objects.get(city='Kyiv').source_id, 1804382913)
+
+    def test_import_cities_command(self):
+        path = self.write_csv(KYIV)
+        call_command('import_cities', path, stdout=StringIO())
+        call_command('import_cities', path, stdout=StringIO())
+        self.assertEqual(City.objects.count(), 1)
+
+    def test_plain_import_refuses_populated_table(self):
+        path = self.write_csv(KYIV)
+        import_cities(City, path, upsert=False)
+
+        with self.assertRaises(ValueError):
+            import_cities(City, path, upsert=False)
+        with self.assertRaises(CommandError):
+            call_command('import_cities', path, '--no-upsert', stdout=StringIO())
+        self.assertEqual(City.objects.count(), 1)
@@ -0,0 +1,133 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from weather_api_collector.instrumentation import Registry, registry, span, timed
+from weather_api_collector.models import City
+from weather_api_collector.tests.helpers import (
+    TemporarySeriesDirMixin, fake_afetch_archive, fake_afetch_forecast, fake_get,
+)
+
+
+class RegistryTest(SimpleTestCase):
+    def test_renders_counters_and_cumulative_histograms(self):
+        metrics = Registry()
+        metrics.inc('requests_total', (('view', 'a"b'),), 2)
+        for seconds in (0.02, 0.5):
+            metrics.observe('duration_seconds', (('stage', 'fit'),), seconds,
+                            buckets=(0.01, 0.1))
+
+        lines = metrics.render().splitlines()
+        self.assertIn('# TYPE requests_total counter', lines)
+        self.assertIn('requests_total{view="a\\"b"} 2', lines)
+        self.assertIn('# TYPE duration_seconds histogram', lines)
+        self.assertIn('duration_seconds_bucket{stage="fit",le="0.01"} 0', lines)
+        self.assertIn('duration_seconds_bucket{stage="fit",le="0.1"} 1', lines)
+        self.assertIn('duration_seconds_bucket{stage="fit",le="+Inf"} 2', lines)
+        self.assertIn('duration_seconds_count{stage="fit"} 2', lines)
+
+    def test_spans_outside_requests_record_nothing(self):
+        registry.clear()
+
+        @timed('decorated')
+        def work():
+            return 1
+
+        with span('outside'):
+            self.assertEqual(work(), 1)
+        self.assertEqual(registry.render(), '\n')
+
+
+# The statsmodels engines are the ones fitted through the executor, which
+# times each fit
+@override_settings(FORECAST_WORKERS=0,
+                   FORECAST_DEFAULT_ENGINES=['holtwinters', 'arima'],
+                   INSTRUMENTATION_SAMPLE_RATE=1, INSTRUMENTATION_SERVER_TIMING=True,
+                   METRICS_ALLOWED_IPS=['127.0.0.1'])
+class InstrumentationMiddlewareTest(TemporarySeriesDirMixin, TestCase):
+    query = {'start_date': '2023-01-01', 'end_date': '2023-01-14'}
+
+    def setUp(self):
+        super().setUp()
+        registry.clear()
+        City.objects.create(city="Testville", lat=50.45, lng=30.52, country="Testland",
+                            population=1000)
+
+    def get_weather_data(self):
+        url = reverse('weather_historical_data', args=['Testville'])
+        with mock.patch('weather_api_collector.open_meteo.get_session') as mock_session:
+            mock_session.return_value.get.side_effect = fake_get
+            return self.client.get(url, self.query)
+
+    def assertMetrics(self, *lines):
+        metrics = self.client.get(reverse('metrics')).content.decode()
+        for line in lines:
+            self.assertIn(f'weather_api_{line}', metrics)
+
+    def test_weather_data_stages_are_timed(self):
+        response = self.get_weather_data()
+        self.assertEqual(response.status_code, 200)
+
+        server_timing = response['Server-Timing']
+        for stage in ('sync_observations', 'open_meteo_archive', 'open_meteo_forecast',
+                      'upsert_observations', 'fit_holtwinters', 'fit_arima',
+                      'key_indicators', 'serialize', 'total'):
+            self.assertIn(f'{stage};dur=', server_timing)
+        self.assertRegex(server_timing, r'db;desc="[1-9]\d* queries"')
+
+        self.assertMetrics(
+            'requests_total{view="weather_historical_data",status="200"} 1',
+            'upstream_duration_seconds_count{endpoint="archive"} 1',
+            'cache_requests_total{cache="precomputed_report",result="miss"} 1',
+            'cache_requests_total{cache="archive",result="miss"} 1',
+            'stage_duration_seconds_count{stage="fit_arima"} 1',
+            'request_db_queries_count{view="weather_historical_data"} 1',
+        )
+
+    def test_repeated_request_hits_the_precomputed_report(self):
+        self.get_weather_data()
+        self.get_weather_data()
+
+        self.assertMetrics(
+            'cache_requests_total{cache="precomputed_report",result="hit"} 1')
+
+    def test_upstream_failures_are_counted(self):
+        with mock.patch('weather_api_collector.open_meteo.get_session') as mock_session:
+            mock_session.return_value.get.side_effect = OSError('unreachable')
+            with self.assertRaises(OSError):
+                self.client.get(reverse('weather_historical_data', args=['Testville']),
+                                self.query)
+
+        self.assertIn('weather_api_upstream_errors_total{endpoint="archive"} 1',
+                      registry.render())
+
+    @mock.patch('weather_api_collector.reports.afetch_forecast',
+                side_effect=fake_afetch_forecast)
+    @mock.patch('weather_api_collector.observations.afetch_archive',
+                side_effect=fake_afetch_archive)
+    async def test_async_view_is_timed(self, mock_archive, mock_forecast):
+        url = reverse('weather_historical_data_async', args=['Testville'])
+        response = await self.async_client.get(url, self.query)
+
+        self.assertEqual(response.status_code, 200)
+        for stage in ('sync_observations', 'training_frame', 'fit_arima',
+                      'key_indicators', 'serialize'):
+            self.assertIn(f'{stage};dur=', response['Server-Timing'])
+        # Queries made from sync_to_async threads still count towards the request
+        self.assertRegex(response['Server-Timing'], r'db;desc="[1-9]\d* queries"')
+
+    @override_settings(INSTRUMENTATION_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_not_recorded(self):
+        response = self.get_weather_data()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(registry.render(), '\n')
+
+    def test_metrics_are_only_served_to_allowed_addresses(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 200)
+        response = self.client.get(reverse('metrics'), REMOTE_ADDR='10.0.0.5')
+        self.assertEqual(response.status_code, 404)
+        with override_settings(METRICS_ALLOWED_IPS=[]):
+            self.assertEqual(self.client.get(reverse('metrics')).status_code, 404)
@@ -0,0 +1,33 @@
+import json
+import subprocess
+import sys
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+HEAVY_MODULES = ('pandas', 'statsmodels', 'scipy')
+
+
+def loaded_modules(code):
+    # A fresh interpreter, this process has long imported everything
+    script = (
+        'import json, os, sys\n'
+        'os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")\n'
+        'import django\n'
+        'django.setup()\n'
+        f'{code}\n'
+        f'print(json.dumps([module for module in {HEAVY_MODULES!r} '
+        'if module in sys.modules]))\n'
+    )
+    result = subprocess.run([sys.executable, '-c', script], cwd=settings.BASE_DIR,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+class LazyImportTest(SimpleTestCase):
+    def test_url_configuration_does_not_load_the_forecasting_stack(self):
+        self.assertEqual(loaded_modules('import config.urls'), [])
+
+    def test_preload_imports_the_engine_dependencies(self):
+        code = 'from weather_api_collector.forecasting import preload\npreload()'
+        self.assertEqual(set(loaded_modules(code)), {'pandas', 'statsmodels', 'scipy'})
@@ -0,0 +1,35 @@
+import unittest
+
+import numpy as np
+
+from weather_api_collector.metrics import errors_by_model, forecast_errors
+
+
+class ForecastErrorsTest(unittest.TestCase):
+    def test_all_models_in_one_call(self):
+        predictions = np.array([[2, 4, 7, 9], [1, 3, 8, 10]])
+        targets = np.array([1, 3, 8, 10])
+        errors = forecast_errors(predictions, targets)
+
+        np.testing.assert_allclose(errors['rmse'], [1.0, 0.0])
+        np.testing.assert_allclose(errors['mae'], [1.0, 0.0])
+        mre = (np.abs(predictions[0] - targets) / targets).mean()
+        np.testing.assert_allclose(errors['mre'], [mre, 0.0])
+
+    def test_missing_values_and_zero_targets_are_masked(self):
+        errors = forecast_errors([[2, np.nan, 5, 1]], [1, 3, 0, None])
+
+        np.testing.assert_allclose(errors['mae'], [3.0])
+        np.testing.assert_allclose(errors['mre'], [1.0])
+
+    def test_many_cities(self):
+        predictions = np.zeros((3, 2, 24))
+        targets = np.arange(1, 4)[:, None] * np.ones((3, 24))
+        errors = forecast_errors(predictions, targets)
+
+        self.assertEqual(errors['mae'].shape, (3, 2))
+        np.testing.assert_allclose(errors['mae'][:, 0], [1, 2, 3])
+
+    def test_errors_by_model_uses_none_without_valid_points(self):
+        self.assertEqual(errors_by_model(['a'], [[1, 2]], [0, 0])['mre'], {'a': None})
+        self.assertEqual(errors_by_model(['a'], [[1, 2]], [0, 0])['mae'], {'a': 1.5})
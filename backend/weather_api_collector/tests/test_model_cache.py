@@ -0,0 +1,146 @@
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import numpy as np
+from django.test import TestCase, override_settings
+
+from weather_api_collector.forecasting import DampedTrendEngine, fit_forecast
+from weather_api_collector.model_cache import cached_forecasts
+from weather_api_collector.models import City, ForecastModelState
+
+
+def hourly_series(start, hours):
+    times = [start + timedelta(hours=i) for i in range(hours)]
+    values = 10 + 5 * np.sin(2 * np.pi * np.arange(hours) / 24)
+    return times, values
+
+
+@override_settings(FORECAST_WORKERS=0)
+class CachedForecastTest(TestCase):
+    def setUp(self):
+        self.city = City.objects.create(
+            city="Kyiv",
+            lat=52,
+            lng=31,
+            country="Ukraine",
+            population=100000
+        )
+        self.start = datetime(2023, 1, 1, tzinfo=timezone.utc)
+
+    @mock.patch(
+        'weather_api_collector.executor.fit_forecast',
+        return_value=({'a': 1}, [1.0] * 24),
+    )
+    def test_hit_skips_fitting(self, mock_fit):
+        times, values = hourly_series(self.start, 96)
+        cached_forecasts(self.city, ['arima'], times, values)
+        forecasts = cached_forecasts(self.city, ['arima'], times, values)
+
+        self.assertEqual(forecasts, {'arima': [1.0] * 24})
+        self.assertEqual(mock_fit.call_count, 1)
+
+    @mock.patch(
+        'weather_api_collector.executor.fit_forecast',
+        return_value=({'a': 1}, [1.0] * 24),
+    )
+    def test_new_observations_invalidate(self, mock_fit):
+        times, values = hourly_series(self.start, 96)
+        cached_forecasts(self.city, ['arima'], times, values)
+        values[-1] += 1
+        cached_forecasts(self.city, ['arima'], times, values)
+
+        self.assertEqual(mock_fit.call_count, 2)
+        self.assertEqual(mock_fit.call_args.args[3], {'a': 1})
+
+    @mock.patch(
+        'weather_api_collector.executor.fit_forecast',
+        return_value=({'a': 1}, [1.0] * 24),
+    )
+    def test_small_shift_refilters_large_shift_refits(self, mock_fit):
+        times, values = hourly_series(self.start, 96)
+        cached_forecasts(self.city, ['arima'], times, values)
+
+        cached_forecasts(
+            self.city, ['arima'], *hourly_series(self.start + timedelta(hours=3), 96)
+        )
+        self.assertEqual(mock_fit.call_args.args[3], {'a': 1})
+
+        cached_forecasts(
+            self.city, ['arima'], *hourly_series(self.start + timedelta(days=3), 96)
+        )
+        self.assertIsNone(mock_fit.call_args.args[3])
+        self.assertEqual(ForecastModelState.objects.filter(city=self.city).count(), 3)
+
+    @mock.patch(
+        'weather_api_collector.executor.fit_forecast',
+        return_value=({'a': 1}, [1.0] * 24),
+    )
+    def test_other_window_length_refits(self, mock_fit):
+        cached_forecasts(self.city, ['arima'], *hourly_series(self.start, 96))
+
+        cached_forecasts(
+            self.city, ['arima'], *hourly_series(self.start + timedelta(days=2), 48)
+        )
+        self.assertIsNone(mock_fit.call_args.args[3])
+
+        cached_forecasts(
+            self.city, ['arima'], *hourly_series(self.start + timedelta(hours=3), 96)
+        )
+        self.assertEqual(mock_fit.call_args.args[3], {'a': 1})
+
+    def test_fast_engines_are_not_stored(self):
+        times, values = hourly_series(self.start, 96)
+        engines = ['harmonic', 'seasonal_naive']
+        forecasts = cached_forecasts(self.city, engines, times, values)
+
+        self.assertEqual(list(forecasts), ['harmonic', 'seasonal_naive'])
+        self.assertFalse(ForecastModelState.objects.exists())
+
+
+class FitForecastTest(TestCase):
+    def test_refilter_reuses_parameters(self):
+        _, values = hourly_series(datetime(2023, 1, 1), 24 * 14)
+        for engine in ('holtwinters', 'arima'):
+            params, forecast = fit_forecast(engine, values)
+            refiltered_params, refiltered = fit_forecast(
+                engine, values[3:], params=params
+            )
+
+            self.assertEqual(len(forecast), 24)
+            self.assertEqual(len(refiltered), 24)
+            self.assertEqual(params, refiltered_params)
+
+    def test_fast_engines_follow_the_daily_cycle(self):
+        _, values = hourly_series(datetime(2023, 1, 1), 24 * 14 + 5)
+        expected = 10 + 5 * np.sin(2 * np.pi * np.arange(24 * 14 + 5, 24 * 15 + 5) / 24)
+        for engine in ('seasonal_naive', 'damped_trend', 'harmonic'):
+            _, forecast = fit_forecast(engine, values)
+            np.testing.assert_allclose(forecast, expected, atol=1e-6, err_msg=engine)
+
+    def test_damped_trend_flattens_out(self):
+        values = 10 + 0.1 * np.arange(24 * 14)
+        _, forecast = fit_forecast('damped_trend', values)
+
+        # Without the hour-of-day profile every step adds phi times the previous one
+        window = values[-24 * DampedTrendEngine.profile_days:]
+        profile = window.reshape(-1, 24).mean(axis=0)
+        steps = np.diff(np.asarray(forecast) - profile)
+        np.testing.assert_allclose(steps[1:] / steps[:-1], DampedTrendEngine.phi)
+
+    def test_resampling_needs_two_days(self):
+        _, values = hourly_series(datetime(2023, 1, 1), 47)
+        with self.assertRaises(ValueError):
+            fit_forecast('harmonic', values, resample=3)
+
+    def test_resampling_needs_two_blocks_per_season(self):
+        _, values = hourly_series(datetime(2023, 1, 1), 24 * 14)
+        with self.assertRaises(ValueError):
+            fit_forecast('holtwinters', values, resample=24)
+
+    def test_resampled_fit_returns_hourly_steps(self):
+        _, values = hourly_series(datetime(2023, 1, 1), 24 * 14)
+        expected = 10 + 5 * np.sin(2 * np.pi * np.arange(24 * 14, 24 * 15) / 24)
+        for engine in ('holtwinters', 'harmonic'):
+            _, forecast = fit_forecast(engine, values, resample=3)
+            self.assertEqual(len(forecast), 24)
+            np.testing.assert_allclose(forecast, expected, atol=1.5, err_msg=engine)
@@ -0,0 +1,107 @@
+from datetime import date, timedelta
+from unittest import mock
+
+from django.test import TestCase
+
+from weather_api_collector.models import City, Observation
+from weather_api_collector.observations import (
+    missing_date_ranges, sync_observations, upsert_observations,
+)
+from weather_api_collector.open_meteo import split_date_range
+from weather_api_collector.tests.helpers import make_archive_payload
+
+
+def fake_get_json(url, params):
+    return make_archive_payload(params['start_date'], params['end_date'])
+
+
+def requested_ranges(mock_get_json):
+    return sorted(
+        (c.args[1]['start_date'], c.args[1]['end_date'])
+        for c in mock_get_json.call_args_list
+    )
+
+
+class ObservationStoreTest(TestCase):
+    def setUp(self):
+        self.city = City.objects.create(
+            city="Kyiv",
+            lat=52,
+            lng=31,
+            country="Ukraine",
+            population=100000
+        )
+
+    def test_missing_ranges_skip_stored_days(self):
+        upsert_observations(
+            self.city, make_archive_payload('2023-01-03', '2023-01-04')['hourly']
+        )
+        self.assertEqual(missing_date_ranges(self.city, '2023-01-01', '2023-01-06'), [
+            (date(2023, 1, 1), date(2023, 1, 2)),
+            (date(2023, 1, 5), date(2023, 1, 6)),
+        ])
+
+    def test_upsert_is_idempotent_and_skips_gaps(self):
+        hourly = make_archive_payload('2023-01-01', '2023-01-01')['hourly']
+        hourly['temperature_2m'][5] = None
+
+        upsert_observations(self.city, hourly)
+        upsert_observations(self.city, hourly)
+
+        self.assertEqual(Observation.objects.filter(city=self.city).count(), 23)
+        self.assertEqual(missing_date_ranges(self.city, '2023-01-01', '2023-01-01'),
+                         [(date(2023, 1, 1), date(2023, 1, 1))])
+
+    @mock.patch('weather_api_collector.open_meteo._get_json', side_effect=fake_get_json)
+    def test_only_new_days_are_fetched(self, mock_get_json):
+        sync_observations(self.city, '2023-01-01', '2023-03-31')
+        mock_get_json.reset_mock()
+        fetched = sync_observations(self.city, '2023-01-02', '2023-04-01')
+
+        self.assertEqual(fetched, 24)
+        self.assertEqual(
+            requested_ranges(mock_get_json), [('2023-04-01', '2023-04-01')]
+        )
+
+    def test_split_date_range_follows_calendar_months(self):
+        self.assertEqual(split_date_range('2023-01-15', '2023-03-10'), [
+            ('2023-01-15', '2023-01-31'),
+            ('2023-02-01', '2023-02-28'),
+            ('2023-03-01', '2023-03-10'),
+        ])
+        self.assertEqual(split_date_range('2022-11-01', '2023-12-31', months=12), [
+            ('2022-11-01', '2023-10-31'),
+            ('2023-11-01', '2023-12-31'),
+        ])
+
+    @mock.patch('weather_api_collector.open_meteo._get_json', side_effect=fake_get_json)
+    def test_long_ranges_are_fetched_in_monthly_chunks(self, mock_get_json):
+        fetched = sync_observations(self.city, '2022-01-01', '2022-12-31')
+
+        self.assertEqual(fetched, 365 * 24)
+        self.assertEqual(mock_get_json.call_count, 12)
+        self.assertEqual(
+            requested_ranges(mock_get_json)[1], ('2022-02-01', '2022-02-28')
+        )
+        self.assertEqual(Observation.objects.filter(city=self.city).count(), 365 * 24)
+
+    @mock.patch('weather_api_collector.open_meteo._get_json', side_effect=fake_get_json)
+    def test_recent_days_are_refreshed(self, mock_get_json):
+        start, end = date.today() - timedelta(days=7), date.today() - timedelta(days=6)
+        sync_observations(self.city, start, end)
+        self.assertEqual(missing_date_ranges(self.city, start, end), [])
+
+        stale = Observation.objects.first().fetched_at - timedelta(days=1)
+        Observation.objects.update(fetched_at=stale)
+        self.assertEqual(missing_date_ranges(self.city, start, end), [(start, end)])
+
+    @mock.patch('weather_api_collector.open_meteo._get_json', side_effect=fake_get_json)
+    def test_days_not_yet_published_are_skipped(self, mock_get_json):
+        today = date.today()
+        sync_observations(self.city, today - timedelta(days=10), today)
+
+        latest_day = today - timedelta(days=5)
+        self.assertEqual(requested_ranges(mock_get_json)[-1][1], latest_day.isoformat())
+        self.assertEqual(
+            missing_date_ranges(self.city, today - timedelta(days=10), today), []
+        )
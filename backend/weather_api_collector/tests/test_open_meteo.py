@@ -0,0 +1,93 @@
+import asyncio
+from unittest import mock
+
+import httpx
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from weather_api_collector.models import City
+from weather_api_collector.open_meteo import afetch_forecast, get_async_client
+from weather_api_collector.tests.helpers import (
+    TemporarySeriesDirMixin, fake_afetch_archive, fake_afetch_forecast,
+)
+
+
+@override_settings(OPEN_METEO_BACKOFF=0, OPEN_METEO_RETRIES=2)
+class AsyncClientRetryTest(TestCase):
+    def client_for(self, responses):
+        responses = iter(responses)
+
+        def handler(request):
+            return next(responses)
+
+        return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    async def test_retries_transient_errors(self):
+        client = self.client_for(
+            [httpx.Response(503), httpx.Response(200, json={'hourly': {}})]
+        )
+        with mock.patch(
+            'weather_api_collector.open_meteo.get_async_client', return_value=client
+        ):
+            self.assertEqual(await afetch_forecast(50.45, 30.52), {'hourly': {}})
+
+    async def test_gives_up_after_retries(self):
+        client = self.client_for([httpx.Response(503)] * 3)
+        with mock.patch(
+            'weather_api_collector.open_meteo.get_async_client', return_value=client
+        ):
+            with self.assertRaises(httpx.HTTPStatusError):
+                await afetch_forecast(50.45, 30.52)
+
+
+class AsyncClientLifetimeTest(TestCase):
+    def test_client_is_shared_by_its_loop_and_closed_with_it(self):
+        async def clients():
+            return await get_async_client(), await get_async_client()
+
+        first, again = asyncio.run(clients())
+        self.assertIs(first, again)
+        self.assertTrue(first.is_closed)
+
+        second, _ = asyncio.run(clients())
+        self.assertIsNot(second, first)
+        self.assertTrue(second.is_closed)
+
+
+@override_settings(FORECAST_WORKERS=0)
+class WeatherDataAsyncViewTest(TemporarySeriesDirMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.city = City.objects.create(
+            city="Kyiv",
+            lat=52,
+            lng=31,
+            country="Ukraine",
+            population=100000
+        )
+
+    @mock.patch(
+        'weather_api_collector.reports.afetch_forecast',
+        side_effect=fake_afetch_forecast,
+    )
+    @mock.patch(
+        'weather_api_collector.observations.afetch_archive',
+        side_effect=fake_afetch_archive,
+    )
+    async def test_weather_data_async_view(self, mock_archive, mock_forecast):
+        url = reverse('weather_historical_data_async', kwargs={'city': 'Kyiv'})
+        response = await self.async_client.get(
+            url, {'start_date': '2023-01-01', 'end_date': '2023-01-31'}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        forecasts = data['forecast_data']['temperature_2m']
+        self.assertEqual(len(forecasts['damped_trend']), 24)
+        self.assertIn('key_indicators', data)
+        self.assertEqual(mock_archive.call_count, 1)
+
+    async def test_invalid_dates(self):
+        url = reverse('weather_historical_data_async', kwargs={'city': 'Kyiv'})
+        response = await self.async_client.get(url, {'start_date': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,63 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from weather_api_collector.models import City
+from weather_api_collector.summaries import rebuild_country_summaries
+
+
+class CityCursorPaginationTest(TestCase):
+    def setUp(self):
+        # Duplicate names make sure pages break ties by id
+        for name in ('Alpha', 'Beta', 'Beta', 'Beta', 'Gamma', 'Delta', 'Beta'):
+            City.objects.create(city=name, lat=1, lng=2, country="Testland",
+                                population=10)
+        self.url = reverse('city_list_by_country', args=['testland'])
+
+    def walk(self, url, link, **params):
+        pages = []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            pages.append([city['city'] for city in response.data['results']])
+            if not response.data[link]:
+                return pages, response
+            response = self.client.get(response.data[link])
+
+    def test_pages_cover_every_city_once_in_order(self):
+        pages, last = self.walk(self.url, 'next', page_size=2)
+
+        self.assertEqual([len(page) for page in pages], [2, 2, 2, 1])
+        cities = City.objects.filter(country='Testland').order_by('city', 'id')
+        expected = list(cities.values_list('city', flat=True))
+        self.assertEqual([name for page in pages for name in page], expected)
+
+        backwards, first = self.walk(last.data['previous'], 'previous')
+        names = [name for page in reversed(backwards) for name in page]
+        self.assertEqual(names, expected[:-1])
+        self.assertIsNone(first.data['previous'])
+        self.assertIsNotNone(first.data['next'])
+
+    def test_deep_pages_do_not_count_or_offset(self):
+        response = self.client.get(self.url, {'page_size': 3})
+        with self.assertNumQueries(1) as queries:
+            response = self.client.get(response.data['next'])
+        self.assertNotIn('count', response.data)
+        self.assertNotIn('COUNT(', queries.captured_queries[0]['sql'])
+        self.assertNotIn('OFFSET', queries.captured_queries[0]['sql'])
+
+    def test_approximate_count_is_opt_in(self):
+        rebuild_country_summaries()
+
+        self.assertEqual(self.client.get(self.url, {'count': '1'}).data['count'], 7)
+        total = self.client.get(reverse('cities'), {'count': '1'}).data['count']
+        self.assertEqual(total, City.objects.count())
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_search_results_are_a_single_page(self):
+        response = self.client.get(reverse('cities'), {'search': 'Gamma', 'count': '1'})
+
+        self.assertEqual(response.data['count'], len(response.data['results']))
+        self.assertIsNone(response.data['next'])
@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from weather_api_collector.management.commands.warm_forecasts import (
+    seconds_until_next_run,
+)
+from weather_api_collector.models import City, PrecomputedReport
+from weather_api_collector.precompute import warm_targets
+from weather_api_collector.reports import ForecastOptions, default_date_range
+
+
+class PrecomputedReportTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.city = City.objects.create(
+            city="Kyiv",
+            lat=52,
+            lng=31,
+            country="Testland",
+            population=100000000
+        )
+        self.query = {'start_date': '2023-01-01', 'end_date': '2023-01-31'}
+
+    def precompute(self, city, start_date='2023-01-01', **fields):
+        fields.setdefault('options', ForecastOptions().key())
+        fields.setdefault('report', {})
+        fields.setdefault('computed_at', timezone.now())
+        return PrecomputedReport.objects.create(city=city, start_date=start_date,
+                                                end_date='2023-01-31', **fields)
+
+    @mock.patch('weather_api_collector.precompute.weather_report')
+    def test_view_serves_precomputed_report(self, mock_report):
+        self.precompute(self.city, report={'sentence': 'precomputed'})
+
+        url = reverse('weather_historical_data', kwargs={'city': 'Kyiv'})
+        response = self.client.get(url, self.query)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'sentence': 'precomputed'})
+        mock_report.assert_not_called()
+        self.assertIsNotNone(PrecomputedReport.objects.get().requested_at)
+
+    @mock.patch('weather_api_collector.precompute.weather_report',
+                return_value={'sentence': 'fresh'})
+    def test_stale_report_is_recomputed_and_stored(self, mock_report):
+        self.precompute(self.city, report={'sentence': 'stale'},
+                        computed_at=timezone.now() - timedelta(days=1))
+
+        url = reverse('weather_historical_data', kwargs={'city': 'Kyiv'})
+        response = self.client.get(url, self.query)
+
+        self.assertEqual(response.json(), {'sentence': 'fresh'})
+        stored = PrecomputedReport.objects.get()
+        self.assertEqual(stored.report, {'sentence': 'fresh'})
+
+    @mock.patch('weather_api_collector.precompute.weather_report',
+                return_value={'sentence': 'fresh'})
+    def test_reports_from_other_options_are_not_served(self, mock_report):
+        self.precompute(self.city, options='holtwinters:None:1',
+                        report={'sentence': 'old defaults'})
+
+        url = reverse('weather_historical_data', kwargs={'city': 'Kyiv'})
+        response = self.client.get(url, self.query)
+
+        self.assertEqual(response.json(), {'sentence': 'fresh'})
+        self.assertEqual(PrecomputedReport.objects.count(), 2)
+
+    @mock.patch('weather_api_collector.precompute.stream_weather_reports')
+    def test_warm_forecasts_covers_top_and_recent_cities(self, mock_stream):
+        mock_stream.side_effect = lambda cities, start_date, end_date, options: [
+            (city, {'sentence': f'{city.city} {start_date}'}) for city in cities
+        ]
+        village = City.objects.create(city="Village", lat=10, lng=10,
+                                      country="Testland", population=10)
+        self.precompute(village, computed_at=timezone.now() - timedelta(days=1),
+                        requested_at=timezone.now())
+
+        out = StringIO()
+        call_command('warm_forecasts', '--once', '--top', '1', stdout=out)
+
+        self.assertIn('Warmed 2 reports', out.getvalue())
+        start_date, end_date = default_date_range()
+        kyiv = PrecomputedReport.objects.get(city=self.city, start_date=start_date)
+        self.assertEqual(kyiv.report, {'sentence': f'Kyiv {start_date}'})
+        self.assertEqual(PrecomputedReport.objects.get(city=village).report,
+                         {'sentence': 'Village 2023-01-01'})
+
+    def test_warm_targets_are_bounded(self):
+        for day in range(1, 11):
+            for population in range(day):
+                city = City.objects.create(city=f'Town {day} {population}', lat=1,
+                                           lng=1, country="Testland",
+                                           population=population)
+                self.precompute(city, start_date=f'2023-01-{day:02}',
+                                requested_at=timezone.now())
+
+        targets = warm_targets(top_cities=3, recent_hours=1, top_ranges=2)
+
+        ranges = [('2023-01-10', '2023-01-31'), ('2023-01-09', '2023-01-31')]
+        self.assertEqual(list(targets), [default_date_range(), *ranges])
+        self.assertTrue(all(len(cities) == 3 for cities in targets.values()))
+
+    @override_settings(WARM_FORECASTS_DELAY=300)
+    def test_runs_are_scheduled_after_each_hour(self):
+        two_past = datetime(2023, 1, 1, 10, 2, tzinfo=dt_timezone.utc)
+        half_past = datetime(2023, 1, 1, 10, 30, tzinfo=dt_timezone.utc)
+        self.assertEqual(seconds_until_next_run(two_past), 180)
+        self.assertEqual(seconds_until_next_run(half_past), 2100)
@@ -0,0 +1,48 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.db.models import Q
+from django.test import TestCase
+
+from weather_api_collector.models import City, ForecastModelState
+
+
+@skipUnless(
+    connection.vendor == 'sqlite',
+    'Query plan assertions are written against SQLite EXPLAIN output',
+)
+class CityQueryPlanTest(TestCase):
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+        self.assertNotIn('USE TEMP B-TREE', plan)
+        self.assertNotRegex(plan, r'SCAN weather_api_collector_\w+\s*$')
+
+    def test_cities_by_country(self):
+        queryset = City.objects.filter(country__exact='Ukraine').order_by('city', 'id')
+        self.assertUsesIndex(queryset, 'city_country_city_id_idx')
+        after_lviv = Q(city__gte='Lviv'), Q(city__gt='Lviv') | Q(id__gt=5)
+        deep_page = queryset.filter(*after_lviv)
+        self.assertUsesIndex(deep_page, 'city_country_city_id_idx')
+
+    def test_city_by_name(self):
+        self.assertUsesIndex(
+            City.objects.filter(city='Kyiv').order_by('-population'),
+            'city_name_population_idx',
+        )
+
+    def test_city_list_ordering(self):
+        self.assertUsesIndex(City.objects.order_by('city', 'id'), 'city_name_id_idx')
+
+    def test_deep_city_list_page_seeks_into_the_index(self):
+        after_lviv = Q(city__gte='Lviv'), Q(city__gt='Lviv') | Q(id__gt=5)
+        queryset = City.objects.filter(*after_lviv).order_by('city', 'id')
+        plan = queryset.explain()
+        self.assertUsesIndex(queryset, 'city_name_id_idx')
+        self.assertRegex(plan, r'city_name_id_idx \(city>\?\)')
+
+    def test_latest_forecast_model(self):
+        queryset = ForecastModelState.objects.filter(
+            city_id=1, engine='arima'
+        ).order_by('-fitted_at')
+        self.assertUsesIndex(queryset, 'forecast_model_latest_idx')
@@ -0,0 +1,73 @@
+import time
+
+from django.test import TestCase
+from django.urls import reverse
+
+from weather_api_collector.models import City
+from weather_api_collector.search import CitySearchIndex, get_city_index, normalize
+
+CITIES = [
+    ('Zürich', 'Zurich', 47.37, 8.54, 436332),
+    ('Springfield', 'Springfield', 39.77, -89.65, 114394),
+    ('Springfield', 'Springfield', 37.19, -93.29, 169176),
+    ('New York', 'New York', 40.69, -73.92, 18832416),
+    ('York', 'York', 53.96, -1.08, 153717),
+    ('Kyiv', 'Kyiv', 50.45, 30.52, 2952301),
+]
+
+
+class CitySearchIndexTest(TestCase):
+    def setUp(self):
+        self.index = CitySearchIndex(CITIES)
+
+    def test_normalize_strips_accents_and_case(self):
+        self.assertEqual(normalize('  Zürich  AM  See '), 'zurich am see')
+
+    def test_accent_insensitive_prefix(self):
+        self.assertEqual([c['city'] for c in self.index.search('zür', 10)], ['Zürich'])
+        self.assertEqual([c['city'] for c in self.index.search('ZUR', 10)], ['Zürich'])
+
+    def test_ranked_by_population(self):
+        self.assertEqual(
+            [c['lat'] for c in self.index.search('spring', 10)], [37.19, 39.77]
+        )
+
+    def test_matches_word_prefixes(self):
+        self.assertEqual(
+            [c['city'] for c in self.index.search('york', 10)], ['New York', 'York']
+        )
+
+    def test_limit(self):
+        self.assertEqual(len(self.index.search('s', 1)), 1)
+        self.assertEqual(self.index.search('nowhere', 10), [])
+
+    def test_lookup_does_not_touch_database(self):
+        index = get_city_index()
+        with self.assertNumQueries(0):
+            started = time.perf_counter()
+            index.search('ky', 10)
+            self.assertLess(time.perf_counter() - started, 0.01)
+
+    def test_index_is_invalidated_on_save(self):
+        get_city_index()
+        City.objects.create(
+            city="Kyivska", lat=50, lng=30, country="Ukraine", population=10
+        )
+        self.assertIn(
+            'Kyivska', [c['city'] for c in get_city_index().search('kyivs', 10)]
+        )
+
+
+class CityListSearchViewTest(TestCase):
+    def setUp(self):
+        for city, _, lat, lng, population in CITIES:
+            City.objects.create(
+                city=city, lat=lat, lng=lng, country="Testland", population=population
+            )
+
+    def test_city_list_view_limit(self):
+        response = self.client.get(reverse('cities'), {'search': 'spring'})
+        self.assertGreaterEqual(len(response.data['results']), 2)
+
+        response = self.client.get(reverse('cities'), {'search': 'spring', 'limit': 1})
+        self.assertEqual(len(response.data['results']), 1)
@@ -0,0 +1,80 @@
+import glob
+import os
+
+import numpy as np
+from django.test import TestCase
+
+from weather_api_collector.models import City
+from weather_api_collector.observations import upsert_observations
+from weather_api_collector.reports import observations_frame
+from weather_api_collector.series_store import load_series
+from weather_api_collector.tests.helpers import (
+    TemporarySeriesDirMixin, make_archive_payload,
+)
+
+
+class SeriesStoreTest(TemporarySeriesDirMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.city = City.objects.create(
+            city="Kyiv",
+            lat=52,
+            lng=31,
+            country="Ukraine",
+            population=100000
+        )
+        upsert_observations(
+            self.city, make_archive_payload('2023-01-01', '2023-01-10')['hourly']
+        )
+
+    def snapshots(self):
+        return glob.glob(os.path.join(self.series_dir, f'{self.city.pk}.*.npy'))
+
+    def test_loads_requested_days_from_memory_map(self):
+        series = load_series(self.city, '2023-01-02', '2023-01-03')
+
+        self.assertIsInstance(series, np.memmap)
+        self.assertEqual(series.dtype, np.float32)
+        self.assertEqual(series.shape, (4, 48))
+
+        df = observations_frame(series)
+        self.assertEqual(str(df['ds'].iloc[0]), '2023-01-02 00:00:00+00:00')
+        self.assertEqual(str(df['ds'].iloc[-1]), '2023-01-03 23:00:00+00:00')
+        self.assertEqual(df['temperature_2m'].iloc[6], 15.0)
+
+    def test_new_observations_replace_the_snapshot(self):
+        load_series(self.city, '2023-01-01', '2023-01-10')
+        upsert_observations(
+            self.city, make_archive_payload('2023-01-11', '2023-01-11')['hourly']
+        )
+
+        self.assertEqual(
+            load_series(self.city, '2023-01-01', '2023-01-31').shape, (4, 264)
+        )
+        self.assertEqual(len(self.snapshots()), 1)
+
+    def test_repeated_loads_skip_the_database(self):
+        load_series(self.city, '2023-01-01', '2023-01-10')
+        with self.assertNumQueries(0):
+            load_series(self.city, '2023-01-01', '2023-01-10')
+
+    def test_committed_upserts_remove_the_snapshot_for_every_process(self):
+        load_series(self.city, '2023-01-01', '2023-01-10')
+        with self.captureOnCommitCallbacks(execute=True):
+            upsert_observations(
+                self.city, make_archive_payload('2023-01-11', '2023-01-11')['hourly']
+            )
+
+        self.assertEqual(self.snapshots(), [])
+        self.assertEqual(
+            load_series(self.city, '2023-01-01', '2023-01-31').shape, (4, 264)
+        )
+
+    def test_empty_history(self):
+        city = City.objects.create(
+            city="Empty", lat=0, lng=0, country="Nowhere", population=0
+        )
+        self.assertEqual(load_series(city, '2023-01-01', '2023-01-02').shape, (4, 0))
+        self.assertTrue(
+            observations_frame(load_series(city, '2023-01-01', '2023-01-02')).empty
+        )
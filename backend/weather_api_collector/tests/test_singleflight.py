@@ -0,0 +1,74 @@
+import asyncio
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.test import SimpleTestCase, override_settings
+
+from weather_api_collector.singleflight import SingleFlight
+
+
+class SingleFlightTest(SimpleTestCase):
+    def test_concurrent_calls_share_one_computation(self):
+        group = SingleFlight()
+        calls = []
+        started = threading.Event()
+
+        def compute():
+            calls.append(1)
+            started.set()
+            time.sleep(0.2)
+            return {'value': 42}
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            first = pool.submit(group.do, 'kyiv', compute)
+            started.wait()
+            results = [pool.submit(group.do, 'kyiv', compute) for _ in range(7)]
+
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(f.result() is first.result() for f in results))
+
+    def test_errors_reach_every_caller_and_are_not_cached(self):
+        group = SingleFlight()
+
+        def fail():
+            raise ValueError('upstream down')
+
+        with self.assertRaises(ValueError):
+            group.do('kyiv', fail)
+        self.assertEqual(group.do('kyiv', lambda: 1), 1)
+
+    def test_async_calls_share_one_task(self):
+        group = SingleFlight()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return 42
+
+        async def run():
+            return await asyncio.gather(*[group.ado('kyiv', compute) for _ in range(5)])
+
+        self.assertEqual(asyncio.run(run()), [42] * 5)
+        self.assertEqual(len(calls), 1)
+
+    def test_file_lock_serialises_workers(self):
+        events = []
+
+        def compute(name):
+            events.append(f'{name} start')
+            time.sleep(0.1)
+            events.append(f'{name} end')
+
+        with tempfile.TemporaryDirectory() as lock_dir:
+            with override_settings(SINGLE_FLIGHT_LOCK_DIR=lock_dir):
+                with ThreadPoolExecutor(max_workers=2) as pool:
+                    first = pool.submit(SingleFlight().do, 'kyiv', compute, 'a')
+                    time.sleep(0.02)
+                    second = pool.submit(SingleFlight().do, 'kyiv', compute, 'b')
+                    first.result()
+                    second.result()
+
+        self.assertEqual(events, ['a start', 'a end', 'b start', 'b end'])
@@ -0,0 +1,107 @@
+from unittest import mock
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from weather_api_collector.models import City
+
+from weather_api_collector.open_meteo import fetch_archive, snap_coordinates
+from weather_api_collector.spatial import CitySpatialIndex
+from weather_api_collector.tests.helpers import make_archive_payload
+
+CITIES = [
+    ('Kyiv', 'Ukraine', 50.45, 30.5236),
+    ('Lviv', 'Ukraine', 49.8425, 24.0322),
+    ('Suva', 'Fiji', -18.1416, 178.4419),
+    ('Apia', 'Samoa', -13.8333, -171.7667),
+]
+
+
+class CitySpatialIndexTest(TestCase):
+    def setUp(self):
+        self.index = CitySpatialIndex(CITIES)
+
+    def test_nearest(self):
+        cities = self.index.nearest(50.4, 30.6, 2)
+        self.assertEqual([c['city'] for c in cities], ['Kyiv', 'Lviv'])
+        self.assertAlmostEqual(cities[1]['distance_km'], 473, delta=5)
+
+    def test_nearest_across_antimeridian(self):
+        self.assertEqual(self.index.nearest(-15, 179.9, 1)[0]['city'], 'Suva')
+        self.assertEqual(self.index.nearest(-14, -172, 1)[0]['city'], 'Apia')
+
+    def test_within_radius(self):
+        self.assertEqual(
+            [c['city'] for c in self.index.within_radius(50.4, 30.6, 100, 10)], ['Kyiv']
+        )
+        self.assertEqual(len(self.index.within_radius(50.4, 30.6, 1000, 10)), 2)
+        self.assertEqual(self.index.within_radius(0, 0, 10, 10), [])
+
+    def test_within_radius_respects_limit(self):
+        self.assertEqual(
+            [c['city'] for c in self.index.within_radius(50.4, 30.6, 1000, 1)], ['Kyiv']
+        )
+        self.assertEqual(len(self.index.within_radius(0, 0, 20000, 100)), len(CITIES))
+
+
+class NearestCityViewTest(TestCase):
+    def setUp(self):
+        for city, country, lat, lng in CITIES:
+            City.objects.create(
+                city=city, country=country, lat=lat, lng=lng, population=1
+            )
+        for i in range(30):
+            City.objects.create(
+                city=f'Suburb {i}',
+                country="Ukraine",
+                lat=50.45,
+                lng=30.5 + i / 100,
+                population=1,
+            )
+
+    def nearest(self, **params):
+        return self.client.get(reverse('nearest_cities'), params)
+
+    def test_nearest_city_view(self):
+        response = self.nearest(lat=50.4, lng=30.6, k=1)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 1)
+
+        self.assertEqual(self.nearest(lat=50.4).status_code, 400)
+        self.assertEqual(self.nearest(lat=95, lng=0).status_code, 400)
+        self.assertEqual(
+            self.nearest(lat=50.4, lng=30.6, radius_km=-1).status_code, 400
+        )
+
+    @override_settings(NEAREST_CITY_MAX_K=5)
+    def test_k_is_clamped(self):
+        self.assertEqual(len(self.nearest(lat=50.4, lng=30.6, k=10 ** 9).data), 5)
+
+    def test_radius_has_its_own_limit(self):
+        response = self.nearest(lat=50.45, lng=30.6, radius_km=50)
+        self.assertEqual(len(response.data), settings.NEAREST_CITY_RADIUS_LIMIT)
+        self.assertTrue(all(city['distance_km'] <= 50 for city in response.data))
+
+        self.assertEqual(
+            len(self.nearest(lat=50.45, lng=30.6, radius_km=50, limit=3).data), 3
+        )
+        with override_settings(NEAREST_CITY_MAX_K=30):
+            response = self.nearest(lat=50.45, lng=30.6, radius_km=1000, limit=1000)
+            self.assertEqual(len(response.data), 30)
+
+
+class SnapCoordinatesTest(TestCase):
+    def test_snaps_to_grid(self):
+        self.assertEqual(snap_coordinates(50.4501, 30.5236), (50.5, 30.5))
+
+    @mock.patch('weather_api_collector.open_meteo.get_session')
+    def test_nearby_coordinates_share_archive_cache(self, mock_session):
+        mock_session.return_value.get.return_value.json.return_value = (
+            make_archive_payload('2023-01-01', '2023-01-01')
+        )
+
+        fetch_archive(50.45, 30.52, '2023-01-01', '2023-01-01')
+        fetch_archive(50.47, 30.56, '2023-01-01', '2023-01-01')
+
+        self.assertEqual(mock_session.return_value.get.call_count, 1)
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase, TestCase
+
+from weather_api_collector.models import City, ObservationSummary
+from weather_api_collector.observations import upsert_observations
+from weather_api_collector.statistics import RunningStats, key_indicators
+from weather_api_collector.tests.helpers import make_archive_payload
+
+
+class RunningStatsTest(SimpleTestCase):
+    def test_merged_chunks_match_describe(self):
+        values = np.random.default_rng(0).normal(10, 5, 5000)
+        stats = RunningStats()
+        for chunk in np.array_split(values, 37):
+            stats.merge(
+                RunningStats.from_dict(RunningStats.from_values(chunk).to_dict())
+            )
+
+        described = stats.describe()
+        expected = pd.Series(values).describe()
+        self.assertEqual(described['count'], expected['count'])
+        for key in ('mean', 'std', 'min', 'max'):
+            self.assertAlmostEqual(described[key], expected[key], places=9)
+        for key in ('25%', '50%', '75%'):
+            self.assertAlmostEqual(described[key], expected[key], delta=0.05)
+        self.assertLessEqual(len(stats.means), 200)
+
+    def test_small_samples_are_exact(self):
+        values = [3.0, 1.0, 4.0, 1.0, 5.0, 9.0, 2.0, 6.0]
+        self.assertEqual(
+            RunningStats.from_values(values).describe(),
+            pd.Series(values).describe().to_dict(),
+        )
+
+
+class KeyIndicatorsTest(TestCase):
+    def setUp(self):
+        self.city = City.objects.create(
+            city="Kyiv",
+            lat=52,
+            lng=31,
+            country="Ukraine",
+            population=100000
+        )
+
+    def test_indicators_merge_month_and_day_summaries(self):
+        hourly = make_archive_payload('2023-01-20', '2023-03-10')['hourly']
+        upsert_observations(self.city, hourly)
+
+        self.assertEqual(
+            ObservationSummary.objects.filter(city=self.city, period='month').count(), 3
+        )
+        indicators = key_indicators(self.city, '2023-01-25', '2023-03-05')
+        frame = pd.DataFrame(hourly)
+        frame = frame[(frame['time'] >= '2023-01-25') & (frame['time'] < '2023-03-06')]
+        expected = (
+            frame[['temperature_2m', 'relative_humidity_2m', 'wind_speed_10m']]
+            .describe()
+            .to_dict()
+        )
+
+        for variable, described in expected.items():
+            self.assertEqual(indicators[variable]['count'], described['count'])
+            for key in ('mean', 'std', 'min', 'max'):
+                self.assertAlmostEqual(
+                    indicators[variable][key], described[key], places=9
+                )
+            for key in ('25%', '50%', '75%'):
+                self.assertAlmostEqual(
+                    indicators[variable][key], described[key], delta=0.5
+                )
+
+    def test_revised_hours_replace_their_day(self):
+        hourly = make_archive_payload('2023-01-01', '2023-01-01')['hourly']
+        upsert_observations(self.city, hourly)
+        hourly['temperature_2m'] = [20.0] * 24
+        upsert_observations(self.city, hourly)
+
+        indicators = key_indicators(self.city, '2023-01-01', '2023-01-31')
+        self.assertEqual(indicators['temperature_2m']['count'], 24)
+        self.assertEqual(indicators['temperature_2m']['mean'], 20.0)
@@ -0,0 +1,51 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from weather_api_collector.models import City, CountrySummary
+from weather_api_collector.summaries import rebuild_country_summaries
+
+
+class CountrySummaryTest(TestCase):
+    def setUp(self):
+        City.objects.create(city="Alpha", lat=10, lng=20, country="Testland", iso2="TL",
+                            iso3="TLD", population=100)
+        City.objects.create(city="Beta", lat=20, lng=40, country="Testland", iso2="TL",
+                            iso3="TLD", population=50)
+        rebuild_country_summaries()
+
+    def test_rebuild(self):
+        summary = CountrySummary.objects.get(country='Testland')
+        self.assertEqual(
+            (summary.iso3, summary.city_count, summary.population_total),
+            ('TLD', 2, 150),
+        )
+        self.assertEqual((summary.centroid_lat, summary.centroid_lng), (15, 30))
+        self.assertEqual(
+            (summary.min_lat, summary.max_lat, summary.min_lng, summary.max_lng),
+            (10, 20, 20, 40),
+        )
+
+    def test_country_average_is_served_from_summary(self):
+        url = reverse('country_average_data', kwargs={'country': 'testland'})
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+        self.assertEqual(response.data, {'average_lat': 15, 'average_lng': 30})
+
+    def test_country_list_honours_etag(self):
+        response = self.client.get(reverse('country_list'))
+        self.assertIn({'country': 'Testland'}, response.data)
+
+        cached = self.client.get(
+            reverse('country_list'), HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached['ETag'], response['ETag'])
+
+    def test_unknown_country(self):
+        response = self.client.get(
+            reverse('country_average_data', kwargs={'country': 'nowhere'})
+        )
+        self.assertEqual(response.data, {'average_lat': None, 'average_lng': None})
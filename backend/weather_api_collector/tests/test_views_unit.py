@@ -1,7 +1,11 @@
-from django.test import TestCase
+from unittest import mock
+
+from django.conf import settings
+from django.test import TestCase, override_settings
 from rest_framework.test import APIClient
 from django.urls import reverse
 from weather_api_collector.models import City
+from weather_api_collector.tests.helpers import TemporarySeriesDirMixin, fake_get
 
 
 class CityListViewTest(TestCase):
@@ -49,3 +53,29 @@ class WeatherDataViewTest(TestCase):
         self.assertIn('rmse', response.data)
         self.assertIn('mae', response.data)
         self.assertIn('mre', response.data)
+
+
+@override_settings(FORECAST_WORKERS=0)
+class WeatherDataFrontendContractTest(TemporarySeriesDirMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        City.objects.create(city="Kyiv", lat=50.45, lng=30.52, country="Ukraine",
+                            population=100000)
+
+    def test_default_response_has_what_the_frontend_renders(self):
+        # frontend/index.html draws a column and a score per engine in temperature_2m
+        url = reverse('weather_historical_data', kwargs={'city': 'Kyiv'})
+        params = {'start_date': '2023-01-01', 'end_date': '2023-01-14'}
+        with mock.patch('weather_api_collector.open_meteo.get_session') as mock_session:
+            mock_session.return_value.get.side_effect = fake_get
+            data = self.client.get(url, params).json()
+
+        forecasts = data['forecast_data']['temperature_2m']
+        self.assertEqual(list(forecasts), settings.FORECAST_DEFAULT_ENGINES)
+        for engine, temperatures in forecasts.items():
+            self.assertEqual(len(data['forecast_data']['time'][engine]), 24)
+            self.assertEqual(len(temperatures), 24)
+            self.assertTrue(all(isinstance(value, float) for value in temperatures))
+            for metric in ('rmse', 'mae', 'mre'):
+                self.assertIsInstance(data[metric][engine], float)
+        self.assertIsInstance(data['sentence'], str)
@@ -1,11 +1,21 @@
 from django.urls import path
 
-from .views import CityListView, CountryAverageView, WeatherDataView, CountryListView, CityByCountryListView
+from .views import (
+    CityListView, CountryAverageView, WeatherDataView, WeatherDataAsyncView,
+    WeatherDataBatchView, CountryListView, CityByCountryListView, NearestCityView,
+    MetricsView,
+)
 
 urlpatterns = [
     path('city/', CityListView.as_view(), name='cities'),
+    path('city/nearest/', NearestCityView.as_view(), name='nearest_cities'),
     path('cities/<str:country>/', CityByCountryListView.as_view(), name='city_list_by_country'),
     path('countries/', CountryListView.as_view(), name='country_list'),
     path('country-average/<str:country>/', CountryAverageView.as_view(), name='country_average_data'),
     path('weather-data/<str:city>/', WeatherDataView.as_view(), name='weather_historical_data'),
+    path('batch/weather-data/', WeatherDataBatchView.as_view(),
+         name='weather_historical_data_batch'),
+    path('async/weather-data/<str:city>/', WeatherDataAsyncView.as_view(),
+         name='weather_historical_data_async'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
 ]
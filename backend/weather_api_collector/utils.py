@@ -1,21 +1,3 @@
-from numpy import inf
-
-
-def calculate_rmse(predictions, targets):
-    return ((predictions - targets) ** 2).mean() ** 0.5
-
-
-def calculate_mae(predictions, targets):
-    return (abs(predictions - targets)).mean()
-
-
-def calculate_mre(predictions, targets):
-    result = (abs(predictions - targets) / targets).mean()
-    if result != inf:
-        return result
-    return -1
-
-
 def generate_sentence(key_indicators):
     humidity_mean = key_indicators['relative_humidity_2m']['mean']
     wind_mean = key_indicators['wind_speed_10m']['mean']
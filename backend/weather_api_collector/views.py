@@ -1,28 +1,77 @@
-from datetime import datetime
+import json
+from datetime import date
 
-import pandas as pd
+import httpx
 import requests
-from dateutil.relativedelta import relativedelta
-from django.db.models import Avg
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.http import parse_etags
+from django.views import View
 from rest_framework import generics
 from rest_framework.response import Response
-from statsmodels.tsa.arima.model import ARIMA
-from statsmodels.tsa.holtwinters import ExponentialSmoothing
 
+from .encoding import (
+    MSGPACK_MEDIA_TYPE, accepts_msgpack, compact_report, encode_msgpack, report_etag,
+    weather_renderer_classes,
+)
+from .executor import ForecastQueueFull, ForecastTimeout
+from .forecasting import ENGINES, MAX_RESAMPLE_HOURS, MIN_RESAMPLED_HOURS
+from .instrumentation import registry, span
 from .models import City
-from .serializers import CitySerializer, CountryAverageSerializer, CountrySerializer
-from .utils import generate_sentence, calculate_mae, calculate_mre, calculate_rmse
+from .pagination import CityCursorPagination
+from .precompute import aprecomputed_weather_report, precomputed_weather_report
+from .reports import (
+    ForecastOptions, NoObservationsError, TrainingWindowTooShort, default_date_range,
+    stream_weather_reports,
+)
+from .search import get_city_index
+from .serializers import (
+    CitySerializer, CountryAverageSerializer, CountrySerializer, NearbyCitySerializer,
+)
+from .singleflight import weather_report_key, weather_reports
+from .spatial import get_spatial_index
+from .summaries import get_country_summaries
 
 
 class CityListView(generics.ListAPIView):
     serializer_class = CitySerializer
+    pagination_class = CityCursorPagination
 
     def get_queryset(self):
-        queryset = City.objects.order_by('city')
-        search_query = self.request.query_params.get('search', '').capitalize()
+        search_query = self.request.query_params.get('search', '').strip()
         if search_query:
-            queryset = queryset.filter(city__icontains=search_query)
-        return queryset
+            return get_city_index().search(search_query, self.get_search_limit())
+        return City.objects.order_by('city', 'id')
+
+    def get_approximate_count(self):
+        return get_country_summaries().total_cities
+
+    def get_search_limit(self):
+        try:
+            limit = int(
+                self.request.query_params.get('limit', settings.CITY_SEARCH_LIMIT)
+            )
+        except ValueError:
+            limit = settings.CITY_SEARCH_LIMIT
+        return min(max(limit, 1), settings.CITY_SEARCH_MAX_LIMIT)
+
+
+def _not_modified(request, etag):
+    # If-None-Match uses the weak comparison, so W/ prefixed tags match as well
+    etags = parse_etags(request.headers.get('If-None-Match', ''))
+    tags = {tag.removeprefix('W/') for tag in etags}
+    return '*' in tags or etag in tags
+
+
+def _conditional_response(request, data, etag):
+    headers = {
+        'ETag': etag,
+        'Cache-Control': f'max-age={settings.COUNTRY_SUMMARY_CACHE_TTL}',
+    }
+    if _not_modified(request, etag):
+        return Response(status=304, headers=headers)
+    return Response(data, headers=headers)
 
 
 class CountryAverageView(generics.RetrieveAPIView):
@@ -33,135 +82,281 @@ class CountryAverageView(generics.RetrieveAPIView):
         if not country:
             return Response({'error': 'Country parameter is missing'}, status=400)
 
-        average_values = City.objects.filter(country=country.capitalize()).aggregate(
-            average_lat=Avg('lat'),
-            average_lng=Avg('lng')
-        )
-
-        serializer = self.get_serializer(average_values)
-        return Response(serializer.data)
+        average_values, etag = get_country_summaries().average(country.capitalize())
+        return _conditional_response(request, average_values, etag)
 
 
 class CountryListView(generics.ListAPIView):
-    queryset = City.objects.values('country').distinct().order_by('country')
     serializer_class = CountrySerializer
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        summaries = get_country_summaries()
+        return _conditional_response(
+            request, summaries.countries, summaries.countries_etag
+        )
+
 
 class CityByCountryListView(generics.ListAPIView):
     serializer_class = CitySerializer
-    pagination_class = None
+    pagination_class = CityCursorPagination
 
     def get_queryset(self):
         country = self.kwargs['country']
-        return City.objects.filter(country__exact=country.capitalize()).order_by('city')
+        cities = City.objects.filter(country__exact=country.capitalize())
+        return cities.order_by('city', 'id')
+
+    def get_approximate_count(self):
+        country = self.kwargs['country'].capitalize()
+        return get_country_summaries().city_counts.get(country, 0)
+
+
+def _date_range_params(query_params):
+    default_start_date, default_end_date = default_date_range()
+    start_date = query_params.get('start_date', default_start_date)
+    end_date = query_params.get('end_date', default_end_date)
+    date.fromisoformat(start_date)
+    date.fromisoformat(end_date)
+    return start_date, end_date
+
+
+def _forecast_options(query_params, start_date, end_date):
+    requested = query_params.get('models', '').split(',')
+    engines = [engine.strip() for engine in requested if engine.strip()]
+    unknown = [engine for engine in engines if engine not in ENGINES]
+    if unknown:
+        raise ValueError(f'Unknown models: {", ".join(unknown)}. '
+                         f'Available models: {", ".join(ENGINES)}')
+
+    try:
+        train_days = query_params.get('train_days')
+        train_days = int(train_days) if train_days is not None else None
+        resample = query_params.get('resample')
+        resample = int(resample) if resample is not None else None
+    except ValueError:
+        raise ValueError('train_days and resample must be integers')
+    max_train_days = settings.FORECAST_MAX_TRAIN_DAYS
+    if train_days is not None and not 1 <= train_days <= max_train_days:
+        raise ValueError(f'train_days must be between 1 and {max_train_days}')
+    if resample is not None and (not 1 <= resample <= MAX_RESAMPLE_HOURS
+                                 or 24 % resample):
+        raise ValueError('resample must be a number of hours that divides 24, '
+                         f'at most {MAX_RESAMPLE_HOURS}')
+
+    options = ForecastOptions(list(dict.fromkeys(engines)), train_days, resample)
+    range_span = date.fromisoformat(end_date) - date.fromisoformat(start_date)
+    range_days = range_span.days + 1
+    window_days = min(options.train_days or range_days, range_days)
+    if options.resample > 1 and window_days * 24 < MIN_RESAMPLED_HOURS:
+        raise ValueError('resample needs a training window of at least '
+                         f'{MIN_RESAMPLED_HOURS // 24} days')
+    return options
+
+
+class NearestCityView(generics.ListAPIView):
+    serializer_class = NearbyCitySerializer
+    pagination_class = None
+
+    def list(self, request, *args, **kwargs):
+        try:
+            lat = float(request.query_params['lat'])
+            lng = float(request.query_params['lng'])
+            k = int(request.query_params.get('k', 1))
+            limit = int(
+                request.query_params.get('limit', settings.NEAREST_CITY_RADIUS_LIMIT)
+            )
+            radius_km = request.query_params.get('radius_km')
+            radius_km = float(radius_km) if radius_km is not None else None
+        except (KeyError, ValueError):
+            error = 'lat and lng are required, k, limit and radius_km must be numbers'
+            return Response({'error': error}, status=400)
+
+        if not -90 <= lat <= 90 or not -180 <= lng <= 180 or min(k, limit) < 1:
+            return Response(
+                {'error': 'Coordinates, k or limit are out of range'}, status=400
+            )
+        if radius_km is not None and radius_km < 0:
+            return Response({'error': 'radius_km must not be negative'}, status=400)
+
+        # k counts the nearest cities, limit caps the cities within radius_km, both
+        # stay bounded
+        index = get_spatial_index()
+        if radius_km is None:
+            cities = index.nearest(lat, lng, min(k, settings.NEAREST_CITY_MAX_K))
+        else:
+            cities = index.within_radius(
+                lat, lng, radius_km, min(limit, settings.NEAREST_CITY_MAX_K)
+            )
+        return Response(self.get_serializer(cities, many=True).data)
+
+
+def _compact(query_params):
+    return query_params.get('compact', '').lower() in ('1', 'true', 'yes')
+
+
+def _report_headers(etag):
+    return {
+        'ETag': etag,
+        'Cache-Control': f'max-age={settings.WEATHER_REPORT_CACHE_TTL}',
+        'Vary': 'Accept',
+    }
+
+
+def _city_by_name(name):
+    # Several cities share a name, prefer the most populated one
+    return City.objects.filter(city=name).order_by('-population')
 
 
 class WeatherDataView(generics.RetrieveAPIView):
+    renderer_classes = weather_renderer_classes()
+
     def get(self, request, *args, **kwargs):
-        city = City.objects.filter(city=self.kwargs.get('city')).first()
+        city = _city_by_name(self.kwargs.get('city')).first()
+        if city is None:
+            return Response({'error': 'City not found'}, status=404)
         lat = city.lat
         lng = city.lng
 
         if not lat or not lng:
             return Response({'error': 'Latitude and longitude parameters are required'}, status=400)
 
-        start_date = request.query_params.get('start_date',
-                                              (datetime.now() - relativedelta(years=1)).strftime('%Y-%m-%d'))
-        end_date = request.query_params.get('end_date', datetime.now().strftime('%Y-%m-%d'))
+        try:
+            start_date, end_date = _date_range_params(request.query_params)
+        except ValueError:
+            return Response({'error': 'Dates must be in YYYY-MM-DD format'}, status=400)
+        try:
+            options = _forecast_options(request.query_params, start_date, end_date)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+
+        try:
+            key = weather_report_key(city, start_date, end_date, options)
+            report = weather_reports.do(key, precomputed_weather_report, city,
+                                        start_date, end_date, options)
+        except requests.exceptions.RequestException as e:
+            return Response(
+                {'error': f'Request to open-meteo API failed: {str(e)}'}, status=500
+            )
+        except NoObservationsError as e:
+            return Response({'error': str(e)}, status=404)
+        except TrainingWindowTooShort as e:
+            return Response({'error': str(e)}, status=400)
+        except ForecastQueueFull as e:
+            return Response({'error': str(e)}, status=503)
+        except ForecastTimeout as e:
+            return Response({'error': str(e)}, status=504)
+
+        if _compact(request.query_params):
+            report = compact_report(report)
+        headers = _report_headers(report_etag(report, request.accepted_renderer.format))
+        if _not_modified(request, headers['ETag']):
+            return Response(status=304, headers=headers)
+        return Response(report, headers=headers)
+
+
+class WeatherDataAsyncView(View):
+    async def get(self, request, *args, **kwargs):
+        city = await _city_by_name(kwargs.get('city')).afirst()
+        if city is None:
+            return JsonResponse({'error': 'City not found'}, status=404)
+        if not city.lat or not city.lng:
+            return JsonResponse(
+                {'error': 'Latitude and longitude parameters are required'}, status=400
+            )
+
+        try:
+            start_date, end_date = _date_range_params(request.GET)
+        except ValueError:
+            return JsonResponse(
+                {'error': 'Dates must be in YYYY-MM-DD format'}, status=400
+            )
+        try:
+            options = _forecast_options(request.GET, start_date, end_date)
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+
+        try:
+            key = weather_report_key(city, start_date, end_date, options)
+            report = await weather_reports.ado(key, aprecomputed_weather_report, city,
+                                               start_date, end_date, options)
+        except httpx.HTTPError as e:
+            return JsonResponse(
+                {'error': f'Request to open-meteo API failed: {str(e)}'}, status=500
+            )
+        except NoObservationsError as e:
+            return JsonResponse({'error': str(e)}, status=404)
+        except TrainingWindowTooShort as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        except ForecastQueueFull as e:
+            return JsonResponse({'error': str(e)}, status=503)
+        except ForecastTimeout as e:
+            return JsonResponse({'error': str(e)}, status=504)
+
+        if _compact(request.GET):
+            report = compact_report(report)
+        msgpack_requested = accepts_msgpack(request.headers.get('Accept', ''))
+        variant = 'msgpack' if msgpack_requested else 'json'
+        headers = _report_headers(report_etag(report, variant))
+        if _not_modified(request, headers['ETag']):
+            return HttpResponse(status=304, headers=headers)
+
+        with span('serialize'):
+            if msgpack_requested:
+                return HttpResponse(encode_msgpack(report),
+                                    content_type=MSGPACK_MEDIA_TYPE, headers=headers)
+            return JsonResponse(report, headers=headers)
+
+
+class WeatherDataBatchView(generics.GenericAPIView):
+    def get_cities(self):
+        limit = settings.WEATHER_BATCH_MAX_CITIES
+        country = self.request.query_params.get('country')
+        if country:
+            queryset = City.objects.filter(country__exact=country.capitalize())
+            return list(queryset.order_by('-population')[:limit])
+
+        names = self.request.query_params.get('cities', '').split(',')
+        names = [name.strip() for name in names if name.strip()]
+        cities = {}
+        for city in City.objects.filter(city__in=names).order_by('-population'):
+            cities.setdefault(city.city, city)
+        return [cities[name] for name in dict.fromkeys(names) if name in cities][:limit]
 
-        api_url = f"https://archive-api.open-meteo.com/v1/era5?latitude={lat}&longitude={lng}&start_date={start_date}&end_date={end_date}&hourly=temperature_2m,relative_humidity_2m,wind_speed_10m"
+    def get(self, request, *args, **kwargs):
+        cities = self.get_cities()
+        if not cities:
+            return Response(
+                {'error': 'Pass a comma separated cities list or a country'}, status=400
+            )
 
         try:
-            response = requests.get(api_url)
-            response.raise_for_status()
-            weather_data = response.json()
-
-            data = {
-                'time': weather_data['hourly']['time'],
-                'temperature_2m': weather_data['hourly']['temperature_2m'],
-                'relative_humidity_2m': weather_data['hourly']['relative_humidity_2m'],
-                'wind_speed_10m': weather_data['hourly']['wind_speed_10m']
-            }
-
-            df = pd.DataFrame(data)
-            df = df.dropna()
-
-            df['time'] = pd.to_datetime(df['time'])
-            df.columns = ['ds', 'temperature_2m', 'relative_humidity_2m', 'wind_speed_10m']
-
-            model_holtwinters = ExponentialSmoothing(df['temperature_2m'], seasonal='add', seasonal_periods=24)
-            fit_model_holtwinters = model_holtwinters.fit()
-            forecast_holtwinters = fit_model_holtwinters.forecast(steps=24)
-
-            forecast_data_holtwinters = pd.DataFrame(
-                {'time': pd.date_range(start=(datetime.now() + relativedelta(days=1)).strftime('%Y-%m-%d'), periods=24,
-                                       freq='h'),
-                 'temperature_2m': forecast_holtwinters})
-
-            model_arima = ARIMA(df['temperature_2m'], order=(1, 1, 1))
-            fit_model_arima = model_arima.fit()
-            forecast_arima = fit_model_arima.get_forecast(steps=24)
-
-            forecast_data_arima = pd.DataFrame(
-                {'time': pd.date_range(start=(datetime.now() + relativedelta(days=1)).strftime('%Y-%m-%d'), periods=24,
-                                       freq='h'),
-                 'temperature_2m': forecast_arima.predicted_mean})
-
-            response_data = {
-                'forecast_data': {
-                    'time': {
-                        'holtwinters': forecast_data_holtwinters['time'].dt.strftime('%Y-%m-%d %H:%M:%S').tolist(),
-                        'arima': forecast_data_arima['time'].dt.strftime('%Y-%m-%d %H:%M:%S').tolist(),
-                    },
-                    'temperature_2m': {
-                        'holtwinters': forecast_data_holtwinters['temperature_2m'].values.tolist(),
-                        'arima': forecast_data_arima['temperature_2m'].values.tolist(),
-                    }
-                }
-            }
-
-            key_indicators = df[['temperature_2m', 'relative_humidity_2m', 'wind_speed_10m']].describe()
-            response_data['key_indicators'] = key_indicators.to_dict()
-
-            sentence = generate_sentence(response_data['key_indicators'])
-            response_data['sentence'] = sentence
-
-            real_api_url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lng}&current=temperature_2m,wind_speed_10m&hourly=temperature_2m,relative_humidity_2m,wind_speed_10m"
-
-            response_real = requests.get(real_api_url)
-            response_real.raise_for_status()
-            real_weather_data = response_real.json()
-
-            real_temperature = real_weather_data['hourly']['temperature_2m']
-
-            real_temperature_for_comparison = real_temperature[-24:]
-
-            rmse_holtwinters = calculate_rmse(forecast_data_holtwinters['temperature_2m'],
-                                              real_temperature_for_comparison)
-            mae_holtwinters = calculate_mae(forecast_data_holtwinters['temperature_2m'],
-                                            real_temperature_for_comparison)
-            mre_holtwinters = calculate_mre(forecast_data_holtwinters['temperature_2m'],
-                                            real_temperature_for_comparison)
-
-            rmse_arima = calculate_rmse(forecast_data_arima['temperature_2m'], real_temperature_for_comparison)
-            mae_arima = calculate_mae(forecast_data_arima['temperature_2m'], real_temperature_for_comparison)
-            mre_arima = calculate_mre(forecast_data_arima['temperature_2m'], real_temperature_for_comparison)
-
-            response_data['rmse'] = {
-                'holtwinters': rmse_holtwinters,
-                'arima': rmse_arima
-            }
-            response_data['mae'] = {
-                'holtwinters': mae_holtwinters,
-                'arima': mae_arima
-            }
-            response_data['mre'] = {
-                'holtwinters': mre_holtwinters if mre_holtwinters != -1 else 0,
-                'arima': mre_arima if mre_arima != -1 else 0,
-            }
-
-            return Response(response_data)
+            start_date, end_date = _date_range_params(request.query_params)
+        except ValueError:
+            return Response({'error': 'Dates must be in YYYY-MM-DD format'}, status=400)
+        try:
+            options = _forecast_options(request.query_params, start_date, end_date)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
 
+        try:
+            reports = stream_weather_reports(cities, start_date, end_date, options)
         except requests.exceptions.RequestException as e:
-            return Response({'error': f'Request to open-meteo API failed: {str(e)}'}, status=500)
+            return Response(
+                {'error': f'Request to open-meteo API failed: {str(e)}'}, status=500
+            )
+
+        if _compact(request.query_params):
+            reports = ((city, compact_report(report)) for city, report in reports)
+        lines = (
+            json.dumps({'city': city.city, **report}, cls=DjangoJSONEncoder) + '\n'
+            for city, report in reports
+        )
+        return StreamingHttpResponse(lines, content_type='application/x-ndjson')
+
+
+class MetricsView(View):
+    def get(self, request, *args, **kwargs):
+        if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+            raise Http404
+        return HttpResponse(registry.render(),
+                            content_type='text/plain; version=0.0.4; charset=utf-8')